@@ -9,6 +9,7 @@ import lxml.html
 import prairielearn as pl
 import prairielearn.sympy_utils as psu
 import sympy
+from prairielearn.timeout_utils import get_process_timeout_pool
 
 
 class BigOType(Enum):
@@ -42,6 +43,7 @@ PLACEHOLDER_DEFAULT = "asymptotic expression"
 SHOW_SCORE_DEFAULT = True
 ALLOW_BLANK_DEFAULT = False
 BLANK_VALUE_DEFAULT = "1"
+ISOLATE_GRADING_DEFAULT = False
 INITIAL_VALUE_DEFAULT = None
 BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-big-o-input.mustache"
 # This timeout is chosen to allow multiple sympy-based elements to grade on one page,
@@ -105,6 +107,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         "allow-blank",
         "blank-value",
         "initial-value",
+        "isolate-grading",
     ]
     pl.check_attribs(element, required_attribs, optional_attribs)
 
@@ -331,6 +334,9 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     variables = _get_variables_with_fallback(element, data)
 
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
+    isolate_grading = pl.get_boolean_attrib(
+        element, "isolate-grading", ISOLATE_GRADING_DEFAULT
+    )
     a_tru: str | None = data["correct_answers"].get(name)
 
     # No need to grade if no correct answer given
@@ -338,12 +344,29 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         return
 
     big_o_type = pl.get_enum_attrib(element, "type", BigOType, BIG_O_TYPE_DEFAULT)
+    grade_expression = GRADE_FUNCTION_DICT[big_o_type]
+
+    def grade_function(a_sub: str) -> tuple[float, str]:
+        # The limits taken while grading can get stuck in SymPy internals that a
+        # signal can't interrupt, so if requested, grade in a helper process that
+        # is killed if it takes too long.
+        pool = get_process_timeout_pool() if isolate_grading else None
+        if pool is None:
+            return grade_expression(a_tru, a_sub, variables)
+        return pool.run(
+            grade_expression,
+            a_tru,
+            a_sub,
+            variables,
+            timeout=SYMPY_TIMEOUT,
+            cache_key=("pl-big-o-input", big_o_type, a_tru, a_sub, tuple(variables)),
+        )
 
     try:
         pl.grade_answer_parameterized(
             data,
             name,
-            lambda a_sub: GRADE_FUNCTION_DICT[big_o_type](a_tru, a_sub, variables),
+            grade_function,
             weight=weight,
             timeout=SYMPY_TIMEOUT,
             timeout_format_error="Your answer did not converge, so your expression may be too loose or tight.",
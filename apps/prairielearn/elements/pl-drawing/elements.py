@@ -33,6 +33,23 @@ def abserr_ang(ref, x):
     return np.abs(((np.abs(ref - x) + 180) % 360) - 180)
 
 
+def column(objects: list[dict], key: str) -> np.ndarray:
+    return np.array([obj[key] for obj in objects], dtype=np.float64)
+
+
+def angle_matches(refs: list[dict], eang: np.ndarray, angtol: float) -> np.ndarray:
+    """Bulk version of the angle check shared by the vector-like `grade` functions."""
+    rang = column(refs, "angle")
+    error_fwd = abserr_ang(rang[np.newaxis, :], eang[:, np.newaxis])
+    error_bwd = abserr_ang(rang[np.newaxis, :] + 180, eang[:, np.newaxis])
+    disregard_sense = np.array([bool(ref["disregard_sense"]) for ref in refs])
+    return np.where(
+        disregard_sense,
+        ~((error_fwd > angtol) & (error_bwd > angtol)),
+        ~(error_fwd > angtol),
+    )
+
+
 # Drawing Elements
 
 elements = {}
@@ -122,6 +139,28 @@ class ControlledLine(BaseElement):
             and abserr(ey2, ry1) <= ref["offset_y"] + tol
         )
 
+    @staticmethod
+    def grade_all(
+        refs: list[dict], sts: list[dict], tol: float, angtol: float
+    ) -> np.ndarray:
+        ex1, ey1 = column(sts, "x1")[:, np.newaxis], column(sts, "y1")[:, np.newaxis]
+        ex2, ey2 = column(sts, "x2")[:, np.newaxis], column(sts, "y2")[:, np.newaxis]
+        rx1, ry1 = column(refs, "x1"), column(refs, "y1")
+        rx2, ry2 = column(refs, "x2"), column(refs, "y2")
+        tol_x = column(refs, "offset_x") + tol
+        tol_y = column(refs, "offset_y") + tol
+        return (
+            (abserr(ex1, rx1) <= tol_x)
+            & (abserr(ey1, ry1) <= tol_y)
+            & (abserr(ex2, rx2) <= tol_x)
+            & (abserr(ey2, ry2) <= tol_y)
+        ) | (
+            (abserr(ex1, rx2) <= tol_x)
+            & (abserr(ey1, ry2) <= tol_y)
+            & (abserr(ex2, rx1) <= tol_x)
+            & (abserr(ey2, ry1) <= tol_y)
+        )
+
     @staticmethod
     def get_attributes() -> list[str]:
         return [
@@ -794,6 +833,34 @@ class Vector(BaseElement):
 
         return abs(relx) <= tol and -max_backward <= rely <= max_forward
 
+    @staticmethod
+    def grade_all(
+        refs: list[dict], sts: list[dict], tol: float, angtol: float
+    ) -> np.ndarray:
+        ex, ey = column(sts, "left"), column(sts, "top")
+        eang = column(sts, "angle")
+        centered = np.array([st.get("originX", "") == "center" for st in sts])
+        eang_rad = eang * (np.pi / 180.0)
+        half_length = column(sts, "width") / 2
+        ex = np.where(centered, ex - np.cos(eang_rad) * half_length, ex)
+        ey = np.where(centered, ey - np.sin(eang_rad) * half_length, ey)
+
+        rang_rad = column(refs, "angle") * (np.pi / 180.0)
+        cos, sin = np.cos(rang_rad), np.sin(rang_rad)
+        dx = ex[:, np.newaxis] - column(refs, "x1")
+        dy = ey[:, np.newaxis] - column(refs, "y1")
+        rely = cos * dx + sin * dy
+        relx = -sin * dx + cos * dy
+
+        max_backward = column(refs, "offset_backward") + tol
+        max_forward = column(refs, "offset_forward") + tol
+        return (
+            angle_matches(refs, eang, angtol)
+            & (np.abs(relx) <= tol)
+            & (-max_backward <= rely)
+            & (rely <= max_forward)
+        )
+
     @staticmethod
     def get_attributes() -> list[str]:
         return [
@@ -1022,6 +1089,12 @@ class DoubleHeadedVector(BaseElement):
     def grade(ref: dict, st: dict, tol: float, angtol: float) -> bool:
         return Vector.grade(ref, st, tol, angtol)
 
+    @staticmethod
+    def grade_all(
+        refs: list[dict], sts: list[dict], tol: float, angtol: float
+    ) -> np.ndarray:
+        return Vector.grade_all(refs, sts, tol, angtol)
+
 
 class ArcVector(BaseElement):
     @staticmethod
@@ -1266,6 +1339,45 @@ class DistributedLoad(BaseElement):
 
         return True
 
+    @staticmethod
+    def grade_all(
+        refs: list[dict], sts: list[dict], tol: float, angtol: float
+    ) -> np.ndarray:
+        ex, ey = column(sts, "left"), column(sts, "top")
+        eang = column(sts, "angle")
+        elen = column(sts, "range")[:, np.newaxis]
+        ew1, ew2 = column(sts, "w1")[:, np.newaxis], column(sts, "w2")[:, np.newaxis]
+        flipped = np.array([bool(st.get("flipped")) for st in sts])[:, np.newaxis]
+
+        rang_rad = column(refs, "angle") * (np.pi / 180.0)
+        cos, sin = np.cos(rang_rad), np.sin(rang_rad)
+        dx = ex[:, np.newaxis] - column(refs, "x1")
+        dy = ey[:, np.newaxis] - column(refs, "y1")
+        rely = -sin * dx + cos * dy
+        relx = -cos * dx - sin * dy
+
+        max_backward = column(refs, "offset_backward") + tol
+        max_forward = column(refs, "offset_forward") + tol
+        in_box = ~(
+            (relx > tol) | (relx < -tol) | (rely > max_forward) | (rely < -max_backward)
+        )
+
+        # Check the distribution, with the student's weights swapped if it was flipped
+        rw1, rw2 = column(refs, "w1"), column(refs, "w2")
+        fw1, fw2 = np.where(flipped, ew2, ew1), np.where(flipped, ew1, ew2)
+        distribution = np.where(
+            rw1 == rw2,
+            ew1 == ew2,
+            ~(((rw1 < rw2) & (fw1 > fw2)) | ((rw1 > rw2) & (fw1 < fw2))),
+        )
+
+        return (
+            angle_matches(refs, eang, angtol)
+            & ~(abserr(elen, column(refs, "range")) > tol)
+            & in_box
+            & distribution
+        )
+
     @staticmethod
     def get_attributes() -> list[str]:
         return [
@@ -1344,6 +1456,14 @@ class Point(BaseElement):
         relx, rely = epos - rpos
         return abs(relx) <= tol and abs(rely) <= tol
 
+    @staticmethod
+    def grade_all(
+        refs: list[dict], sts: list[dict], tol: float, angtol: float
+    ) -> np.ndarray:
+        relx = column(sts, "left")[:, np.newaxis] - column(refs, "left")
+        rely = column(sts, "top")[:, np.newaxis] - column(refs, "top")
+        return (np.abs(relx) <= tol) & (np.abs(rely) <= tol)
+
     @staticmethod
     def get_attributes() -> list[str]:
         return [
@@ -2646,6 +2766,30 @@ def grade(reference: dict, element: dict, name: str, tol: float, angtol: float):
     return False
 
 
+def grade_all(
+    references: list[dict], students: list[dict], name: str, tol: float, angtol: float
+) -> np.ndarray | None:
+    """
+    Grade every student object against every reference object at once.
+
+    Returns:
+        A boolean array where entry `[i, j]` is `grade(references[j], students[i], ...)`,
+        or `None` if the element has no bulk grader, in which case `grade` should be used.
+    """
+    if name not in elements or not elements[name].is_gradable():
+        return None
+    # A bulk grader is only used if it was written alongside the `grade` that the
+    # element actually uses, so an extension overriding `grade` is never bypassed
+    cls = next(cls for cls in elements[name].__mro__ if "grade" in vars(cls))
+    if "grade_all" not in vars(cls):
+        return None
+    try:
+        return cls.grade_all(references, students, tol, angtol)
+    except (KeyError, TypeError, ValueError):
+        # Malformed objects are left to `grade`, which only sees the pairs it compares
+        return None
+
+
 def register_extension(name, module, data):
     data_obj = {
         "clientFilesUrl": data["options"]
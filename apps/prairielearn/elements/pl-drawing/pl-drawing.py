@@ -4,6 +4,7 @@ import json
 import math
 import random
 import warnings
+from collections import defaultdict
 
 import chevron
 import defaults
@@ -503,14 +504,18 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     # student object.  Ungraded elements are skipped.
     # num_total_ref is the total number of objects that are expected to be graded
     # this disregards optional objects and objects that don't have a grading function
+    gradable_reference = defaultdict(list)
     for ref_element in reference:
         if elements.is_gradable(ref_element["gradingName"]) and ref_element["graded"]:
             matches[ref_element["id"]] = False
+            gradable_reference[ref_element["gradingName"]].append(ref_element)
             if ref_element.get("optional_grading"):
                 continue
             num_total_ref += 1
 
-    # Loop through and check everything
+    # Only graded student objects are compared, and only against reference
+    # objects with the same grading name
+    gradable_student = defaultdict(list)
     for element in student:
         if (
             "gradingName" not in element
@@ -519,25 +524,43 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
             or not element["graded"]
         ):
             continue
+        gradable_student[element["gradingName"]].append(element)
+
+    # Compare all objects sharing a grading name in bulk where the element supports it;
+    # the matches are then assigned in submission order exactly as if each pair had been
+    # graded one at a time
+    bulk_grades = {
+        grading_name: elements.grade_all(
+            gradable_reference[grading_name], students, grading_name, tol, angtol
+        )
+        for grading_name, students in gradable_student.items()
+        if gradable_reference[grading_name]
+    }
+    student_rows = {
+        id(element): row
+        for students in gradable_student.values()
+        for row, element in enumerate(students)
+    }
+
+    # Loop through and check everything
+    for element in student:
+        if id(element) not in student_rows:
+            continue
         # total number of objects inserted by students (using buttons)
         # this will disregard the initial objects placed by question authors
         num_total_st += 1
 
-        for ref_element in reference:
-            if (
-                not elements.is_gradable(ref_element["gradingName"])
-                or not ref_element["graded"]
-                or element["gradingName"] != ref_element["gradingName"]
-            ):
-                # Skip if the reference element is not gradable
-                continue
-
+        grading_name = element["gradingName"]
+        grades = bulk_grades.get(grading_name)
+        for column, ref_element in enumerate(gradable_reference[grading_name]):
             if not disregard_extra_elements and matches[ref_element["id"]]:
                 # Skip if this object has already been matched
                 continue
 
-            if elements.grade(
-                ref_element, element, element["gradingName"], tol, angtol
+            if (
+                grades[student_rows[id(element)], column]
+                if grades is not None
+                else elements.grade(ref_element, element, grading_name, tol, angtol)
             ):
                 if (ref_element.get("optional_grading")) or (
                     disregard_extra_elements and matches[ref_element["id"]]
@@ -1,6 +1,10 @@
 import importlib
 import json
 import math
+import random
+
+import elements
+import pytest
 
 pl_drawing = importlib.import_module("pl-drawing")
 
@@ -295,3 +299,119 @@ def test_grade_only_initial_objects_with_allow_blank_scores_zero() -> None:
     assert "test" not in data["format_errors"]
     assert "test" in data["partial_scores"]
     assert math.isclose(data["partial_scores"]["test"]["score"], 0.0)
+
+
+def random_drawing_object(rng: random.Random, grading_name: str, obj_id: int) -> dict:
+    # Coordinates snap to a grid so that many pairs land exactly on the tolerance boundary
+    obj = {
+        "id": obj_id,
+        "type": grading_name,
+        "gradingName": grading_name,
+        "graded": True,
+        "x1": rng.randrange(0, 200, 10),
+        "y1": rng.randrange(0, 200, 10),
+        "x2": rng.randrange(0, 200, 10),
+        "y2": rng.randrange(0, 200, 10),
+        "left": rng.randrange(0, 200, 10),
+        "top": rng.randrange(0, 200, 10),
+        "angle": rng.choice([0, 45, 90, 135, 180, 270, 300]),
+        "width": rng.choice([40, 60]),
+        "range": rng.choice([40, 60]),
+        "w1": rng.choice([20, 40]),
+        "w2": rng.choice([20, 40]),
+        "offset_x": rng.choice([0, 5]),
+        "offset_y": rng.choice([0, 5]),
+        "offset_forward": rng.choice([0, 10]),
+        "offset_backward": rng.choice([0, 10]),
+        "disregard_sense": rng.random() < 0.5,
+        "flipped": rng.random() < 0.5,
+    }
+    if rng.random() < 0.5:
+        obj["originX"] = "center"
+    return obj
+
+
+@pytest.mark.parametrize(
+    "grading_name",
+    [
+        "pl-point",
+        "pl-vector",
+        "pl-double-headed-vector",
+        "pl-controlled-line",
+        "pl-distributed-load",
+    ],
+)
+def test_grade_all_matches_pairwise_grade(grading_name: str) -> None:
+    rng = random.Random(grading_name)
+    references = [random_drawing_object(rng, grading_name, i) for i in range(40)]
+    students = [random_drawing_object(rng, grading_name, i) for i in range(40)]
+    for student in students[::2]:
+        # Put half the submission right on top of some reference object
+        student.update(
+            (key, value)
+            for key, value in rng.choice(references).items()
+            if key not in {"id", "flipped", "originX"}
+        )
+
+    grades = elements.grade_all(references, students, grading_name, 10, 10)
+
+    assert grades is not None
+    assert grades.any()
+    for i, student in enumerate(students):
+        for j, reference in enumerate(references):
+            assert grades[i, j] == elements.grade(
+                reference, student, grading_name, 10, 10
+            )
+
+
+def test_grade_all_without_bulk_grader() -> None:
+    assert elements.grade_all([], [], "pl-arc-vector", 10, 10) is None
+
+
+@pytest.mark.parametrize("num_objects", [10, 100, 250])
+def test_grade_many_objects(num_objects: int) -> None:
+    element_html = build_element_html(allow_blank=True)
+    grading_names = ["pl-point", "pl-vector", "pl-controlled-line"]
+    reference = []
+    for i in range(num_objects):
+        # Spread the objects out so each one can only match its own copy
+        x, y = 100 * (i % 20), 100 * (i // 20)
+        reference.append({
+            "id": i,
+            "type": grading_names[i % 3],
+            "gradingName": grading_names[i % 3],
+            "graded": True,
+            "x1": x,
+            "y1": y,
+            "x2": x + 40,
+            "y2": y + 40,
+            "left": x,
+            "top": y,
+            "width": 40,
+            "angle": 30,
+            "offset_x": 0,
+            "offset_y": 0,
+            "offset_forward": 0,
+            "offset_backward": 0,
+            "disregard_sense": False,
+        })
+    # Submit every reference object in reverse order, then one extra object that
+    # can't match anything
+    submission = [
+        {**obj, "id": num_objects + i} for i, obj in enumerate(reversed(reference))
+    ]
+    submission.append({
+        **submission[0],
+        "id": 2 * num_objects,
+        "left": -1000,
+        "x1": -1000,
+        "x2": -1000,
+    })
+    data = make_question_data(
+        submitted_answers={"test": submission},
+        correct_answers={"test": reference},
+    )
+
+    pl_drawing.grade(element_html, data)
+
+    assert math.isclose(data["partial_scores"]["test"]["score"], 1 - 1 / num_objects)
@@ -96,6 +96,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             )
 
 
+@pl.render_depends_on("options")
 def render(element_html: str, data: pl.QuestionData) -> str:
     element = lxml.html.fragment_fromstring(element_html)
 
@@ -1,6 +1,8 @@
 import fnmatch
 import hashlib
 import importlib
+import json
+from typing import Any
 
 import pytest
 
@@ -186,3 +188,29 @@ def test_get_answer_name_parts() -> None:
     outputs = {output1, output2, output3, output4}
 
     assert len(outputs) == 4
+
+
+def make_parse_data(answer_name: str, files: list[dict[str, str]]) -> dict[str, Any]:
+    return {
+        "submitted_answers": {answer_name: json.dumps(files)},
+        "format_errors": {},
+    }
+
+
+def test_parse_ignores_client_file_handles() -> None:
+    # Nothing on the server resolves handles, so only inline contents are accepted
+    answer_name = file_upload.get_answer_name("a.py,b.py")
+    question_data = make_parse_data(
+        answer_name,
+        [
+            {"name": "a.py", "handle": "upload-1"},
+            {"name": "b.py", "contents": "YmI="},
+        ],
+    )
+
+    file_upload.parse('<pl-file-upload file-names="a.py,b.py"/>', question_data)
+
+    assert question_data["submitted_answers"]["_files"] == [
+        {"name": "a.py", "contents": ""},
+        {"name": "b.py", "contents": "YmI="},
+    ]
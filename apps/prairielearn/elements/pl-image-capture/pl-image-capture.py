@@ -19,6 +19,14 @@ from PIL import Image
 MOBILE_CAPTURE_ENABLED_DEFAULT = True
 MANUAL_UPLOAD_ENABLED_DEFAULT = False
 ALLOW_BLANK_DEFAULT = False
+MAX_DIMENSION_DEFAULT = 4096
+# Pillow's own default, which was used before the quality was configurable
+IMAGE_QUALITY_DEFAULT = 75
+
+# Hard ceiling on the memory that decoding a submitted image may use, whatever the
+# element's attributes are. Pillow stores most modes with 4 bytes per pixel.
+MAX_DECODED_IMAGE_BYTES = 256 * 1024 * 1024
+DECODED_BYTES_PER_PIXEL = 4
 
 
 def get_answer_name(file_name: str) -> str:
@@ -27,6 +35,63 @@ def get_answer_name(file_name: str) -> str:
     )
 
 
+def load_image(image_bytes: bytes, max_dimension: int) -> Image.Image:
+    """Decode a submitted image, downscaling JPEGs while decoding where possible.
+
+    The image's dimensions are read from its header and checked against
+    `MAX_DECODED_IMAGE_BYTES` before any pixel data is decoded.
+
+    Returns:
+        The decoded image.
+
+    Raises:
+        DecompressionBombError: If decoding the image would use more memory than allowed.
+    """
+    img = Image.open(BytesIO(image_bytes))
+    if img.format == "JPEG" and max(img.size) > max_dimension:
+        # The JPEG decoder can downscale by a power of two while decoding, which
+        # avoids ever holding the full-size image in memory. `draft()` keeps both
+        # sides at least as large as requested, so request the size that the
+        # image will be downscaled to rather than a square.
+        width, height = img.size
+        longest = max(width, height)
+        img.draft(
+            "RGB",
+            (
+                max(1, width * max_dimension // longest),
+                max(1, height * max_dimension // longest),
+            ),
+        )
+
+    width, height = img.size
+    if width * height * DECODED_BYTES_PER_PIXEL > MAX_DECODED_IMAGE_BYTES:
+        raise Image.DecompressionBombError(
+            f"Image dimensions {width}x{height} are too large"
+        )
+
+    img.load()
+    return img
+
+
+def to_jpeg(img: Image.Image, max_dimension: int, quality: int) -> bytes | None:
+    """Downscale an image to fit within `max_dimension` and encode it as a JPEG.
+
+    Returns:
+        The JPEG-encoded image, or `None` if the image is already a JPEG that fits
+        and can be stored as submitted.
+    """
+    if img.format == "JPEG" and max(img.size) <= max_dimension:
+        return None
+
+    img.thumbnail((max_dimension, max_dimension))
+    # `convert()` copies the image even if it's already RGB
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    jpeg_buffer = BytesIO()
+    img.save(jpeg_buffer, format="JPEG", quality=quality)
+    return jpeg_buffer.getvalue()
+
+
 def prepare(element_html: str, data: pl.QuestionData) -> None:
     element = lxml.html.fragment_fromstring(element_html)
 
@@ -37,9 +102,23 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             "mobile-capture-enabled",
             "manual-upload-enabled",
             "allow-blank",
+            "max-dimension",
+            "image-quality",
         ],
     )
 
+    max_dimension = pl.get_integer_attrib(
+        element, "max-dimension", MAX_DIMENSION_DEFAULT
+    )
+    if max_dimension <= 0:
+        raise ValueError('Attribute "max-dimension" must be a positive integer.')
+
+    image_quality = pl.get_integer_attrib(
+        element, "image-quality", IMAGE_QUALITY_DEFAULT
+    )
+    if not 1 <= image_quality <= 95:
+        raise ValueError('Attribute "image-quality" must be between 1 and 95.')
+
     file_name = pl.get_string_attrib(element, "file-name")
     if not file_name.lower().endswith((".jpg", ".jpeg")):
         pl.add_files_format_error(
@@ -129,6 +208,12 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
     file_name = pl.get_string_attrib(element, "file-name")
     answer_name = get_answer_name(file_name)
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
+    max_dimension = pl.get_integer_attrib(
+        element, "max-dimension", MAX_DIMENSION_DEFAULT
+    )
+    image_quality = pl.get_integer_attrib(
+        element, "image-quality", IMAGE_QUALITY_DEFAULT
+    )
 
     # On submission, the captured image is stored directly in submitted_answers.
     # Later, we will move the image to submitted_answers["_files"], and pop
@@ -160,8 +245,13 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
     _, b64_payload = submitted_file_content.split(",", 1)
 
     try:
-        img = Image.open(BytesIO(base64.b64decode(b64_payload)))
-        img.load()
+        img = load_image(base64.b64decode(b64_payload), max_dimension)
+    except Image.DecompressionBombError:
+        pl.add_files_format_error(
+            data,
+            f"Image submission for {file_name} is too large. Try a lower resolution image.",
+        )
+        return
     except Exception:
         pl.add_files_format_error(
             data,
@@ -170,21 +260,21 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         return
 
     # Images submitted are expected to be in JPEG format. This is a safeguard to
-    # ensure that all images uploaded are ultimately stored as JPEGs.
-    if img.format != "JPEG":
-        # Attempt to convert the image to JPEG format.
-        try:
-            jpeg_buffer = BytesIO()
-            rgb_img = img.convert("RGB")
-            rgb_img.save(jpeg_buffer, format="JPEG")
-            jpeg_bytes = jpeg_buffer.getvalue()
-            b64_payload = base64.b64encode(jpeg_bytes).decode("utf-8")
-        except Exception:
-            pl.add_files_format_error(
-                data,
-                f"Image submission for {file_name} is not a JPEG image and could not be converted to one.",
-            )
-            return
+    # ensure that all images uploaded are ultimately stored as JPEGs, no larger
+    # than the element allows.
+    try:
+        jpeg_bytes = to_jpeg(img, max_dimension, image_quality)
+    except Exception:
+        pl.add_files_format_error(
+            data,
+            f"Image submission for {file_name} is not a JPEG image and could not be converted to one.",
+        )
+        return
+    finally:
+        img.close()
+
+    if jpeg_bytes is not None:
+        b64_payload = base64.b64encode(jpeg_bytes).decode("utf-8")
 
     pl.add_submitted_file(data, file_name, b64_payload)
 
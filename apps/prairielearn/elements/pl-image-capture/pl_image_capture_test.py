@@ -0,0 +1,95 @@
+import base64
+import importlib
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+image_capture = importlib.import_module("pl-image-capture")
+
+
+def build_element_html(**attribs: str) -> str:
+    attrs = " ".join(f'{name}="{value}"' for name, value in attribs.items())
+    return f'<pl-image-capture file-name="work.jpeg" {attrs}></pl-image-capture>'
+
+
+def encode_image(img: Image.Image, image_format: str) -> str:
+    buffer = BytesIO()
+    img.save(buffer, format=image_format)
+    b64_payload = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return f"data:image/{image_format.lower()};base64,{b64_payload}"
+
+
+def parse_submission(element_html: str, data_uri: str) -> dict:
+    data = {
+        "submitted_answers": {image_capture.get_answer_name("work.jpeg"): data_uri},
+        "raw_submitted_answers": {},
+        "format_errors": {},
+    }
+    image_capture.parse(element_html, data)
+    return data
+
+
+def submitted_image(data: dict) -> Image.Image:
+    (submitted_file,) = data["submitted_answers"]["_files"]
+    return Image.open(BytesIO(base64.b64decode(submitted_file["contents"])))
+
+
+def test_parse_keeps_small_jpeg_unchanged() -> None:
+    data_uri = encode_image(Image.new("RGB", (640, 480), "white"), "JPEG")
+
+    data = parse_submission(build_element_html(), data_uri)
+
+    assert data["format_errors"] == {}
+    (submitted_file,) = data["submitted_answers"]["_files"]
+    assert submitted_file["contents"] == data_uri.split(",", 1)[1]
+
+
+def test_parse_converts_png_to_jpeg() -> None:
+    data_uri = encode_image(Image.new("RGBA", (640, 480), "white"), "PNG")
+
+    data = parse_submission(build_element_html(), data_uri)
+
+    assert data["format_errors"] == {}
+    img = submitted_image(data)
+    assert img.format == "JPEG"
+    assert img.size == (640, 480)
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG"])
+@pytest.mark.parametrize("size", [(2000, 1500), (4032, 3024), (8064, 6048)])
+def test_parse_downscales_large_images(
+    image_format: str, size: tuple[int, int]
+) -> None:
+    # Phone photos are typically 12 to 48 megapixels
+    data_uri = encode_image(Image.new("RGB", size, "white"), image_format)
+
+    data = parse_submission(build_element_html(**{"max-dimension": "1600"}), data_uri)
+
+    assert data["format_errors"] == {}
+    img = submitted_image(data)
+    assert img.format == "JPEG"
+    assert max(img.size) == 1600
+    assert img.size[0] / img.size[1] == pytest.approx(size[0] / size[1], rel=0.01)
+
+
+def test_load_image_decodes_large_jpeg_at_reduced_size() -> None:
+    buffer = BytesIO()
+    Image.new("RGB", (8064, 6048), "white").save(buffer, format="JPEG")
+
+    img = image_capture.load_image(buffer.getvalue(), 1600)
+
+    # The largest power-of-two reduction that keeps the image at least 1600 wide
+    assert img.size == (2016, 1512)
+
+
+def test_parse_rejects_images_over_memory_ceiling(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(image_capture, "MAX_DECODED_IMAGE_BYTES", 100 * 100 * 4)
+    data_uri = encode_image(Image.new("RGB", (101, 100), "white"), "PNG")
+
+    data = parse_submission(build_element_html(), data_uri)
+
+    assert "_files" not in data["submitted_answers"]
+    assert "too large" in data["format_errors"]["_files"][0]
@@ -1,7 +1,8 @@
-import itertools
 from collections import Counter
 from collections.abc import Generator, Iterable, Mapping, Sequence
 from copy import deepcopy
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import TypeIs
 
 import networkx as nx
@@ -11,6 +12,8 @@ Edges = list[str]
 Multigraph = dict[str, Edges | ColoredEdges]
 Dag = dict[str, Edges]
 
+GRADING_INDEX_CACHE_SIZE = 256
+
 
 def validate_grouping(
     graph: nx.DiGraph, group_belonging: Mapping[str, str | None]
@@ -188,6 +191,94 @@ def add_edges_for_groups(
         graph.remove_node(group_tag)
 
 
+@dataclass(frozen=True, slots=True)
+class GradingIndex:
+    """
+    Reachability information about a question's DAG that doesn't depend on the submission.
+
+    Each node is assigned a bit, and the sets of nodes related to it are stored as integer
+    bitsets so that submissions can be checked without walking the graph.
+    """
+
+    graph: nx.DiGraph
+    bits: Mapping[str, int]
+    """A single bit identifying each node."""
+    predecessors: Mapping[str, int]
+    """The nodes each node directly depends on."""
+    descendants: Mapping[str, int]
+    """The nodes that must come after each node in any correct solution."""
+
+    def nodes_of(self, bitset: int) -> list[str]:
+        """Return the nodes whose bits are set, in the graph's node order."""
+        return [node for node, bit in self.bits.items() if bitset & bit]
+
+    def check_topological_sorting(self, submission: Sequence[str | None]) -> int:
+        """
+        Equivalent to `check_topological_sorting(submission, self.graph)`.
+
+        Returns:
+            - Index of first element not topologically sorted, or length of list if
+              sorted
+        """
+        seen = 0
+        for i, node in enumerate(submission):
+            if node is None:
+                return i
+            predecessors = self.predecessors.get(node)
+            if predecessors is None:
+                # Not a node of the graph, so fall back to the graph's own lookup
+                if not all(
+                    self.bits.get(u, 0) & seen for (u, _) in self.graph.in_edges(node)
+                ):
+                    return i
+            elif predecessors & ~seen:
+                return i
+            seen |= self.bits.get(node, 0)
+        return len(submission)
+
+
+def get_grading_index(
+    depends_graph: Mapping[str, list[str]], group_belonging: Mapping[str, str | None]
+) -> GradingIndex:
+    """
+    Build the grading index for a question, reusing it while the worker that built it runs.
+
+    - depends_graph: The dependency graph between blocks specified in the question
+    - group_belonging: which pl-block-group each block belongs to, specified in the question
+
+    Returns:
+        - The (shared, so not to be modified) grading index of the question's DAG
+    """
+    return _build_grading_index(
+        tuple((node, tuple(edges)) for node, edges in depends_graph.items()),
+        tuple(group_belonging.items()),
+    )
+
+
+# This module is imported by the element, so a worker drops it, and this cache,
+# when it is replaced or reset after each request (even a warm worker does).
+# An index is only reused within a request, like by `grade_dag()` and
+# `lcs_partial_credit()` grading the same submission.
+@lru_cache(maxsize=GRADING_INDEX_CACHE_SIZE)
+def _build_grading_index(
+    depends_graph: tuple[tuple[str, tuple[str, ...]], ...],
+    group_belonging: tuple[tuple[str, str | None], ...],
+) -> GradingIndex:
+    graph = dag_to_nx(
+        {node: list(edges) for node, edges in depends_graph}, dict(group_belonging)
+    )
+    bits = {node: 1 << i for i, node in enumerate(graph)}
+    predecessors = {
+        node: sum(bits[u] for u in graph.predecessors(node)) for node in graph
+    }
+    descendants: dict[str, int] = {}
+    for node in reversed(list(nx.topological_sort(graph))):
+        descendants[node] = 0
+        for v in graph.successors(node):
+            descendants[node] |= bits[v] | descendants[v]
+    return GradingIndex(graph, bits, predecessors, descendants)
+
+
 def grade_dag(
     submission: Sequence[str | None],
     depends_graph: Mapping[str, list[str]],
@@ -207,12 +298,14 @@ def grade_dag(
           conditions, starting from the beginning, and the length of any
           correct solution
     """
-    graph = dag_to_nx(depends_graph, group_belonging)
+    index = get_grading_index(depends_graph, group_belonging)
 
-    top_sort_correctness = check_topological_sorting(submission, graph)
+    top_sort_correctness = index.check_topological_sorting(submission)
     grouping_correctness = check_grouping(submission, group_belonging)
 
-    return min(top_sort_correctness, grouping_correctness), graph.number_of_nodes()
+    return min(
+        top_sort_correctness, grouping_correctness
+    ), index.graph.number_of_nodes()
 
 
 def grade_multigraph(
@@ -222,14 +315,18 @@ def grade_multigraph(
 ) -> tuple[int, int, Dag]:
     top_sort_correctness = []
     collapsed_dags = list(collapse_multigraph(multigraph, final_blocks))
-    graphs = [dag_to_nx(graph, {}) for graph in collapsed_dags]
-    for graph in graphs:
-        sub = [x if x in graph.nodes() else None for x in submission]
-        top_sort_correctness.append(check_topological_sorting(sub, graph))
+    indices = [get_grading_index(graph, {}) for graph in collapsed_dags]
+    for index in indices:
+        sub = [x if x in index.bits else None for x in submission]
+        top_sort_correctness.append(index.check_topological_sorting(sub))
 
     max_correct = max(top_sort_correctness)
     max_index = top_sort_correctness.index(max_correct)
-    return max_correct, graphs[max_index].number_of_nodes(), collapsed_dags[max_index]
+    return (
+        max_correct,
+        indices[max_index].graph.number_of_nodes(),
+        collapsed_dags[max_index],
+    )
 
 
 def is_vertex_cover(G: nx.DiGraph, vertex_cover: Iterable[str]) -> bool:
@@ -245,6 +342,97 @@ def is_vertex_cover(G: nx.DiGraph, vertex_cover: Iterable[str]) -> bool:
     return all(u in cover or v in cover for u, v in G.edges)
 
 
+def find_grouping_violation(
+    submission: Sequence[str], group_belonging: Mapping[str, str | None]
+) -> tuple[str, str, str] | None:
+    """
+    Find a witness that some `pl-block-group` is not contiguous in the submission.
+
+    Returns:
+        - A tuple `(first, intruder, last)` where `first` and `last` belong to the
+          same group and `intruder` sits between them without belonging to that
+          group, or `None` if every group is contiguous
+    """
+    last_seen: dict[str, int] = {}
+    for i, node in enumerate(submission):
+        group_tag = group_belonging.get(node)
+        if group_tag is None:
+            continue
+        start = last_seen.get(group_tag)
+        if start is not None and start != i - 1:
+            for intruder in submission[start + 1 : i]:
+                if group_belonging.get(intruder) != group_tag:
+                    return submission[start], intruder, node
+        last_seen[group_tag] = i
+    return None
+
+
+def minimum_deletion_set_size(
+    problematic_subgraph: nx.DiGraph,
+    submission: Sequence[str],
+    group_belonging: Mapping[str, str | None],
+) -> int:
+    """
+    Compute the size of the smallest set of nodes of the problematic subgraph whose deletion from
+    the submission both covers every edge of the subgraph and leaves every `pl-block-group`
+    contiguous. This is an exact branch-and-bound search:
+        1. Every uncovered edge `(u, v)` forces `u` or `v` into the set, and every separated group
+        `first, ..., intruder, ..., last` forces one of those three nodes into the set, so we branch
+        on those choices. A node we decided not to delete is never reconsidered in that branch, so
+        each candidate set is visited at most once.
+        2. A greedy matching over the uncovered edges is a lower bound on the number of further
+        deletions needed, which lets us prune any branch that can't beat the best set found so far.
+        3. Deleting every node but one is always accepted, matching the upper bound used by the
+        exhaustive search this replaces.
+    - problematic_subgraph: the subgraph built by `lcs_partial_credit`
+    - submission: the block ordering given by the student, with distractors removed
+    - group_belonging: which pl-block-group each block belongs to, specified in the question
+
+    Returns:
+        - The minimum number of deletions, capped at one less than the number of problematic nodes
+    """
+    edges = list(problematic_subgraph.edges)
+    best = problematic_subgraph.number_of_nodes() - 1
+
+    def uncovered_lower_bound(deleted: frozenset[str]) -> int:
+        matched: set[str] = set()
+        for u, v in edges:
+            if (
+                u not in deleted
+                and v not in deleted
+                and u not in matched
+                and v not in matched
+            ):
+                matched.update((u, v))
+        return len(matched) // 2
+
+    def search(deleted: frozenset[str], kept: frozenset[str]) -> None:
+        nonlocal best
+        if len(deleted) + uncovered_lower_bound(deleted) >= best:
+            return
+
+        uncovered = next(
+            ((u, v) for u, v in edges if u not in deleted and v not in deleted), None
+        )
+        if uncovered is not None:
+            candidates: Sequence[str] = uncovered
+        else:
+            edited_submission = [x for x in submission if x not in deleted]
+            violation = find_grouping_violation(edited_submission, group_belonging)
+            if violation is None:
+                best = len(deleted)
+                return
+            candidates = violation
+
+        for i, node in enumerate(candidates):
+            if node in kept:
+                continue
+            search(deleted | {node}, kept.union(candidates[:i]))
+
+    search(frozenset(), frozenset())
+    return best
+
+
 def lcs_partial_credit(
     submission: Sequence[str | None],
     depends_graph: Mapping[str, list[str]],
@@ -272,21 +460,19 @@ def lcs_partial_credit(
     Returns:
         - Edit distance from the student submission to some correct solution
     """
-    graph = dag_to_nx(depends_graph, group_belonging)
-    trans_clos = nx.transitive_closure(graph)
+    index = get_grading_index(depends_graph, group_belonging)
     submission_no_distractors = [
         node for node in submission if node in depends_graph and node is not None
     ]
 
     # if node1 must occur before node2 in any correct solution, but node2 occurs before
     # node1 in the submission, add them both and an edge between them to the problematic subgraph
-    seen = set()
+    seen = 0
     problematic_subgraph = nx.DiGraph()
     for node1 in submission_no_distractors:
-        for node2 in seen:
-            if trans_clos.has_edge(node1, node2):
-                problematic_subgraph.add_edge(node1, node2)
-        seen.add(node1)
+        for node2 in index.nodes_of(index.descendants.get(node1, 0) & seen):
+            problematic_subgraph.add_edge(node1, node2)
+        seen |= index.bits.get(node1, 0)
 
     # if two nodes are in the same `pl-block-group`, but don't occur next to one another in the
     # submission, add them and all nodes in between to the problematic subgraph
@@ -308,32 +494,15 @@ def lcs_partial_credit(
     if problematic_subgraph.number_of_nodes() == 0:
         mvc_size = 0
     else:
-        mvc_size = problematic_subgraph.number_of_nodes() - 1
-        for i in range(1, problematic_subgraph.number_of_nodes() - 1):
-            for subset in itertools.combinations(problematic_subgraph, i):
-                # make sure deleting subset will resolve blocks out of order
-                if not is_vertex_cover(problematic_subgraph, subset):
-                    continue
-
-                # make sure deleting subset will resolve a separated pl-block-group
-                edited_submission = [
-                    x for x in submission_no_distractors if x not in subset
-                ]
-                edited_group_belonging = {
-                    key: group_belonging.get(key) for key in edited_submission
-                }
-                if len(edited_submission) == check_grouping(
-                    edited_submission, edited_group_belonging
-                ):
-                    mvc_size = len(subset)
-                    break
-
-            if mvc_size < problematic_subgraph.number_of_nodes() - 1:
-                break
+        mvc_size = minimum_deletion_set_size(
+            problematic_subgraph, submission_no_distractors, group_belonging
+        )
 
     num_distractors = len(submission) - len(submission_no_distractors)
     deletions_needed = num_distractors + mvc_size
-    insertions_needed = graph.number_of_nodes() - (len(submission) - deletions_needed)
+    insertions_needed = index.graph.number_of_nodes() - (
+        len(submission) - deletions_needed
+    )
     return deletions_needed + insertions_needed
 
 
@@ -1,7 +1,15 @@
+import bisect
+import itertools
+import random
+
+import networkx as nx
 import pytest
 from dag_checker import (
     Multigraph,
+    check_grouping,
+    check_topological_sorting,
     dag_to_nx,
+    get_grading_index,
     grade_dag,
     grade_multigraph,
     lcs_partial_credit,
@@ -110,6 +118,76 @@ def test_grade_dag() -> None:
         )
 
 
+def exhaustive_partial_credit(
+    submission: list[str],
+    depends_graph: dict[str, list[str]],
+    group_belonging: dict[str, str | None],
+) -> int:
+    """Reference edit distance found by trying every set of deletions, smallest first."""
+    graph = dag_to_nx(depends_graph, group_belonging)
+    trans_clos = nx.transitive_closure(graph)
+    candidates = [node for node in submission if node in depends_graph]
+    for num_deleted in range(len(candidates) + 1):
+        for deleted in itertools.combinations(range(len(candidates)), num_deleted):
+            remaining = [x for i, x in enumerate(candidates) if i not in deleted]
+            if any(
+                trans_clos.has_edge(later, earlier)
+                for i, earlier in enumerate(remaining)
+                for later in remaining[i + 1 :]
+            ):
+                continue
+            remaining_groups = {x: group_belonging.get(x) for x in remaining}
+            if check_grouping(remaining, remaining_groups) != len(remaining):
+                continue
+            deletions = len(submission) - len(remaining)
+            return deletions + graph.number_of_nodes() - len(remaining)
+    raise AssertionError("unreachable")
+
+
+def test_lcs_partial_credit_matches_exhaustive_search() -> None:
+    rng = random.Random(0)
+    for _ in range(200):
+        nodes = [str(i) for i in range(rng.randint(2, 8))]
+        groups: dict[str, str] = {}
+        if rng.random() < 0.5:
+            for group in ("g1", "g2"):
+                for node in rng.sample(nodes, min(3, len(nodes))):
+                    groups.setdefault(node, group)
+        depends_graph = {
+            node: [
+                dependency
+                for dependency in nodes[:i]
+                if rng.random() < 0.3 and groups.get(dependency) == groups.get(node)
+            ]
+            for i, node in enumerate(nodes)
+        }
+        depends_graph.update({group: [] for group in set(groups.values())})
+        group_belonging = {node: groups.get(node) for node in nodes}
+        submission = rng.sample(nodes, len(nodes))
+        assert lcs_partial_credit(
+            submission, depends_graph, group_belonging
+        ) == exhaustive_partial_credit(submission, depends_graph, group_belonging)
+
+
+@pytest.mark.parametrize("num_blocks", [10, 15, 20, 25])
+def test_lcs_partial_credit_scrambled_chain(num_blocks: int) -> None:
+    # A single chain where every block depends on the previous one is the worst case for
+    # the problematic subgraph: every inverted pair of blocks becomes an edge.
+    nodes = [str(i) for i in range(num_blocks)]
+    depends_graph = {node: nodes[i - 1 : i] for i, node in enumerate(nodes)}
+
+    assert lcs_partial_credit(nodes[::-1], depends_graph, {}) == 2 * (num_blocks - 1)
+
+    submission = random.Random(num_blocks).sample(nodes, num_blocks)
+    # Blocks that can stay are exactly a longest increasing subsequence of the submission.
+    longest_increasing: list[int] = []
+    for position in (int(node) for node in submission):
+        i = bisect.bisect_left(longest_increasing, position)
+        longest_increasing[i : i + 1] = [position]
+    expected = 2 * (num_blocks - len(longest_increasing))
+    assert lcs_partial_credit(submission, depends_graph, {}) == expected
+
+
 problem_3_invalid_dag_1 = {
     "1": [],
     "2": ["1"],
@@ -234,3 +312,21 @@ def test_solve_multigraph() -> None:
             len(solution)
             == grade_multigraph(solution, problem_7_valid, problem_7_final)[0]
         )
+
+
+def test_grading_index_is_shared_between_submissions() -> None:
+    index = get_grading_index(problem_2_dag, problem_2_groups)
+    assert get_grading_index(dict(problem_2_dag), dict(problem_2_groups)) is index
+
+    graph = dag_to_nx(problem_2_dag, problem_2_groups)
+    for submission in problem_2_submissions:
+        assert index.check_topological_sorting(submission) == check_topological_sorting(
+            submission, graph
+        )
+
+    trans_clos = nx.transitive_closure(graph)
+    assert isinstance(trans_clos, nx.DiGraph)
+    for node in graph:
+        assert set(index.nodes_of(index.descendants[node])) == set(
+            trans_clos.successors(node)
+        )
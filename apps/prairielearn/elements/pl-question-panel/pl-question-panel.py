@@ -7,6 +7,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     pl.check_attribs(element, required_attribs=[], optional_attribs=[])
 
 
+@pl.render_depends_on()
 def render(element_html: str, data: pl.QuestionData) -> str:
     if data["panel"] == "question":
         element = lxml.html.fragment_fromstring(element_html)
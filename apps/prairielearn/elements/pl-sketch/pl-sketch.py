@@ -9,7 +9,7 @@ from typing import Any, Literal, NotRequired, TypedDict, cast
 import chevron
 import lxml.html
 import prairielearn as pl
-from pl_sketch_grading import grade_submission
+from pl_sketch_grading import get_submission_geometry, grade_submission
 from prairielearn.question_utils import PartialScore
 from sketchresponse.types import (
     SketchCanvasSize,
@@ -1158,6 +1158,9 @@ def _grade_with_staging(name: str, data: pl.QuestionData, weight: int) -> Partia
 
     debug = any(grader["debug"] for grader in graders)
 
+    # All graders share one decoded copy of the submission and its parsed drawings
+    geometry = get_submission_geometry(data, name)
+
     # get the score, weight, feedback for each grader
     scores = []
     grader_weights = []
@@ -1173,7 +1176,7 @@ def _grade_with_staging(name: str, data: pl.QuestionData, weight: int) -> Partia
         for grader in graders:
             # We grade all criteria (even if a previous stage failed)
             grader_score, grader_weight, grader_feedback = grade_submission(
-                grader, data, name
+                grader, data, name, geometry
             )
             grader_weights.append(grader_weight)
             if grader_score == 1:
@@ -1,5 +1,8 @@
 import base64
 import json
+from collections.abc import Callable
+from functools import lru_cache
+from typing import cast
 
 import prairielearn as pl
 from sketchresponse.grader_lib import (
@@ -26,16 +29,69 @@ from sketchresponse.utils import (
 )
 
 
+class SketchGeometry:
+    """The parsed geometry of a single submission, shared by every grader that grades it.
+
+    Tool graders are cached by tool id together with the grader settings that affect how
+    they are built (the grader type and tolerance). Graders with debugging enabled always
+    get a fresh tool grader, since its debug messages would otherwise leak between graders.
+    """
+
+    def __init__(self, submission: SketchSubmission, config: SketchConfig) -> None:
+        self.submission = submission
+        self.config = config
+        self._flipped: SketchGeometry | None = None
+        self._tool_graders: dict[tuple[object, str, str, float], object] = {}
+
+    def flipped(self) -> "SketchGeometry":
+        """Return the geometry of the submission with the x and y axes swapped."""
+        if self._flipped is None:
+            self._flipped = SketchGeometry(
+                *flip_grader_data(self.submission, self.config)
+            )
+        return self._flipped
+
+    def tool_grader[ToolGraderT](
+        self,
+        cls: Callable[[SketchGrader, SketchSubmission, SketchConfig, str], ToolGraderT],
+        grader: SketchGrader,
+        toolid: str,
+    ) -> ToolGraderT:
+        """Return a tool grader of the given class for one tool of the submission."""
+        key = (cls, toolid, grader["type"], grader["tolerance"])
+        if not grader["debug"] and key in self._tool_graders:
+            return cast("ToolGraderT", self._tool_graders[key])
+
+        # Tool graders for polar plots replace their tool's data in the submission
+        # with the transformed data, so each one gets its own top-level copy
+        submission: SketchSubmission = {
+            **self.submission,
+            "gradeable": dict(self.submission.get("gradeable", {})),
+        }
+        tool_grader = cls(grader, submission, self.config, toolid)
+        if not grader["debug"]:
+            self._tool_graders[key] = tool_grader
+        return tool_grader
+
+
+@lru_cache(maxsize=256)
+def parse_function(fun: str) -> Callable[[float], float]:
+    """Return the compiled function for a grader's `fun` expression, reusing earlier parses."""
+    return parse_function_string(fun)
+
+
 def grade_answer(
     grader: SketchGrader,
     submitted_answer: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry | None = None,
 ) -> tuple[float, int, list[str]]:
     """Grade a single answer against a grading criterion.
 
     Unlike grade_submission, this takes the decoded submission dict directly
-    rather than reading from the data dict.
+    rather than reading from the data dict. Pass the same `geometry` when grading
+    one submission against several criteria so they share its parsed drawings.
 
     Returns:
         A tuple of (score, weight, feedback).
@@ -43,45 +99,69 @@ def grade_answer(
     Raises:
         ValueError: If the grader type is unknown.
     """
+    if geometry is None:
+        geometry = SketchGeometry(submitted_answer, config)
     match grader["type"]:
         case "match":
-            return match(grader, submitted_answer, config, tool_dict)
+            return match(grader, submitted_answer, config, tool_dict, geometry)
         case "count":
-            return count(grader, submitted_answer, config, tool_dict)
+            return count(grader, submitted_answer, config, tool_dict, geometry)
         case "match-function":
-            return match_fun(grader, submitted_answer, config, tool_dict)
+            return match_fun(grader, submitted_answer, config, tool_dict, geometry)
         case "monot-increasing":
-            return monot_increasing(grader, submitted_answer, config, tool_dict)
+            return monot_increasing(
+                grader, submitted_answer, config, tool_dict, geometry
+            )
         case "monot-decreasing":
-            return monot_decreasing(grader, submitted_answer, config, tool_dict)
+            return monot_decreasing(
+                grader, submitted_answer, config, tool_dict, geometry
+            )
         case "concave-up":
-            return concave_up(grader, submitted_answer, config, tool_dict)
+            return concave_up(grader, submitted_answer, config, tool_dict, geometry)
         case "concave-down":
-            return concave_down(grader, submitted_answer, config, tool_dict)
+            return concave_down(grader, submitted_answer, config, tool_dict, geometry)
         case "defined-in":
-            return defined_in(grader, submitted_answer, config, tool_dict)
+            return defined_in(grader, submitted_answer, config, tool_dict, geometry)
         case "undefined-in":
-            return undefined_in(grader, submitted_answer, config, tool_dict)
+            return undefined_in(grader, submitted_answer, config, tool_dict, geometry)
         case "greater-than":
-            return greater_than(grader, submitted_answer, config, tool_dict)
+            return greater_than(grader, submitted_answer, config, tool_dict, geometry)
         case "less-than":
-            return less_than(grader, submitted_answer, config, tool_dict)
+            return less_than(grader, submitted_answer, config, tool_dict, geometry)
         case _:
             raise ValueError(f"Unknown grader type: {grader['type']}")
 
 
-def grade_submission(
-    grader: SketchGrader, data: pl.QuestionData, name: str
-) -> tuple[float, int, list[str]]:
+def get_submission_geometry(data: pl.QuestionData, name: str) -> SketchGeometry:
+    """Decode the submission of a pl-sketch element so that it can be graded.
+
+    Returns:
+        The geometry of the submission, to be shared by all of the element's graders.
+
+    Raises:
+        ValueError: If there is no submission.
+    """
     submission = data["submitted_answers"][name + "-sketchresponse-submission"]
     if submission is None:
         raise ValueError("Cannot grade empty submission")
 
     submitted_answer = json.loads(base64.b64decode(submission).decode("utf-8"))
-    config = data["params"][name]["config"]
+    return SketchGeometry(submitted_answer, data["params"][name]["config"])
+
+
+def grade_submission(
+    grader: SketchGrader,
+    data: pl.QuestionData,
+    name: str,
+    geometry: SketchGeometry | None = None,
+) -> tuple[float, int, list[str]]:
+    if geometry is None:
+        geometry = get_submission_geometry(data, name)
     tool_dict = data["params"][name]["tool_data"]
 
-    return grade_answer(grader, submitted_answer, config, tool_dict)
+    return grade_answer(
+        grader, geometry.submission, geometry.config, tool_dict, geometry
+    )
 
 
 def match(
@@ -89,6 +169,7 @@ def match(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
     x, y = grader["x"], grader["y"]
     feedback_value = ("x = " + str(x)) if x is not None else ("y = " + str(y))
@@ -112,13 +193,13 @@ def match(
     for toolid in tools_to_check:
         tool_used = tool_dict[toolid]["name"]
         if tool_used == "polyline" and tool_dict[toolid]["closed"]:
-            tool_grader = Polygon.Polygons(grader, submission, config, toolid)
+            tool_grader = geometry.tool_grader(Polygon.Polygons, grader, toolid)
             correct = tool_grader.contains_point(
                 x=x, y=y, tolerance=tolerance
             )  # no tolerance for (x,y) point currently
         elif tool_used in gf_tools:
-            tool_grader = GradeableFunction.GradeableFunction(
-                grader, submission, config, toolid
+            tool_grader = geometry.tool_grader(
+                GradeableFunction.GradeableFunction, grader, toolid
             )
             if tool_used == "point":
                 correct = tool_grader.has_point_at(x=x, y=y, distTolerance=tolerance)
@@ -128,18 +209,18 @@ def match(
                 )  # Note: also has x tolerance
         elif tool_used == "vertical-line":
             assert x is not None  # validated in prepare
-            tool_grader = Asymptote.VerticalAsymptotes(
-                grader, submission, config, toolid
+            tool_grader = geometry.tool_grader(
+                Asymptote.VerticalAsymptotes, grader, toolid
             )
             correct = tool_grader.has_asym_at_value(x, tolerance=tolerance)
         elif tool_used == "horizontal-line":
             assert y is not None  # validated in prepare
-            tool_grader = Asymptote.HorizontalAsymptotes(
-                grader, submission, config, toolid
+            tool_grader = geometry.tool_grader(
+                Asymptote.HorizontalAsymptotes, grader, toolid
             )
             correct = tool_grader.has_asym_at_value(y, tolerance=tolerance)
         elif tool_used == "line-segment":
-            tool_grader = LineSegment.LineSegments(grader, submission, config, toolid)
+            tool_grader = geometry.tool_grader(LineSegment.LineSegments, grader, toolid)
             if grader["endpoint"]:
                 assert x is not None
                 assert y is not None
@@ -167,6 +248,7 @@ def match_fun(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
     tolerance = grader["tolerance"]
     feedback = grader["feedback"] or "Drawing does not match expected function."
@@ -176,7 +258,8 @@ def match_fun(
 
     if grader["xyflip"]:
         xrange = grader["yrange"]
-        submission, config = flip_grader_data(submission, config)
+        geometry = geometry.flipped()
+        submission = geometry.submission
     else:
         xrange = grader["xrange"]
 
@@ -185,7 +268,7 @@ def match_fun(
         raise ValueError("Encountered function grader without required parameters")
 
     x1, x2 = xrange
-    func = parse_function_string(grader["fun"])
+    func = parse_function(grader["fun"])
 
     debug = grader["debug"]
     debug_message = []
@@ -197,8 +280,8 @@ def match_fun(
         correct = False
     for toolid in tools_to_check:
         tool_used = tool_dict[toolid]["name"]
-        tool_grader = GradeableFunction.GradeableFunction(
-            grader, submission, config, toolid
+        tool_grader = geometry.tool_grader(
+            GradeableFunction.GradeableFunction, grader, toolid
         )
         correct = tool_grader.matches_function(func, x1, x2, tolerance)
         if not correct:
@@ -226,6 +309,7 @@ def count(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
     tolerance = grader["tolerance"]
     feedback = grader["feedback"] or "Incorrect number of drawings used."
@@ -317,8 +401,11 @@ def monot_increasing(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
-    return check_monot_change(grader, submission, config, tool_dict, increasing=True)
+    return check_monot_change(
+        grader, submission, config, tool_dict, geometry, increasing=True
+    )
 
 
 def monot_decreasing(
@@ -326,8 +413,11 @@ def monot_decreasing(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
-    return check_monot_change(grader, submission, config, tool_dict, increasing=False)
+    return check_monot_change(
+        grader, submission, config, tool_dict, geometry, increasing=False
+    )
 
 
 # Function used for both monot increasing and decreasing
@@ -336,6 +426,7 @@ def check_monot_change(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
     increasing: bool,
 ) -> tuple[float, int, list[str]]:
     i_d = "increasing" if increasing else "decreasing"
@@ -368,7 +459,7 @@ def check_monot_change(
 
         tool_used = tool_dict[toolid]["name"]
         if tool_used == "line-segment":
-            tool_grader = LineSegment.LineSegments(grader, submission, config, toolid)
+            tool_grader = geometry.tool_grader(LineSegment.LineSegments, grader, toolid)
             if increasing:
                 correct = tool_grader.is_increasing_between(x1, x2)
             else:
@@ -377,8 +468,8 @@ def check_monot_change(
             if debug:
                 debug_message += tool_grader.debugger.get_message_as_list_and_clear()
         else:
-            tool_grader = GradeableFunction.GradeableFunction(
-                grader, submission, config, toolid
+            tool_grader = geometry.tool_grader(
+                GradeableFunction.GradeableFunction, grader, toolid
             )
             if increasing:
                 correct = tool_grader.is_increasing_between(
@@ -404,8 +495,11 @@ def concave_up(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
-    return check_concavity(grader, submission, config, tool_dict, conc_up=True)
+    return check_concavity(
+        grader, submission, config, tool_dict, geometry, conc_up=True
+    )
 
 
 def concave_down(
@@ -413,8 +507,11 @@ def concave_down(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
-    return check_concavity(grader, submission, config, tool_dict, conc_up=False)
+    return check_concavity(
+        grader, submission, config, tool_dict, geometry, conc_up=False
+    )
 
 
 # Function used for both upward and downward concavity
@@ -423,6 +520,7 @@ def check_concavity(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
     conc_up: bool,
 ) -> tuple[float, int, list[str]]:
     feedback = (
@@ -452,8 +550,8 @@ def check_concavity(
         if correct:
             tool_used = tool_dict[toolid]["name"]
             if tool_used == "line-segment":
-                tool_grader = LineSegment.LineSegments(
-                    grader, submission, config, toolid
+                tool_grader = geometry.tool_grader(
+                    LineSegment.LineSegments, grader, toolid
                 )
                 segments = tool_grader.get_segments_between_strict(xmin=x1, xmax=x2)
                 if len(segments) > 0:
@@ -464,8 +562,8 @@ def check_concavity(
                     correct = False
                     break
             else:
-                tool_grader = GradeableFunction.GradeableFunction(
-                    grader, submission, config, toolid
+                tool_grader = geometry.tool_grader(
+                    GradeableFunction.GradeableFunction, grader, toolid
                 )
                 if tool_used == "polyline":
                     in_range = tool_grader.does_exist_between(x1, x2)
@@ -518,6 +616,7 @@ def defined_in(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
     feedback = (
         grader["feedback"] or "Function is not defined over the expected range(s)."
@@ -547,13 +646,13 @@ def defined_in(
     for toolid in tools_to_check:
         tool_used = tool_dict[toolid]["name"]
         if tool_used == "polyline" and tool_dict[toolid]["closed"]:
-            tool_grader = Polygon.Polygons(grader, submission, config, toolid)
+            tool_grader = geometry.tool_grader(Polygon.Polygons, grader, toolid)
         elif tool_used in gf_tools:
-            tool_grader = GradeableFunction.GradeableFunction(
-                grader, submission, config, toolid
+            tool_grader = geometry.tool_grader(
+                GradeableFunction.GradeableFunction, grader, toolid
             )
         elif tool_used == "line-segment":
-            tool_grader = LineSegment.LineSegments(grader, submission, config, toolid)
+            tool_grader = geometry.tool_grader(LineSegment.LineSegments, grader, toolid)
         # add tool's range to all ranges
         if tool_grader:
             xrange += tool_grader.get_range_defined()
@@ -582,6 +681,7 @@ def undefined_in(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
     feedback = (
         grader["feedback"]
@@ -621,8 +721,9 @@ def greater_than(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
-    return check_ltgt(grader, submission, config, tool_dict, greater=True)
+    return check_ltgt(grader, submission, config, tool_dict, geometry, greater=True)
 
 
 def less_than(
@@ -630,8 +731,9 @@ def less_than(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
 ) -> tuple[float, int, list[str]]:
-    return check_ltgt(grader, submission, config, tool_dict, greater=False)
+    return check_ltgt(grader, submission, config, tool_dict, geometry, greater=False)
 
 
 # used for both less than and greater than y
@@ -640,6 +742,7 @@ def check_ltgt(
     submission: SketchSubmission,
     config: SketchConfig,
     tool_dict: dict[str, SketchTool],
+    geometry: SketchGeometry,
     greater: bool,
 ) -> tuple[float, int, list[str]]:
     g_l = "greater" if greater else "less"
@@ -655,7 +758,8 @@ def check_ltgt(
 
     if grader["xyflip"]:
         xrange = grader["yrange"]
-        submission, config = flip_grader_data(submission, config)
+        geometry = geometry.flipped()
+        submission = geometry.submission
     else:
         xrange = grader["xrange"]
 
@@ -670,7 +774,7 @@ def check_ltgt(
     debug_message = []
 
     y = grader["y"]
-    func = parse_function_string(grader["fun"]) if grader["fun"] is not None else None
+    func = parse_function(grader["fun"]) if grader["fun"] is not None else None
 
     tolerance = grader["tolerance"]
 
@@ -685,8 +789,8 @@ def check_ltgt(
         tool_used = tool_dict[toolid]["name"]
         tool_grader = None
         if tool_used == "point":
-            tool_grader = GradeableFunction.GradeableFunction(
-                grader, submission, config, toolid
+            tool_grader = geometry.tool_grader(
+                GradeableFunction.GradeableFunction, grader, toolid
             )
             if func is not None:
                 correct = (
@@ -705,18 +809,18 @@ def check_ltgt(
                 debug_message += tool_grader.debugger.get_message_as_list_and_clear()
         else:
             if tool_used == "line-segment":
-                tool_grader = LineSegment.LineSegments(
-                    grader, submission, config, toolid
+                tool_grader = geometry.tool_grader(
+                    LineSegment.LineSegments, grader, toolid
                 )
             elif tool_used == "horizontal-line":
-                tool_grader = Asymptote.HorizontalAsymptotes(
-                    grader, submission, config, toolid
+                tool_grader = geometry.tool_grader(
+                    Asymptote.HorizontalAsymptotes, grader, toolid
                 )
             elif tool_used == "polyline" and tool_dict[toolid]["closed"]:
-                tool_grader = Polygon.Polygons(grader, submission, config, toolid)
+                tool_grader = geometry.tool_grader(Polygon.Polygons, grader, toolid)
             else:
-                tool_grader = GradeableFunction.GradeableFunction(
-                    grader, submission, config, toolid
+                tool_grader = geometry.tool_grader(
+                    GradeableFunction.GradeableFunction, grader, toolid
                 )
 
             if func is not None:
@@ -2,7 +2,7 @@ import json
 import pathlib
 
 import pytest
-from pl_sketch_grading import grade_submission
+from pl_sketch_grading import get_submission_geometry, grade_submission
 from prairielearn import QuestionData
 from sketchresponse.types import SketchGrader, SketchTool
 
@@ -495,3 +495,29 @@ def test_greater_than(
     grader["tolerance"] = 15
     score, _, _ = grade_submission(grader, data, "test")
     assert score == correct
+
+
+def test_graders_share_submission_geometry() -> None:
+    graders = []
+    for grader_type, x, y in [
+        ("match", 0.25, 0),
+        ("match", 0.75, 0),
+        ("match", None, 3),
+        ("monot-increasing", None, None),
+        ("concave-up", None, None),
+    ]:
+        grader = default_grader.copy()
+        grader["type"] = grader_type
+        grader["toolid"] = [fd_tool]
+        grader["x"] = x
+        grader["y"] = y
+        grader["xrange"] = [1, 1.5]
+        grader["tolerance"] = 15
+        graders.append(grader)
+
+    geometry = get_submission_geometry(fd_data, "test")
+    shared = [grade_submission(grader, fd_data, "test", geometry) for grader in graders]
+
+    assert shared == [grade_submission(grader, fd_data, "test") for grader in graders]
+    # The three match graders reuse a single parsed drawing
+    assert len(geometry._tool_graders) == 3
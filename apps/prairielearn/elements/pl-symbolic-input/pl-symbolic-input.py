@@ -1,3 +1,5 @@
+import json
+import operator
 import random
 import re
 from enum import Enum
@@ -9,6 +11,7 @@ import lxml.html
 import prairielearn as pl
 import prairielearn.sympy_utils as psu
 import sympy
+from prairielearn.timeout_utils import get_process_timeout_pool
 
 
 class DisplayType(Enum):
@@ -38,6 +41,7 @@ BLANK_VALUE_DEFAULT = "0"
 PLACEHOLDER_DEFAULT = "symbolic expression"
 SHOW_SCORE_DEFAULT = True
 INITIAL_VALUE_DEFAULT = None
+ISOLATE_GRADING_DEFAULT = False
 SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-symbolic-input.mustache"
 # This timeout is chosen to allow multiple sympy-based elements to grade on one page,
 # while not exceeding the global timeout enforced for Python execution.
@@ -101,6 +105,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         "show-score",
         "suffix",
         "initial-value",
+        "isolate-grading",
     ]
     pl.check_attribs(element, required_attribs, optional_attribs)
     name = pl.get_string_attrib(element, "answers-name")
@@ -849,6 +854,9 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         )
     )
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
+    isolate_grading = pl.get_boolean_attrib(
+        element, "isolate-grading", ISOLATE_GRADING_DEFAULT
+    )
 
     # Get true answer (if it does not exist, create no grade - leave it
     # up to the question code)
@@ -919,7 +927,31 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         if isinstance(a_tru_sympy, sympy.Set) or isinstance(a_sub_sympy, sympy.Set):
             return a_tru_sympy == a_sub_sympy, None
 
-        return a_tru_sympy.equals(a_sub_sympy) is True, None
+        # `equals` can get stuck in SymPy internals that a signal can't interrupt,
+        # so if requested, run it in a helper process that is killed if it takes
+        # too long.
+        pool = get_process_timeout_pool() if isolate_grading else None
+        if pool is None:
+            return a_tru_sympy.equals(a_sub_sympy) is True, None
+
+        cache_key = (
+            "pl-symbolic-input",
+            json.dumps([a_tru, a_sub], sort_keys=True),
+            tuple(variables),
+            tuple(custom_functions),
+            allow_complex,
+            allow_sets,
+            allow_trig,
+            simplify_expression,
+            tuple(additional_simplifications),
+        )
+        equals = pool.run(
+            operator.methodcaller("equals", a_sub_sympy),
+            a_tru_sympy,
+            timeout=SYMPY_TIMEOUT,
+            cache_key=cache_key,
+        )
+        return equals is True, None
 
     try:
         pl.grade_answer_parameterized(
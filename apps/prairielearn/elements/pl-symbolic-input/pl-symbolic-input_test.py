@@ -6,6 +6,7 @@ from typing import Any
 import prairielearn.sympy_utils as psu
 import pytest
 import sympy
+from prairielearn.timeout_utils import ProcessTimeoutPool
 
 symbolic_input = importlib.import_module("pl-symbolic-input")
 
@@ -369,6 +370,48 @@ def test_interval_correct_answer_renders(
     assert "\\left[1, 2\\right] \\cup \\left[3, 4\\right]" in rendered
 
 
+@pytest.mark.parametrize(
+    ("a_sub", "expected_score"),
+    [("(x - 1)*(x + 1)", 1), ("(x - 1)*(x + 2)", 0)],
+)
+def test_grade_compares_in_process_pool(
+    monkeypatch: pytest.MonkeyPatch, a_sub: str, expected_score: float
+) -> None:
+    pool = ProcessTimeoutPool()
+    monkeypatch.setattr(symbolic_input, "get_process_timeout_pool", lambda: pool)
+    element_html = build_element_html(
+        'variables="x"', 'correct-answer="x^2 - 1"', 'isolate-grading="true"'
+    )
+
+    data = make_question_data(submitted_answers={"test": a_sub})
+    symbolic_input.prepare(element_html, data)
+    symbolic_input.parse(element_html, data)
+    symbolic_input.grade(element_html, data)
+    pool.close()
+
+    assert "test" not in data["format_errors"]
+    assert data["partial_scores"]["test"]["score"] == expected_score
+
+
+def test_grade_compares_in_process_only_when_isolated(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def get_process_timeout_pool() -> None:
+        raise AssertionError("grading should not use a helper process")
+
+    monkeypatch.setattr(
+        symbolic_input, "get_process_timeout_pool", get_process_timeout_pool
+    )
+    element_html = build_element_html('variables="x"', 'correct-answer="x^2 - 1"')
+
+    data = make_question_data(submitted_answers={"test": "(x - 1)*(x + 1)"})
+    symbolic_input.prepare(element_html, data)
+    symbolic_input.parse(element_html, data)
+    symbolic_input.grade(element_html, data)
+
+    assert data["partial_scores"]["test"]["score"] == 1
+
+
 def test_empty_set_submission_round_trips_when_set_notation_is_enabled() -> None:
     element_html = build_element_html(
         'allow-sets="true"',
@@ -0,0 +1,77 @@
+"""
+Measure the round trip of a 100k-row DataFrame through `to_json` and
+`from_json` with each `df_encoding_version`, including the `json.dumps` and
+`json.loads` that surround them when question data is passed between processes.
+Version 1 is left out, because it can't encode datetime columns.
+
+Run from `apps/prairielearn/python` with:
+
+    python benchmarks/dataframe_encoding_benchmark.py
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from prairielearn.conversion_utils import from_json, to_json
+
+ROWS = 100_000
+ITERATIONS = 5
+VERSIONS: tuple[Literal[2, 3], ...] = (2, 3)
+
+
+def make_frame() -> pd.DataFrame:
+    """Make a frame with the column types that questions commonly use."""
+    rng = np.random.default_rng(1)
+    values = rng.random(ROWS)
+    values[rng.random(ROWS) < 0.1] = np.nan
+    return pd.DataFrame({
+        "float": values,
+        "int": rng.integers(0, 1000, ROWS),
+        "bool": rng.random(ROWS) < 0.5,
+        "datetime": pd.date_range("2024-01-01", periods=ROWS, freq="min"),
+        "string": [f"item {i}" for i in range(ROWS)],
+    })
+
+
+def best_time(fn: Callable[[], Any]) -> tuple[float, Any]:
+    """Return the best time of `ITERATIONS` calls of `fn`, and its result."""
+    best = float("inf")
+    result = None
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    """Print the time and size of each round trip."""
+    df = make_frame()
+    print(f"{ROWS} rows, {len(df.columns)} columns, best of {ITERATIONS} runs")
+    print(f"{'version':>7} {'encode':>9} {'decode':>9} {'JSON':>9} {'equal':>6}")
+    for version in VERSIONS:
+        encode_time, encoded = best_time(
+            lambda version=version: json.dumps(to_json(df, df_encoding_version=version))
+        )
+        decode_time, decoded = best_time(
+            lambda encoded=encoded: from_json(json.loads(encoded))
+        )
+        # Older versions don't keep every dtype, so report whether the frame
+        # round-trips exactly rather than requiring it.
+        print(
+            f"{version:>7} {encode_time * 1000:>7.0f}ms {decode_time * 1000:>7.0f}ms "
+            f"{len(encoded) / 1e6:>7.1f}MB {df.equals(decoded)!s:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Measure the peak memory used by `pl-image-capture`'s `parse()` for large
+submitted images, like the 12 and 48 megapixel photos that phones take.
+
+Pillow can't decode HEIC, so PNG images stand in for photos that aren't JPEGs:
+like HEIC photos, they have to be decoded and converted to JPEG in `parse()`.
+
+Each image is parsed in its own process. The peak RSS of that process during
+`parse()` is reported relative to its RSS just before, which relies on Linux's
+`/proc/self/clear_refs` to reset the peak. Run this on a tree from before and
+after a change to `pl-image-capture` to compare them.
+
+Run from `apps/prairielearn/python` with:
+
+    python benchmarks/image_capture_benchmark.py
+"""
+
+import base64
+import importlib
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+ELEMENT_PATH = Path(__file__).parent.parent.parent / "elements" / "pl-image-capture"
+FILE_NAME = "work.jpeg"
+
+# Width and height of 12 and 48 megapixel photos with a 4:3 aspect ratio
+SIZES = [(4032, 3024), (8064, 6048)]
+FORMATS = ["JPEG", "PNG"]
+# The element's default, and a smaller limit that lets 4:3 JPEGs be decoded at
+# a reduced size
+MAX_DIMENSIONS = ["default", "1600"]
+
+
+def make_image(size: tuple[int, int], image_format: str) -> bytes:
+    """Make an image with some detail, so it doesn't compress to nearly nothing."""
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 32)
+    img = Image.merge(
+        "RGB", (gradient, noise, gradient.transpose(Image.Transpose.FLIP_TOP_BOTTOM))
+    )
+    buffer = BytesIO()
+    img.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def read_rss_mib(field: str) -> float:
+    """Return the `VmRSS` or `VmHWM` (peak RSS) of this process, in MiB."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(f"{field}:"):
+            return int(line.split()[1]) / 1024
+    raise ValueError(f"{field} not found")
+
+
+def reset_peak_rss() -> None:
+    """Reset the peak RSS of this process to its current RSS."""
+    Path("/proc/self/clear_refs").write_text("5")
+
+
+def run_parse(image_path: str, max_dimension: str) -> dict[str, Any]:
+    """Parse the image in `image_path`, and report the memory and time used."""
+    sys.path.insert(0, str(ELEMENT_PATH))
+    image_capture = importlib.import_module("pl-image-capture")
+
+    image_format = Image.open(image_path).format or ""
+    b64_payload = base64.b64encode(Path(image_path).read_bytes()).decode("utf-8")
+    data: dict[str, Any] = {
+        "submitted_answers": {
+            image_capture.get_answer_name(FILE_NAME): (
+                f"data:image/{image_format.lower()};base64,{b64_payload}"
+            )
+        },
+        "raw_submitted_answers": {},
+        "format_errors": {},
+    }
+    del b64_payload
+
+    attribs = "" if max_dimension == "default" else f' max-dimension="{max_dimension}"'
+    element_html = (
+        f'<pl-image-capture file-name="{FILE_NAME}"{attribs}></pl-image-capture>'
+    )
+
+    reset_peak_rss()
+    before = read_rss_mib("VmRSS")
+    start = time.perf_counter()
+    image_capture.parse(element_html, data)
+    elapsed = time.perf_counter() - start
+
+    (submitted_file,) = data["submitted_answers"]["_files"]
+    stored = Image.open(BytesIO(base64.b64decode(submitted_file["contents"])))
+    return {
+        "peak_rss": read_rss_mib("VmHWM") - before,
+        "elapsed": elapsed,
+        "stored": f"{stored.width}x{stored.height}",
+    }
+
+
+def main() -> None:
+    """Print the memory and time used by `parse()` for each image."""
+    print(
+        f"{'input':>10} {'size':>7} {'max-dimension':>13} {'peak RSS':>9} "
+        f"{'parse':>8} {'stored':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for image_format in FORMATS:
+            for size in SIZES:
+                image_path = Path(tmp_dir) / f"{size[0]}x{size[1]}.{image_format}"
+                image_path.write_bytes(make_image(size, image_format))
+                name = f"{size[0] * size[1] // 10**6}MP {image_format}"
+                for max_dimension in MAX_DIMENSIONS:
+                    result = json.loads(
+                        subprocess.run(
+                            [sys.executable, __file__, str(image_path), max_dimension],
+                            capture_output=True,
+                            check=True,
+                            text=True,
+                        ).stdout
+                    )
+                    print(
+                        f"{name:>10} {image_path.stat().st_size / 2**20:>5.1f}MB "
+                        f"{max_dimension:>13} {result['peak_rss']:>6.0f}MiB "
+                        f"{result['elapsed'] * 1000:>6.0f}ms {result['stored']:>10}"
+                    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(run_parse(sys.argv[1], sys.argv[2])))
+    else:
+        main()
@@ -0,0 +1,78 @@
+"""
+Measure the round trip of numpy arrays through `to_json` and `from_json` with
+each `np_encoding_version`, including the `json.dumps` and `json.loads` that
+surround them when question data is passed between processes.
+
+Run from `apps/prairielearn/python` with:
+
+    python benchmarks/ndarray_encoding_benchmark.py
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from prairielearn.conversion_utils import from_json, to_json
+
+ITERATIONS = 5
+VERSIONS: tuple[Literal[1, 2, 3], ...] = (1, 2, 3)
+
+
+def make_arrays() -> dict[str, np.ndarray[Any, Any]]:
+    """Make 1000x1000 arrays of the dtypes that the binary encoding supports."""
+    rng = np.random.default_rng(1)
+    shape = (1000, 1000)
+    return {
+        "float64": rng.random(shape),
+        "complex128": rng.random(shape) + 1j * rng.random(shape),
+        "int64": rng.integers(-(10**9), 10**9, shape),
+        "bool": rng.random(shape) < 0.5,
+    }
+
+
+def best_time(fn: Callable[[], Any]) -> tuple[float, Any]:
+    """Return the best time of `ITERATIONS` calls of `fn`, and its result."""
+    best = float("inf")
+    result = None
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    """Print the time, size and throughput of each round trip."""
+    print(f"best of {ITERATIONS} runs")
+    print(
+        f"{'dtype':>10} {'version':>7} {'encode':>9} {'decode':>9} "
+        f"{'JSON':>9} {'round trip':>11}"
+    )
+    for name, array in make_arrays().items():
+        for version in VERSIONS:
+            encode_time, encoded = best_time(
+                lambda array=array, version=version: json.dumps(
+                    to_json(array, np_encoding_version=version)
+                )
+            )
+            decode_time, decoded = best_time(
+                lambda encoded=encoded: from_json(json.loads(encoded))
+            )
+            assert np.array_equal(decoded, array)
+            throughput = array.nbytes / 1e6 / (encode_time + decode_time)
+            print(
+                f"{name:>10} {version:>7} {encode_time * 1000:>7.0f}ms "
+                f"{decode_time * 1000:>7.0f}ms {len(encoded) / 1e6:>7.1f}MB "
+                f"{throughput:>7.0f}MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
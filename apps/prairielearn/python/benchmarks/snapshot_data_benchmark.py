@@ -0,0 +1,121 @@
+"""
+Measure `question_phases.process` for a question with 50 elements and a
+multi-MB `params`, in each phase in which `data` is checked after every element.
+
+`process` snapshots the props of `data` that the elements may not edit in the
+phase, and compares them with `data` after every element. Run this on a tree
+from before and after a change to `snapshot_data` or `check_data` to compare
+them.
+
+Run from `apps/prairielearn/python` with:
+
+    python benchmarks/snapshot_data_benchmark.py
+"""
+
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from prairielearn.internal import question_phases
+from prairielearn.internal.check_data import Phase
+from prairielearn.internal.question_phases import RenderContext
+
+ELEMENTS = 50
+ITERATIONS = 10
+PHASES: tuple[Phase, ...] = ("prepare", "parse", "grade", "test")
+
+
+def make_context() -> RenderContext:
+    """Make a question with `ELEMENTS` integer inputs."""
+    html = "\n".join(
+        f'<pl-integer-input answers-name="x{i}" correct-answer="{i}"></pl-integer-input>'
+        for i in range(ELEMENTS)
+    )
+    return {
+        "html": html,
+        "elements": {
+            "pl-integer-input": {
+                "name": "pl-integer-input",
+                "controller": "pl-integer-input.py",
+                "type": "core",
+            }
+        },
+        "element_extensions": {},
+        "course_path": "/course",
+    }
+
+
+def make_params(rows: int) -> dict[str, Any]:
+    """Make `params` with a table of `rows` records, like a converted DataFrame."""
+    return {
+        "table": [
+            {"id": i, "name": f"row{i}", "x": i * 0.5, "y": i * 0.25, "z": [i, i + 1]}
+            for i in range(rows)
+        ]
+    }
+
+
+def make_data(phase: Phase, params: dict[str, Any]) -> dict[str, Any]:
+    """Make the `data` that `process` receives in `phase`."""
+    data: dict[str, Any] = {
+        "params": params,
+        "correct_answers": {},
+        "variant_seed": 1,
+        "options": {},
+        "preferences": {},
+    }
+    if phase == "prepare":
+        data["answers_names"] = {}
+        return data
+
+    data["correct_answers"] = {f"x{i}": i for i in range(ELEMENTS)}
+    data["raw_submitted_answers"] = {f"x{i}": str(i) for i in range(ELEMENTS)}
+    data["format_errors"] = {}
+    data["feedback"] = {}
+    data["gradable"] = True
+    if phase in ("parse", "grade"):
+        data["submitted_answers"] = dict(data["raw_submitted_answers"])
+    if phase in ("grade", "test"):
+        data["partial_scores"] = {}
+        data["score"] = 0
+    if phase == "test":
+        data["test_type"] = "correct"
+    return data
+
+
+def time_process(phase: Phase, params: dict[str, Any], context: RenderContext) -> float:
+    """Return the median time taken by `process` in `phase`, in seconds."""
+    times = []
+    for _ in range(ITERATIONS):
+        # Elements may modify `params` in some phases, so each run gets a copy.
+        data = make_data(phase, copy.deepcopy(params))
+        start = time.perf_counter()
+        question_phases.process(phase, data, context)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    """Print the time taken by `process` for each phase and size of `params`."""
+    cwd = os.getcwd()
+    context = make_context()
+    print(f"{ELEMENTS} elements, median of {ITERATIONS} runs")
+    print(f"{'params':>8} {'phase':>8} {'process':>10}")
+    for rows in (20_000, 80_000):
+        params = make_params(rows)
+        size = len(json.dumps(params)) / 1e6
+        for phase in PHASES:
+            elapsed = time_process(phase, params, context)
+            os.chdir(cwd)
+            print(f"{size:>6.1f}MB {phase:>8} {elapsed * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
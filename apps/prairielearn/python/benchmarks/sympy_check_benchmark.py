@@ -0,0 +1,112 @@
+"""
+Measure `sympy_check` on large expressions, including deeply nested ones and
+ones in which SymPy shares subexpressions between nodes.
+
+SymPy caches the result of assumption queries on each node, so this measures
+both checking a freshly built expression after clearing SymPy's cache, like
+checking a newly parsed submission, and checking the same expression again.
+Run this on a tree from before and after a change to `sympy_check` to compare
+them.
+
+Run from `apps/prairielearn/python` with:
+
+    python benchmarks/sympy_check_benchmark.py
+"""
+
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import sympy
+from sympy.core.cache import clear_cache
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from prairielearn import sympy_utils as psu
+
+ITERATIONS = 5
+
+X, Y = sympy.symbols("x y")
+
+
+def long_polynomial() -> sympy.Expr:
+    """A sum of 299 terms like `i * x**i * y**(i % 5)`."""
+    return sympy.Add(
+        *(sympy.Mul(i, X**i, Y ** (i % 5), evaluate=False) for i in range(1, 300)),
+        evaluate=False,
+    )
+
+
+def expanded_binomial() -> sympy.Expr:
+    """The 41 terms of `(x + y)**40`, expanded by SymPy."""
+    return sympy.expand((X + Y) ** 40)
+
+
+def nested_trig() -> sympy.Expr:
+    """`sin` and `cos` nested 60 deep."""
+    expr = X
+    for i in range(60):
+        expr = sympy.sin(expr + sympy.cos(X * i))
+    return expr
+
+
+def shared_subtrees() -> sympy.Expr:
+    """A sum of 199 powers of the same `sin(cos(x) + tan(y))` node."""
+    shared = sympy.sin(sympy.cos(X) + sympy.tan(Y))
+    return sympy.Add(
+        *(sympy.Pow(shared, i, evaluate=False) for i in range(1, 200)),
+        evaluate=False,
+    )
+
+
+EXPRESSIONS: dict[str, Callable[[], sympy.Expr]] = {
+    "300-term polynomial": long_polynomial,
+    "expand((x + y)**40)": expanded_binomial,
+    "60-deep sin/cos": nested_trig,
+    "shared trig subtree": shared_subtrees,
+}
+
+
+def time_check(expr: sympy.Expr) -> float:
+    """Return the time taken by `sympy_check` for `expr`, in seconds."""
+    locals_for_eval: psu.LocalsForEval = {
+        "functions": {},
+        "variables": {"x": X, "y": Y},
+        "helpers": {},
+    }
+    start = time.perf_counter()
+    psu.sympy_check(expr, locals_for_eval, allow_complex=False, allow_sets=False)
+    return time.perf_counter() - start
+
+
+def time_fresh(make_expr: Callable[[], sympy.Expr]) -> float:
+    """Return the median time taken to check a freshly built expression."""
+    times = []
+    for _ in range(ITERATIONS):
+        clear_cache()
+        times.append(time_check(make_expr()))
+    return statistics.median(times)
+
+
+def time_repeated(make_expr: Callable[[], sympy.Expr]) -> float:
+    """Return the median time taken to check an expression that was checked before."""
+    expr = make_expr()
+    time_check(expr)
+    return statistics.median(time_check(expr) for _ in range(ITERATIONS))
+
+
+def main() -> None:
+    """Print the time taken by `sympy_check` for each expression."""
+    print(f"median of {ITERATIONS} runs")
+    print(f"{'expression':>20} {'nodes':>6} {'fresh':>9} {'repeated':>9}")
+    for name, make_expr in EXPRESSIONS.items():
+        nodes = sum(1 for _ in sympy.preorder_traversal(make_expr()))
+        fresh = time_fresh(make_expr)
+        repeated = time_repeated(make_expr)
+        print(f"{name:>20} {nodes:>6} {fresh * 1000:>7.1f}ms {repeated * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
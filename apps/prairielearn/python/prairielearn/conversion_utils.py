@@ -5,6 +5,7 @@ from prairielearn import ...
 ```
 """
 
+import base64
 import json
 import numbers
 import re
@@ -37,11 +38,13 @@ class _JSONSerializedGeneric(TypedDict):
         "sympy_matrix",
         "dataframe",
         "dataframe_v2",
+        "dataframe_v3",
         "networkx_graph",
         "complex",
         "ndarray",
         "np_scalar",
         "complex_ndarray",
+        "binary_ndarray",
     ]
     _value: Any
 
@@ -58,6 +61,11 @@ class _JSONSerializedComplexNdarray(_JSONSerializedGeneric, total=False):
     _dtype: str
 
 
+class _JSONSerializedBinaryNdarray(_JSONSerializedGeneric):
+    _dtype: str
+    _shape: list[int]
+
+
 class _JSONSerializedSympyMatrix(_JSONSerializedGeneric):
     _variables: list[str]
     _shape: tuple[int, int]
@@ -69,6 +77,7 @@ _JSONSerializedType = (
     | _JSONSerializedNumpyScalar
     | _JSONSerializedNdarray
     | _JSONSerializedComplexNdarray
+    | _JSONSerializedBinaryNdarray
     | _JSONSerializedSympyMatrix
 )
 
@@ -107,8 +116,8 @@ def is_int_json_serializable(n: int) -> bool:
 def to_json(
     v: _JSONPythonType,
     *,
-    df_encoding_version: Literal[1, 2] = 1,
-    np_encoding_version: Literal[1, 2] = 1,
+    df_encoding_version: Literal[1, 2, 3] = 1,
+    np_encoding_version: Literal[1, 2, 3] = 1,
 ) -> _JSONSerializedType: ...
 
 
@@ -116,16 +125,16 @@ def to_json(
 def to_json(
     v: Any,
     *,
-    df_encoding_version: Literal[1, 2] = 1,
-    np_encoding_version: Literal[1, 2] = 1,
+    df_encoding_version: Literal[1, 2, 3] = 1,
+    np_encoding_version: Literal[1, 2, 3] = 1,
 ) -> Any: ...
 
 
 def to_json(
     v: Any | _JSONPythonType,
     *,
-    df_encoding_version: Literal[1, 2] = 1,
-    np_encoding_version: Literal[1, 2] = 1,
+    df_encoding_version: Literal[1, 2, 3] = 1,
+    np_encoding_version: Literal[1, 2, 3] = 1,
 ) -> Any | _JSONSerializedType:
     """
     Convert a value to a JSON serializable format.
@@ -145,8 +154,10 @@ def to_json(
     | `sympy.Matrix` | `sympy_matrix` | |
     | `pandas.DataFrame` | `dataframe` | `df_encoding_version=1` |
     | `pandas.DataFrame` | `dataframe_v2` | `df_encoding_version=2` |
+    | `pandas.DataFrame` | `dataframe_v3` | `df_encoding_version=3` |
     | networkx graph type | `networkx_graph` |
-    | numpy scalar | `np_scalar` | `np_encoding_version=2` |
+    | numpy scalar | `np_scalar` | `np_encoding_version=2` or `3` |
+    | numeric ndarray | `binary_ndarray` | `np_encoding_version=3`, including complex |
     | any | `v` | if v can be json serialized |
 
     !!! note
@@ -156,8 +167,23 @@ def to_json(
 
     If `np_encoding_version` is set to 2, then numpy scalars serialize using `'_type': 'np_scalar'`.
 
+    If `np_encoding_version` is set to 3, numpy scalars serialize as for version 2, and
+    ndarrays with a boolean, integer, floating point, or complex dtype serialize using
+    `'_type': 'binary_ndarray'`. This stores the raw little-endian bytes of the array as
+    base64 along with its dtype and shape, which is much faster and more compact than
+    nested lists for large arrays. Other ndarrays use the `ndarray` encoding.
+
     If `df_encoding_version` is set to 2, then pandas DataFrames serialize using `'_type': 'dataframe_v2'`.
 
+    If `df_encoding_version` is set to 3, then pandas DataFrames serialize using `'_type': 'dataframe_v3'`.
+    This stores the index, the column labels, and each column separately along with
+    their dtypes. Columns with a boolean, numeric, complex, or date time dtype are stored
+    as base64-encoded binary data (as in the `binary_ndarray` encoding), with a separate
+    mask of missing values for nullable dtypes. Other columns are stored as lists, so
+    their values must be JSON serializable. This preserves missing values, date times
+    (including time zones) and complex numbers, and is much faster than `'dataframe_v2'`
+    for large frames. `MultiIndex` rows or columns are not supported.
+
     See [from_json][prairielearn.conversion_utils.from_json] for details about the differences between encodings.
 
     If v is an ndarray, this function preserves its dtype (by adding `'_dtype'` as
@@ -171,11 +197,14 @@ def to_json(
 
     Raises:
         ValueError: If `np_encoding_version` or `df_encoding_version` is invalid.
+        TypeError: If `df_encoding_version=3` is used for a DataFrame with a `MultiIndex`.
     """
-    if np_encoding_version not in {1, 2}:
-        raise ValueError(f"Invalid np_encoding {np_encoding_version}, must be 1 or 2.")
+    if np_encoding_version not in {1, 2, 3}:
+        raise ValueError(
+            f"Invalid np_encoding {np_encoding_version}, must be 1, 2, or 3."
+        )
 
-    if np_encoding_version == 2 and isinstance(v, np.number):
+    if np_encoding_version >= 2 and isinstance(v, np.number):
         return {
             "_type": "np_scalar",
             "_concrete_type": type(v).__name__,
@@ -185,7 +214,9 @@ def to_json(
     if np.isscalar(v) and np.iscomplexobj(v):
         return {"_type": "complex", "_value": {"real": v.real, "imag": v.imag}}  # pyright:ignore[reportAttributeAccessIssue]
     elif isinstance(v, np.ndarray):
-        if np.isrealobj(v):
+        if np_encoding_version == 3 and v.dtype.kind in _BINARY_NDARRAY_KINDS:
+            return _ndarray_to_binary_json(v)
+        elif np.isrealobj(v):
             return {"_type": "ndarray", "_value": v.tolist(), "_dtype": str(v.dtype)}
         elif np.iscomplexobj(v):
             return {
@@ -242,9 +273,18 @@ def to_json(
 
             return {"_type": "dataframe_v2", "_value": pure_json_df}
 
+        elif df_encoding_version == 3:
+            if isinstance(v.index, pd.MultiIndex) or isinstance(
+                v.columns, pd.MultiIndex
+            ):
+                raise TypeError(
+                    "df_encoding_version=3 does not support MultiIndex, use df_encoding_version=2"
+                )
+            return {"_type": "dataframe_v3", "_value": _dataframe_to_columnar_json(v)}
+
         else:
             raise ValueError(
-                f"Invalid df_encoding_version: {df_encoding_version}. Must be 1 or 2"
+                f"Invalid df_encoding_version: {df_encoding_version}. Must be 1, 2, or 3"
             )
     elif isinstance(v, (nx.Graph, nx.DiGraph, nx.MultiGraph, nx.MultiDiGraph)):
         return {"_type": "networkx_graph", "_value": nx.adjacency_data(v)}
@@ -252,6 +292,145 @@ def to_json(
         return v
 
 
+_BINARY_NDARRAY_KINDS = frozenset("biufc")
+"""Dtype kinds (bool, signed/unsigned int, float, complex) that use the `binary_ndarray` encoding."""
+
+_MASKED_DTYPES = (
+    pd.BooleanDtype,
+    pd.Int8Dtype,
+    pd.Int16Dtype,
+    pd.Int32Dtype,
+    pd.Int64Dtype,
+    pd.UInt8Dtype,
+    pd.UInt16Dtype,
+    pd.UInt32Dtype,
+    pd.UInt64Dtype,
+    pd.Float32Dtype,
+    pd.Float64Dtype,
+)
+"""Nullable extension dtypes that are stored as a `binary_ndarray` of values and a mask."""
+
+
+def _ndarray_to_binary_json(v: npt.NDArray[Any]) -> _JSONSerializedBinaryNdarray:
+    """Serialize an ndarray as the base64 encoding of its little-endian bytes."""
+    little_endian = np.ascontiguousarray(v, dtype=v.dtype.newbyteorder("<"))
+    return {
+        "_type": "binary_ndarray",
+        "_value": base64.b64encode(little_endian.data).decode("ascii"),
+        "_dtype": little_endian.dtype.str,
+        "_shape": list(v.shape),
+    }
+
+
+def _binary_json_to_ndarray(v: _JSONSerializedBinaryNdarray) -> npt.NDArray[Any]:
+    """Deserialize an ndarray from the `binary_ndarray` encoding."""
+    dtype = np.dtype(v["_dtype"])
+    # Decode into a bytearray so that the resulting array is writable
+    buffer = bytearray(base64.b64decode(v["_value"], validate=True))
+    array = np.frombuffer(buffer, dtype=dtype).reshape(v["_shape"])
+    return array.astype(dtype.newbyteorder("="), copy=False)
+
+
+def _column_to_columnar_json(column: pd.Series | pd.Index) -> dict[str, Any]:
+    """Serialize a DataFrame column or index as its dtype and values."""
+    dtype = column.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        # Stored as UTC, and converted back to the time zone in the dtype on decode
+        values = column.to_numpy(dtype=f"datetime64[{dtype.unit}]").view(np.int64)
+        return {"dtype": str(dtype), "values": _ndarray_to_binary_json(values)}
+    elif isinstance(dtype, np.dtype) and dtype.kind in "mM":
+        values = column.to_numpy().view(np.int64)
+        return {"dtype": str(dtype), "values": _ndarray_to_binary_json(values)}
+    elif isinstance(dtype, np.dtype) and dtype.kind in _BINARY_NDARRAY_KINDS:
+        return {
+            "dtype": str(dtype),
+            "values": _ndarray_to_binary_json(column.to_numpy()),
+        }
+    elif isinstance(dtype, _MASKED_DTYPES):
+        # Nullable extension dtypes such as "Int64" or "boolean"
+        mask = np.asarray(column.isna())
+        values = column.to_numpy(dtype=np.dtype(dtype.type), na_value=0)
+        return {
+            "dtype": str(dtype),
+            "values": _ndarray_to_binary_json(values),
+            "mask": _ndarray_to_binary_json(mask),
+        }
+    else:
+        values = column.astype(object).tolist()
+        for i in np.flatnonzero(np.asarray(column.isna())):
+            values[i] = None
+        return {"dtype": str(dtype), "values": values}
+
+
+def _columnar_json_to_column(
+    v: dict[str, Any],
+) -> npt.NDArray[Any] | pd.api.extensions.ExtensionArray:
+    """Deserialize a DataFrame column or index serialized by `_column_to_columnar_json`."""
+    dtype = pd.api.types.pandas_dtype(v["dtype"])
+    if isinstance(v["values"], list):
+        return pd.array(v["values"], dtype=dtype)
+
+    values = _binary_json_to_ndarray(v["values"])
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        utc = pd.DatetimeIndex(values.view(f"datetime64[{dtype.unit}]"), tz="UTC")
+        return utc.tz_convert(dtype.tz).array
+    elif isinstance(dtype, np.dtype) and dtype.kind in "mM":
+        return values.view(dtype)
+    elif "mask" in v:
+        array = pd.array(values, dtype=dtype)
+        array[_binary_json_to_ndarray(v["mask"])] = pd.NA
+        return array
+    else:
+        return values
+
+
+def _index_to_columnar_json(index: pd.Index) -> dict[str, Any]:
+    """Serialize a DataFrame index or its column labels."""
+    if isinstance(index, pd.RangeIndex):
+        return {
+            "name": index.name,
+            "range": [index.start, index.stop, index.step],
+        }
+    encoded = {"name": index.name, **_column_to_columnar_json(index)}
+    if isinstance(index, pd.DatetimeIndex | pd.TimedeltaIndex) and index.freq:
+        encoded["freq"] = index.freqstr
+    return encoded
+
+
+def _columnar_json_to_index(v: dict[str, Any]) -> pd.Index:
+    """Deserialize a DataFrame index or its column labels."""
+    if "range" in v:
+        return pd.RangeIndex(*v["range"], name=v["name"])
+    index = pd.Index(_columnar_json_to_column(v), name=v["name"])
+    if "freq" in v:
+        if isinstance(index, pd.DatetimeIndex):
+            return pd.DatetimeIndex(index, freq=v["freq"])
+        if isinstance(index, pd.TimedeltaIndex):
+            return pd.TimedeltaIndex(index, freq=v["freq"])
+    return index
+
+
+def _dataframe_to_columnar_json(df: pd.DataFrame) -> dict[str, Any]:
+    """Serialize a DataFrame column by column, for the `dataframe_v3` encoding."""
+    return {
+        "index": _index_to_columnar_json(df.index),
+        "columns": _index_to_columnar_json(df.columns),
+        # Columns are read by position since labels need not be unique
+        "data": [_column_to_columnar_json(df.iloc[:, i]) for i in range(df.shape[1])],
+    }
+
+
+def _columnar_json_to_dataframe(v: dict[str, Any]) -> pd.DataFrame:
+    """Deserialize a DataFrame from the `dataframe_v3` encoding."""
+    columns = _columnar_json_to_index(v["columns"])
+    df = pd.DataFrame(
+        dict(enumerate(_columnar_json_to_column(column) for column in v["data"])),
+        index=_columnar_json_to_index(v["index"]),
+    )
+    df.columns = columns
+    return df
+
+
 def _has_value_fields(v: _JSONSerializedType, fields: list[str]) -> bool:
     """Return True if all fields in the '_value' dictionary are present."""
     return (
@@ -274,10 +453,12 @@ def from_json(v: _JSONSerializedType | Any) -> Any:
     | `np_scalar` | numpy scalar defined by `_concrete_type` |
     | `ndarray` | non-complex `ndarray` |
     | `complex_ndarray` | complex `ndarray` |
+    | `binary_ndarray` | `ndarray` with the encoded dtype and shape |
     | `sympy` | `sympy.Expr` |
     | `sympy_matrix` | `sympy.Matrix` |
     | `dataframe` | `pandas.DataFrame` |
     | `dataframe_v2` | `pandas.DataFrame` |
+    | `dataframe_v3` | `pandas.DataFrame` |
     | `networkx_graph` | corresponding networkx graph |
     | missing | input value v returned |
 
@@ -333,6 +514,13 @@ def from_json(v: _JSONSerializedType | Any) -> Any:
                 raise ValueError(
                     "variable of type complex_ndarray should have value with real and imaginary pair"
                 )
+        elif v_json["_type"] == "binary_ndarray":
+            if "_value" in v_json and "_dtype" in v_json and "_shape" in v_json:
+                return _binary_json_to_ndarray(v_json)
+            else:
+                raise ValueError(
+                    "variable of type binary_ndarray should have value, dtype, and shape"
+                )
         elif v_json["_type"] == "sympy":
             if not is_sympy_json(v_json):
                 raise ValueError(
@@ -372,6 +560,13 @@ def from_json(v: _JSONSerializedType | Any) -> Any:
             # pandas read_json() can process it.
             value_str = StringIO(json.dumps(v_json["_value"]))
             return pd.read_json(value_str, orient="table")
+        elif v_json["_type"] == "dataframe_v3":
+            if _has_value_fields(v_json, ["index", "columns", "data"]):
+                return _columnar_json_to_dataframe(v_json["_value"])
+            else:
+                raise ValueError(
+                    "variable of type dataframe_v3 should have value with index, columns, and data"
+                )
         elif v_json["_type"] == "networkx_graph":
             return nx.adjacency_graph(v_json["_value"])
         else:
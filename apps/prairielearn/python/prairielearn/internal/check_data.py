@@ -1,3 +1,4 @@
+import copy
 from typing import Any, Literal, TypedDict
 
 Phase = Literal["generate", "prepare", "render", "parse", "grade", "test", "file"]
@@ -192,3 +193,29 @@ def check_data(
             prop_info["edit_phases"],
             phase,
         )
+
+
+def snapshot_data(data: dict[Any, Any], phase: Phase) -> dict[Any, Any]:
+    """
+    Make a copy of `data` suitable for use as `old_data` in `check_data`.
+
+    Only the props whose values `check_data` will compare in the given phase
+    are deep-copied. Props that may be edited in this phase (or that aren't
+    checked at all) are never compared against their old values, so the
+    snapshot can share them with `data` instead of copying them.
+    """
+    snapshot: dict[Any, Any] = {}
+    # A single memo keeps objects that are shared between props (for example,
+    # the same list in `params` and `correct_answers`) from being copied twice.
+    memo: dict[int, Any] = {}
+    for key, value in data.items():
+        prop_info = PROPS.get(key)
+        if (
+            prop_info is None
+            or phase not in prop_info["present_phases"]
+            or phase in prop_info["edit_phases"]
+        ):
+            snapshot[key] = value
+        else:
+            snapshot[key] = copy.deepcopy(value, memo)
+    return snapshot
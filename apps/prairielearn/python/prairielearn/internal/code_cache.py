@@ -0,0 +1,80 @@
+import json
+import os
+import pathlib
+import time
+from dataclasses import dataclass
+from types import CodeType
+
+
+@dataclass
+class CodeCacheStats:
+    hits: int = 0
+    misses: int = 0
+    compile_seconds: float = 0.0
+
+
+# Compiled code objects keyed by file path, along with the modification time
+# and size of the file when it was compiled. This lives for the lifetime of the
+# process; entries created in the zygote parent are inherited by every forked
+# worker.
+_code_cache: dict[str, tuple[int, int, CodeType]] = {}
+
+# Totals for this process, including the controllers compiled by the zygote
+# parent. The zygote reports how much they changed during each `question.html`
+# call, like it does for the render cache.
+stats = CodeCacheStats()
+
+
+def get_code(path: str | os.PathLike[str]) -> CodeType:
+    """
+    Return the compiled code object for a Python file, compiling it only if
+    it has not been compiled before or has changed since it was compiled.
+    """
+    key = os.fspath(path)
+    stat = os.stat(key)
+
+    cached = _code_cache.get(key)
+    if (
+        cached is not None
+        and cached[0] == stat.st_mtime_ns
+        and cached[1] == stat.st_size
+    ):
+        stats.hits += 1
+        return cached[2]
+
+    stats.misses += 1
+    start = time.perf_counter()
+    with open(key, encoding="utf-8") as inf:
+        # Use `compile` to associate filename with code object, so the
+        # filename appears in the traceback if there is an error:
+        # https://stackoverflow.com/a/437857
+        code = compile(inf.read(), key, "exec")
+    stats.compile_seconds += time.perf_counter() - start
+
+    _code_cache[key] = (stat.st_mtime_ns, stat.st_size, code)
+    return code
+
+
+def stats_since(start: CodeCacheStats) -> CodeCacheStats:
+    """Return the stats accumulated since `start`, an earlier copy of `stats`."""
+    return CodeCacheStats(
+        hits=stats.hits - start.hits,
+        misses=stats.misses - start.misses,
+        compile_seconds=stats.compile_seconds - start.compile_seconds,
+    )
+
+
+def prewarm_elements(elements_path: pathlib.Path) -> None:
+    """Compile the controller of every element in the given directory."""
+    for info_path in sorted(elements_path.glob("*/info.json")):
+        with open(info_path, encoding="utf-8") as f:
+            controller = json.load(f).get("controller")
+        if controller is not None:
+            get_code(info_path.parent / controller)
+
+
+def clear() -> None:
+    _code_cache.clear()
+    stats.hits = 0
+    stats.misses = 0
+    stats.compile_seconds = 0.0
@@ -1,21 +1,30 @@
 import base64
 import copy
 import io
+import json
 import os
 import pathlib
+import re
 import sys
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
 from inspect import signature
-from typing import Any, Literal, TypedDict, assert_never
+from typing import Any, Literal, NoReturn, TypedDict, assert_never
 
 import lxml.html
 
-from prairielearn.internal.check_data import Phase, check_data
+from prairielearn.internal import code_cache
+from prairielearn.internal.check_data import Phase, check_data, snapshot_data
 from prairielearn.internal.traverse import (
     get_source_definition,
     traverse_and_execute,
     traverse_and_replace,
 )
 from prairielearn.internal.zygote_utils import get_module_function
+from prairielearn.question_utils import (
+    RENDER_DEPENDENCIES_ATTRIBUTE,
+    RenderDependency,
+)
 
 PYTHON_PATH = pathlib.Path(__file__).parent.parent.parent.resolve()
 CORE_ELEMENTS_PATH = (PYTHON_PATH.parent / "elements").resolve()
@@ -28,6 +37,51 @@ class ElementInfo(TypedDict):
     type: Literal["core", "course"]
 
 
+class RenderCacheStats(TypedDict):
+    hits: int
+    misses: int
+
+
+# The maximum number of rendered elements to keep in `render_cache`.
+RENDER_CACHE_SIZE = 512
+
+# Rendered HTML of elements whose `render()` function declares its data
+# dependencies with `@render_depends_on(...)`. This is kept for the lifetime of
+# the worker, with the least recently used entries evicted first. A worker is
+# normally replaced after each request, so entries are only reused by later
+# calls of the same request, like the submission panels of one page, which
+# are each rendered in their own call. Only a warm worker (see `WARM_WORKER`
+# in `zygote.py`) keeps them across requests, as long as the requests only run
+# core element code.
+render_cache: OrderedDict[tuple[str, bytes, str], str] = OrderedDict()
+
+
+def get_render_cache_key(
+    controller_path: pathlib.Path,
+    element: lxml.html.HtmlElement,
+    element_html: bytes,
+    data: dict[str, Any],
+    dependencies: Sequence[RenderDependency],
+) -> tuple[str, bytes, str] | None:
+    data_slice: list[Any] = [data["panel"]]
+    for dependency in dependencies:
+        if isinstance(dependency, str):
+            data_slice.append(data.get(dependency))
+        else:
+            key, attribute = dependency
+            values = data.get(key)
+            name = element.get(attribute)
+            data_slice.append(
+                values.get(name) if isinstance(values, dict) and name else None
+            )
+    try:
+        serialized_slice = json.dumps(data_slice, sort_keys=True)
+    except (TypeError, ValueError):
+        # Data that can't be serialized can't be used as part of a cache key.
+        return None
+    return (str(controller_path), element_html, serialized_slice)
+
+
 class RenderContext(TypedDict):
     html: str
     """A string consisting of `question.html` with Mustache templating applied."""
@@ -61,27 +115,122 @@ def filelike_to_string(filelike: Any) -> str:
     return base64.b64encode(filelike).decode()
 
 
+def _read_only(self: object, *_args: Any, **_kwargs: Any) -> NoReturn:
+    raise TypeError(f"'{type(self).__name__}' object is read-only")
+
+
+# These subclass the builtin containers (rather than `UserDict`/`UserList`) so
+# that they are still accepted wherever a dict or list is expected, including
+# by `check_data` and `json.dumps`.
+class ReadOnlyDict(dict[Any, Any]):  # noqa: FURB189
+    """
+    A `dict` that can't be modified in place.
+
+    Copies of it (including deep copies and unpickled values) are plain,
+    mutable dicts, so element code can still copy `data` and modify the copy.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self) -> dict[Any, Any]:
+        return dict(self)
+
+    def __copy__(self) -> dict[Any, Any]:  # noqa: D105
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[Any, Any]:  # noqa: D105
+        result: dict[Any, Any] = {}
+        memo[id(self)] = result
+        for key, value in self.items():
+            result[copy.deepcopy(key, memo)] = copy.deepcopy(value, memo)
+        return result
+
+    def __reduce__(self) -> tuple[type[dict[Any, Any]], tuple[dict[Any, Any]]]:  # noqa: D105
+        return (dict, (dict(self),))
+
+
+class ReadOnlyList(list[Any]):  # noqa: FURB189
+    """
+    A `list` that can't be modified in place.
+
+    Copies of it (including deep copies and unpickled values) are plain,
+    mutable lists.
+    """
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def copy(self) -> list[Any]:
+        return list(self)
+
+    def __copy__(self) -> list[Any]:  # noqa: D105
+        return list(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> list[Any]:  # noqa: D105
+        result: list[Any] = []
+        memo[id(self)] = result
+        result.extend(copy.deepcopy(value, memo) for value in self)
+        return result
+
+    def __reduce__(self) -> tuple[type[list[Any]], tuple[list[Any]]]:  # noqa: D105
+        return (list, (list(self),))
+
+
+EMPTY_EXTENSIONS: Mapping[str, Any] = ReadOnlyDict()
+
+
+def freeze(value: Any) -> Any:
+    """
+    Return a deeply read-only copy of a JSON-like value, in which dicts and
+    lists are replaced by `ReadOnlyDict` and `ReadOnlyList`.
+    """
+    if isinstance(value, dict):
+        return ReadOnlyDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(v) for v in value)
+    return value
+
+
 def process(
     phase: Phase, data: dict[str, Any], context: RenderContext
-) -> tuple[str | None, set[str]]:
+) -> tuple[str | None, set[str], RenderCacheStats]:
     html = context["html"]
     elements = context["elements"]
     course_path = context["course_path"]
 
+    # Extensions are exposed to elements as read-only copies that are built
+    # once and shared by every element, rather than copied for each one.
+    # Attempting to modify them in place raises a `TypeError`.
+    element_extensions: Mapping[str, Mapping[str, Any]] = freeze(
+        context["element_extensions"]
+    )
+
     # This will track which elements have been processed.
     processed_elements: set[str] = set()
 
+    # This will track how many elements were rendered from `render_cache`.
+    render_cache_stats: RenderCacheStats = {"hits": 0, "misses": 0}
+
     # If we're in the `render` phase, we'll eventually capture the HTML here.
     # If we're in the `file` phase, we'll capture file data here.
     # Otherwise, this will remain `None`.
     result = None
 
     # Copying data is potentially expensive, and most of it won't change as we
-    # process all the elements, so we'll make a deep copy of the data once and
+    # process all the elements, so we'll make a copy of the data once and
     # use that for future comparisons. For the few pieces of data that do
     # change based on the element, we'll add and then delete them from
     # `original_data` as needed.
-    original_data = copy.deepcopy(data)
+    #
+    # Data isn't validated at all in the `render` and `file` phases (see
+    # below), so we skip the copy entirely there. In other phases, only the
+    # props that can't be edited in this phase are actually copied; this
+    # avoids copying potentially large `params` and `correct_answers` in
+    # phases where elements are allowed to change them anyway.
+    original_data = (
+        snapshot_data(data, phase) if phase not in ("render", "file") else None
+    )
 
     # We'll cache instantiated modules for two reasons:
     # - This allows us to avoid re-reading/compiling/executing them if the same
@@ -130,13 +279,10 @@ def process(
             if mod is None:
                 mod = {"__file__": str(element_controller_path)}
 
-                with open(element_controller_path, encoding="utf-8") as inf:
-                    # Use `compile` to associate filename with code object, so the
-                    # filename appears in the traceback if there is an error:
-                    # https://stackoverflow.com/a/437857
-                    code = compile(inf.read(), element_controller_path, "exec")
-
-                exec(code, mod)
+                # The compiled code is cached for the lifetime of the worker
+                # (and is pre-warmed in the zygote for core elements), so we
+                # only pay for executing the module body here.
+                exec(code_cache.get_code(element_controller_path), mod)
                 mod_cache[element_controller_path] = mod
 
             method = get_module_function(mod, phase)
@@ -144,8 +290,11 @@ def process(
                 return None
 
             # Add element-specific or phase-specific information to the data.
-            prepare_data(phase, data, context, element.tag)
-            prepare_data(phase, original_data, context, element.tag)
+            prepare_data(phase, data, context, element_extensions, element.tag)
+            if original_data is not None:
+                prepare_data(
+                    phase, original_data, context, element_extensions, element.tag
+                )
 
             # Temporarily strip tail text from the element; the `parse_fragment`
             # function will choke on it.
@@ -161,11 +310,37 @@ def process(
             if arg_names == ["element_html", "element_index", "data"]:
                 args.insert(1, None)
 
-            element_value = method(*args)
+            # Elements that declare what their output depends on are rendered
+            # at most once per distinct input.
+            render_dependencies = getattr(method, RENDER_DEPENDENCIES_ATTRIBUTE, None)
+            cache_key = (
+                get_render_cache_key(
+                    element_controller_path,
+                    element,
+                    args[0],
+                    data,
+                    render_dependencies,
+                )
+                if phase == "render" and render_dependencies is not None
+                else None
+            )
+
+            if cache_key is not None and cache_key in render_cache:
+                render_cache.move_to_end(cache_key)
+                render_cache_stats["hits"] += 1
+                element_value = render_cache[cache_key]
+            else:
+                element_value = method(*args)
+                if cache_key is not None and isinstance(element_value, str):
+                    render_cache_stats["misses"] += 1
+                    render_cache[cache_key] = element_value
+                    if len(render_cache) > RENDER_CACHE_SIZE:
+                        render_cache.popitem(last=False)
+
             # Restore the tail text.
             element.tail = temp_tail
 
-            if phase not in ("render", "file"):
+            if original_data is not None:
                 # For legacy reasons, we don't validate `data` during the,
                 # `render` or `file` phases, since the old question processor
                 # didn't either. These phases will never produce new data
@@ -180,7 +355,8 @@ def process(
 
             # Clean up changes to `data` and `original_data` for the next iteration.
             restore_data(data)
-            restore_data(original_data)
+            if original_data is not None:
+                restore_data(original_data)
 
             if phase == "render":
                 # TODO: validate that return value was a string?
@@ -217,26 +393,41 @@ def process(
     def process_element_return_none(element: lxml.html.HtmlElement) -> None:
         process_element(element)
 
+    # Rendered element HTML only needs to be parsed again if it contains other
+    # elements that we need to process, or processing instructions that need
+    # to be rewritten. Otherwise, it's spliced into the result as-is.
+    element_names = "|".join(map(re.escape, elements))
+    element_tag_pattern = re.compile(
+        rf"<\?|<(?:{element_names})[\s/>]" if elements else r"<\?",
+        re.IGNORECASE,
+    )
+
+    def needs_reparse(element_html: str) -> bool:
+        return element_tag_pattern.search(element_html) is not None
+
     if phase == "render":
-        result = traverse_and_replace(html, process_element)
+        result = traverse_and_replace(html, process_element, needs_reparse)
     else:
         traverse_and_execute(html, process_element_return_none)
 
     if phase == "file":
         result = filelike_to_string(result)
 
-    return result, processed_elements
+    return result, processed_elements, render_cache_stats
 
 
 def prepare_data(
-    phase: Phase, data: dict[str, Any], context: RenderContext, element_tag: str
+    phase: Phase,
+    data: dict[str, Any],
+    context: RenderContext,
+    element_extensions: Mapping[str, Mapping[str, Any]],
+    element_tag: str,
 ) -> None:
-    element_extensions = context["element_extensions"]
     element_info = context["elements"][element_tag]
 
-    # Make a deep copy of the data so that question/element code can't
-    # modify the source data.
-    data["extensions"] = copy.deepcopy(element_extensions.get(element_tag, {}))
+    # The extensions are read-only, so question/element code can't modify
+    # them and it's safe to share them between elements without copying.
+    data["extensions"] = element_extensions.get(element_tag, EMPTY_EXTENSIONS)
 
     # `*_url` options are only present during the render phase.
     if phase == "render":
@@ -67,7 +67,9 @@ def prepare_text(text: str) -> str:
 
 
 def traverse_and_replace(
-    html: str, replace: Callable[[lxml.html.HtmlElement], ElementReplacement]
+    html: str,
+    replace: Callable[[lxml.html.HtmlElement], ElementReplacement],
+    needs_reparse: Callable[[str], bool] | None = None,
 ) -> str:
     """
     Perform traversal and element replacement on HTML with the given replace function.
@@ -76,6 +78,11 @@ def traverse_and_replace(
     The top entry in count_stack is decremented every time something is moved onto result,
     and when an entry hits zero, the corresponding tag from tail_stack is moved onto result as well.
 
+    By default, every string returned by `replace` is parsed so that any elements
+    it contains are traversed as well. If `needs_reparse` is given, strings for which
+    it returns `False` are instead spliced into the result as-is, which avoids parsing
+    and re-serializing HTML that contains nothing that needs to be replaced.
+
     Raises:
         TypeError: If the HTML contains an invalid tag.
     """
@@ -101,8 +108,12 @@ def traverse_and_replace(
             if new_elements is None:
                 new_elements = []
             elif isinstance(new_elements, str):
-                fragments = lxml.html.fragments_fromstring(new_elements)
-                new_elements = fragments
+                if needs_reparse is not None and not needs_reparse(new_elements):
+                    # Strings on the work stack are copied to the result verbatim.
+                    new_elements = [new_elements]
+                else:
+                    fragments = lxml.html.fragments_fromstring(new_elements)
+                    new_elements = fragments
 
             if isinstance(new_elements, list):
                 # Add element tail before processing replaced element
@@ -1,7 +1,41 @@
-from typing import Any
+import importlib
+import json
+import os
+import pathlib
+import random
+import sys
+import types
+from collections.abc import Container, Mapping
+from dataclasses import dataclass, field
+from typing import Any, TypedDict
+
+import numpy as np
 
 import prairielearn as pl
 
+CORE_ELEMENTS_PATH = (
+    pathlib.Path(__file__).parent.parent.parent.parent / "elements"
+).resolve()
+
+
+class PreloadEntry(TypedDict):
+    module: str
+    """The name of the module to import."""
+
+
+# Modules that are worth importing in the zygote before forking. Only modules
+# from the `prairielearn` package may be preloaded: the helper modules of core
+# elements (like `dag_checker` or `unit_utils`) are top-level modules, and
+# preloading them would shadow identically-named modules in course code.
+DEFAULT_PRELOAD_MANIFEST: list[PreloadEntry] = [
+    {"module": "prairielearn.sympy_utils"},
+    {"module": "prairielearn.timeout_utils"},
+]
+
+
+def is_preloadable_module(name: str) -> bool:
+    return name == "prairielearn" or name.startswith("prairielearn.")
+
 
 def safe_parse_int(int_str: str) -> int | float:
     """
@@ -72,3 +106,174 @@ def get_module_function(mod: dict[str, Any], fcn: str) -> Any:
         return None
 
     return mod[fcn]
+
+
+# Imported modules and copies of their globals, keyed by module name.
+ModuleGlobals = Mapping[str, tuple[types.ModuleType, dict[str, Any]]]
+
+
+def capture_module_globals(exclude: Container[str] = ()) -> ModuleGlobals:
+    """
+    Copy the globals of every imported module other than those in `exclude`,
+    so that they can be restored by `restore_worker_checkpoint`.
+
+    This touches every module, so it should be done in the zygote before
+    forking rather than in each worker. `sys` and the `__main__` module (under
+    any of its names) are left out, since the zygote and its workers
+    legitimately set them up differently.
+    """
+    skipped = (sys, sys.modules.get("__main__"))
+    return {
+        name: (module, vars(module).copy())
+        for name, module in list(sys.modules.items())
+        if isinstance(module, types.ModuleType)
+        and not any(module is skip for skip in skipped)
+        and name not in exclude
+    }
+
+
+def restore_module_globals(module_globals: ModuleGlobals) -> None:
+    for name, (module, saved) in module_globals.items():
+        sys.modules[name] = module
+        current = vars(module)
+        if len(current) == len(saved) and all(
+            key in saved and saved[key] is value for key, value in current.items()
+        ):
+            continue
+        # Submodules that are still imported stay bound to their package, like
+        # they would be after importing them in a fresh worker.
+        submodules = {
+            key: value
+            for key, value in current.items()
+            if key not in saved
+            and isinstance(value, types.ModuleType)
+            and sys.modules.get(f"{name}.{key}") is value
+        }
+        current.clear()
+        current.update(saved)
+        current.update(submodules)
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerCheckpoint:
+    """
+    A snapshot of the interpreter state that a warm worker restores between
+    calls, so that each call observes the same state as a freshly-forked worker.
+
+    Restoring it drops modules imported since the checkpoint, and rebinds the
+    globals of the modules in `module_globals` (which covers monkeypatched
+    module attributes). It can't undo changes made in place to objects that
+    existed at the checkpoint, like a class attribute of a library, the contents
+    of a module-level list, or state kept in C (e.g., `np.seterr()`). This gives
+    weaker isolation than forking a new worker.
+    """
+
+    modules: frozenset[str]
+    path: list[str]
+    meta_path: list[Any]
+    cwd: str
+    random_state: Any
+    np_random_state: Any
+    module_globals: ModuleGlobals = field(default_factory=dict[str, Any])
+
+
+def capture_worker_checkpoint(
+    module_globals: ModuleGlobals | None = None,
+) -> WorkerCheckpoint:
+    """
+    Capture the state of this worker. `module_globals` should be captured with
+    `capture_module_globals` before this worker was forked; the globals of
+    modules imported since then are captured here.
+    """
+    module_globals = module_globals or {}
+    module_globals = {**module_globals, **capture_module_globals(module_globals)}
+    return WorkerCheckpoint(
+        modules=frozenset(sys.modules),
+        path=list(sys.path),
+        meta_path=list(sys.meta_path),
+        cwd=os.getcwd(),
+        random_state=random.getstate(),
+        np_random_state=np.random.get_state(),
+        module_globals=module_globals,
+    )
+
+
+def restore_worker_checkpoint(checkpoint: WorkerCheckpoint) -> None:
+    # Drop any modules that were imported after the checkpoint was taken so
+    # that they are re-executed (and re-seeded, in the case of e.g. Faker)
+    # on the next import, exactly as they would be in a fresh worker.
+    for name in [name for name in sys.modules if name not in checkpoint.modules]:
+        del sys.modules[name]
+    restore_module_globals(checkpoint.module_globals)
+
+    sys.path = list(checkpoint.path)
+    sys.meta_path[:] = checkpoint.meta_path
+    os.chdir(checkpoint.cwd)
+    random.setstate(checkpoint.random_state)
+    np.random.set_state(checkpoint.np_random_state)
+
+
+def is_trusted_call(file: str | None, cwd: str | None, args: Any) -> bool:
+    """
+    Determine whether a call only executes core element code.
+
+    Core elements ship with PrairieLearn itself, so a worker that has only run
+    core element code can safely be reused for another call. Any call that may
+    run course code (question `server.py` files, course elements, element
+    extensions, or legacy v2 questions) is untrusted.
+    """
+    if file is None:
+        return True
+
+    if file == "question.html":
+        context = args[0] if isinstance(args, list) and args else None
+        if not isinstance(context, dict):
+            return False
+        elements = context.get("elements", {})
+        # Core elements like pl-drawing execute the Python code of any course
+        # extensions that are provided for them.
+        return not any(context.get("element_extensions", {}).values()) and all(
+            info.get("type") == "core" for info in elements.values()
+        )
+
+    if cwd is None or file.endswith(".js"):
+        return False
+
+    data = args[-1] if isinstance(args, list) and args else None
+    if isinstance(data, dict) and data.get("extensions"):
+        return False
+
+    return pathlib.Path(cwd).resolve().is_relative_to(CORE_ELEMENTS_PATH)
+
+
+def load_preload_manifest(path: str | None) -> list[PreloadEntry]:
+    """
+    Load a preload manifest from a JSON file containing a list of
+    `{"module": ...}` entries. If no path is given, the default manifest is
+    returned.
+
+    Raises:
+        ValueError: If the manifest is not a list of entries that name modules
+            of the `prairielearn` package.
+    """
+    if not path:
+        return DEFAULT_PRELOAD_MANIFEST
+
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if not isinstance(manifest, list) or not all(
+        isinstance(entry, dict)
+        and isinstance(entry.get("module"), str)
+        and is_preloadable_module(entry["module"])
+        for entry in manifest
+    ):
+        raise ValueError(f"Invalid preload manifest: {path}")
+
+    return manifest
+
+
+def preload_modules(manifest: list[PreloadEntry]) -> None:
+    """Import every module in the manifest."""
+    for entry in manifest:
+        importlib.import_module(entry["module"])
@@ -7,6 +7,8 @@ from prairielearn import ...
 
 import base64
 import math
+import re
+from collections.abc import Callable
 from typing import Any, Literal, NotRequired, TypedDict
 
 
@@ -220,6 +222,9 @@ def add_files_format_error(data: QuestionData, error: str) -> None:
         ]
 
 
+SUBMITTED_FILE_HANDLE_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+
 def add_submitted_file(
     data: QuestionData,
     file_name: str,
@@ -227,11 +232,20 @@ def add_submitted_file(
     *,
     raw_contents: str | bytes | bytearray | None = None,
     mimetype: str | None = None,
+    handle: str | None = None,
 ) -> None:
     """Add a submitted file to the data dictionary.
 
+    Instead of its contents, a file may be added by `handle`: an opaque
+    reference to file contents that are held by the caller that issued the
+    handle. The file is then stored as `{"name": ..., "handle": ...}`, and its
+    contents never pass through (or get copied by) the question code. Consumers
+    of `_files` (e.g., external graders) expect `contents`, so the handle must be
+    resolved by its issuer before the submission is stored.
+
     Raises:
-        ValueError: If neither `base64_contents` nor `raw_contents` is provided.
+        ValueError: If not exactly one of `base64_contents`, `raw_contents` and
+            `handle` is provided, or if `handle` is not a valid handle.
 
     Examples:
         >>> add_submitted_file(data, "foo.txt", "base64-contents", mimetype="text/plain")
@@ -241,8 +255,18 @@ def add_submitted_file(
         >>> data["submitted_answers"]
         {"_files": [{"name": "foo.txt", "contents": "base64-contents", "mimetype": "text/plain"},
                     {"name": "bar.txt", "contents": "cmF3IGNvbnRlbnRz"}]}
+        >>> add_submitted_file(data, "baz.txt", handle="f1")
+        >>> data["submitted_answers"]["_files"][-1]
+        {"name": "baz.txt", "handle": "f1"}
     """
-    if base64_contents is None:
+    if handle is not None:
+        if base64_contents is not None or raw_contents is not None:
+            raise ValueError(
+                "A file can be provided either by its contents or by a handle, not both."
+            )
+        if not SUBMITTED_FILE_HANDLE_PATTERN.fullmatch(handle):
+            raise ValueError(f"Invalid file handle: {handle!r}")
+    elif base64_contents is None:
         # If raw_contents is None, raise an error
         if raw_contents is None:
             raise ValueError(
@@ -255,7 +279,11 @@ def add_submitted_file(
     if data["submitted_answers"].get("_files") is None:
         data["submitted_answers"]["_files"] = []
     if isinstance(data["submitted_answers"]["_files"], list):
-        submitted_file = {"name": file_name, "contents": base64_contents}
+        submitted_file = (
+            {"name": file_name, "handle": handle}
+            if handle is not None
+            else {"name": file_name, "contents": base64_contents}
+        )
         if mimetype is not None:
             submitted_file["mimetype"] = mimetype
         data["submitted_answers"]["_files"].append(submitted_file)
@@ -263,3 +291,44 @@ def add_submitted_file(
         add_files_format_error(
             data, '"_files" is present in "submitted_answers" but is not an array'
         )
+
+
+RENDER_DEPENDENCIES_ATTRIBUTE = "_pl_render_depends_on"
+
+RenderDependency = str | tuple[str, str]
+"""
+A key of `data`, or a `(key, attribute)` pair that refers to the single entry
+`data[key][value]` where `value` is the value of the element's `attribute`.
+"""
+
+
+def render_depends_on[RenderFunctionT: Callable[..., Any]](
+    *dependencies: RenderDependency,
+) -> Callable[[RenderFunctionT], RenderFunctionT]:
+    """Declare that an element's `render()` output only depends on its HTML,
+    `data["panel"]`, and the given parts of `data`.
+
+    Each dependency is either a key of `data`, or a `(key, attribute)` pair
+    that refers to the single entry of `data[key]` named by the element's
+    `attribute`. Prefer the latter where possible, since the whole of
+    `data[key]` doesn't have to be serialized on every render.
+
+    The output of a `render()` function decorated this way may be cached and reused
+    for later renders with the same element HTML, panel, and values of the
+    dependencies. Only use this for functions with no other inputs, e.g., that don't
+    read files from the question directory or use random numbers.
+
+    Examples:
+        >>> @render_depends_on(("params", "params-name"))
+        ... def render(element_html: str, data: QuestionData) -> str:
+        ...     ...
+
+    Returns:
+        A decorator that marks the render function with its dependencies.
+    """
+
+    def decorator(fn: RenderFunctionT) -> RenderFunctionT:
+        vars(fn)[RENDER_DEPENDENCIES_ATTRIBUTE] = dependencies
+        return fn
+
+    return decorator
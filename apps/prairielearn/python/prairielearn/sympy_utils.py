@@ -6,7 +6,6 @@ from prairielearn.sympy_utils import ...
 """
 
 import ast
-import copy
 import html
 import operator
 import re
@@ -15,7 +14,7 @@ from collections import deque
 from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass
 from enum import Enum
-from functools import wraps
+from functools import cache, lru_cache, wraps
 from tokenize import NAME, NUMBER, OP, TokenError
 from types import CodeType
 from types import MappingProxyType as FrozenDict
@@ -663,19 +662,25 @@ def sympy_check(
     )
 
     work_stack: deque[sympy.Basic] = deque([expr])
+    # SymPy shares identical subexpressions between nodes, so track what has
+    # already been checked by identity and visit each distinct node only once.
+    # The assumption queries below are cached on each node by SymPy, so this also
+    # means each node's assumptions are evaluated at most once per call.
+    visited: set[int] = set()
 
     while work_stack:
         item = work_stack.pop()
-        str_item = str(item)
-
-        if (
-            not allow_extra_symbols
-            and isinstance(item, sympy.Symbol)
-            and str_item not in valid_symbols
-        ):
-            raise HasInvalidSymbolError(str_item)
+        if id(item) in visited:
+            continue
+        visited.add(id(item))
+
+        # Only stringify symbols: str() of an interior node prints its whole subtree
+        if not allow_extra_symbols and isinstance(item, sympy.Symbol):
+            str_item = str(item)
+            if str_item not in valid_symbols:
+                raise HasInvalidSymbolError(str_item)
         if isinstance(item, sympy.Float):
-            raise HasFloatError(float(str_item))
+            raise HasFloatError(float(str(item)))
         if not allow_sets and isinstance(item, sympy.Set):
             raise HasSetNotationError
         # Detect complex numbers both in simplified form (sympy.I) and in
@@ -686,7 +691,7 @@ def sympy_check(
         # The is_extended_real query can trigger internal sympy bugs on certain
         # unevaluated expressions (e.g. sec(0) with evaluateFalse), so we catch
         # AttributeError and skip the check for those items.
-        if not allow_complex:
+        if not allow_complex and not isinstance(item, sympy.Rational):
             if item is sympy.I:
                 raise HasComplexError("complex values not allowed")
             try:
@@ -776,6 +781,57 @@ def _regex_sub_expr_and_map_offsets(
     return "".join(parts), new_offsets
 
 
+@cache
+def _get_sympy_global_dict() -> dict[str, Any]:
+    """Return the global dict used for parsing, i.e., the contents of `sympy`.
+
+    This is built once, as running `from sympy import *` is relatively slow.
+    Callers must not modify the returned dict.
+    """
+    global_dict: dict[str, Any] = {}
+    exec("from sympy import *", global_dict)
+    return global_dict
+
+
+@cache
+def _get_transformations(*, allow_sets: bool) -> tuple[TRANS, ...]:
+    """Return the SymPy parser transformations used by `evaluate_with_source`."""
+    transformations = (
+        *sympy_parser.standard_transformations,
+        sympy_parser.implicit_multiplication_application,
+    )
+    if allow_sets:
+        return (
+            _unmangle_infix_binops_transformation(_Constants.set_operators.keys()),
+            _set_literal_transformation,
+            _set_operation_transformation,
+            _interval_transformation,
+            *transformations,
+        )
+
+    # check for open intervals
+    return (
+        _err_on_transform(_interval_transformation, HasSetNotationError),
+        *transformations,
+    )
+
+
+# Locals that appear after SymPy stringification, which the AST check must allow.
+_STRINGIFIED_FUNCTIONS: Final[_FrozenSympyFunctionMapT] = FrozenDict({
+    "Integer": sympy.Integer,
+    "Symbol": sympy.Symbol,
+    "Float": sympy.Float,
+    "Interval": sympy.Interval,
+    "Union": sympy.Union,
+    "Intersection": sympy.Intersection,
+})
+
+_STRINGIFIED_VARIABLES: Final[_FrozenSympyMapT] = FrozenDict({
+    "I": sympy.I,
+    "oo": sympy.oo,
+})
+
+
 def evaluate_with_source(
     expr: str,
     locals_for_eval: LocalsForEval,
@@ -860,28 +916,11 @@ def evaluate_with_source(
 
     # Global dict is set up to be very permissive for parsing purposes
     # (makes it cleaner to call this function with a custom locals dict).
-    # This line shouldn't be dangerous, as it's just loading the global dict.
-    global_dict = {}
-    exec("from sympy import *", global_dict)
+    # The shared dict is built once; we use a shallow copy of it, since
+    # `eval` may insert `__builtins__` into the globals it's given.
+    global_dict = dict(_get_sympy_global_dict())
 
-    transformations = (
-        *sympy_parser.standard_transformations,
-        sympy_parser.implicit_multiplication_application,
-    )
-    if allow_sets:
-        transformations = (
-            _unmangle_infix_binops_transformation(_Constants.set_operators.keys()),
-            _set_literal_transformation,
-            _set_operation_transformation,
-            _interval_transformation,
-            *transformations,
-        )
-    else:
-        # check for open intervals
-        transformations = (
-            _err_on_transform(_interval_transformation, HasSetNotationError),
-            *transformations,
-        )
+    transformations = _get_transformations(allow_sets=allow_sets)
 
     try:
         code = sympy_parser.stringify_expr(
@@ -894,23 +933,16 @@ def evaluate_with_source(
         raise HasParseError(-1) from exc
 
     # First do AST check, mainly for security
-    parsed_locals_to_eval = copy.deepcopy(locals_for_eval)
-
+    #
     # Add locals that appear after sympy stringification
-    # This check is only for safety, so won't change what gets parsed
-    parsed_locals_to_eval["functions"].update(
-        Integer=sympy.Integer,
-        Symbol=sympy.Symbol,
-        Float=sympy.Float,
-        Interval=sympy.Interval,
-        Union=sympy.Union,
-        Intersection=sympy.Intersection,
-    )
-
-    parsed_locals_to_eval["variables"].update(
-        I=sympy.I,
-        oo=sympy.oo,
-    )
+    # This check is only for safety, so won't change what gets parsed.
+    # The AST check only reads these dicts, so we build new top-level dicts
+    # instead of deep-copying `locals_for_eval`.
+    parsed_locals_to_eval: LocalsForEval = {
+        "functions": locals_for_eval["functions"] | _STRINGIFIED_FUNCTIONS,
+        "variables": locals_for_eval["variables"] | _STRINGIFIED_VARIABLES,
+        "helpers": locals_for_eval["helpers"],
+    }
 
     try:
         ast_check_str(code, parsed_locals_to_eval, allow_sets=allow_sets)
@@ -1026,6 +1058,10 @@ def convert_string_to_sympy_with_source(
     the variables and functions that can be used. If the string is invalid,
     raise an exception with a message that can be displayed to the user.
 
+    Successfully parsed expressions are cached, since SymPy expressions are
+    immutable and the same strings (e.g., the correct answer) are typically
+    parsed many times within a worker.
+
     Returns:
         A tuple of the sympy expression and the source code that was used to generate it.
 
@@ -1063,6 +1099,77 @@ def convert_string_to_sympy_with_source(
             f"Conflicting function name(s): {', '.join(conflict_fns)}"
         )
 
+    options = _ParseOptions(
+        allow_hidden=allow_hidden,
+        allow_complex=allow_complex,
+        allow_sets=allow_sets,
+        allow_trig_functions=allow_trig_functions,
+        simplify_expression=simplify_expression,
+        allow_extra_symbols=allow_extra_symbols,
+    )
+
+    try:
+        assumptions_key = (
+            tuple(
+                (name, tuple(sorted(var_assumptions.items())))
+                for name, var_assumptions in assumptions.items()
+            )
+            if assumptions is not None
+            else None
+        )
+        cache_key = (expr, tuple(valid_names.items()), assumptions_key, options)
+        hash(cache_key)
+    except TypeError:
+        # Assumptions with unhashable values can't be cached.
+        return _parse_expression(expr, valid_names, assumptions, options)
+
+    return _parse_expression_cached(*cache_key)
+
+
+@dataclass(frozen=True, slots=True)
+class _ParseOptions:
+    allow_hidden: bool
+    allow_complex: bool
+    allow_sets: bool
+    allow_trig_functions: bool
+    simplify_expression: bool
+    allow_extra_symbols: bool
+
+
+# Parsed expressions are kept for the lifetime of the worker. A worker is
+# normally replaced after each request, so this only avoids parsing the same
+# expression again within a request, like an answer that is parsed again for
+# each panel of a page that shows it. Only a warm worker (see `WARM_WORKER` in
+# `zygote.py`) keeps the parsed expressions across requests.
+@lru_cache(maxsize=1024)
+def _parse_expression_cached(
+    expr: str,
+    valid_names: tuple[tuple[str, tuple[bool, str]], ...],
+    assumptions_key: tuple[tuple[str, tuple[tuple[str, Any], ...]], ...] | None,
+    options: _ParseOptions,
+) -> tuple[sympy.Expr, str | CodeType]:
+    return _parse_expression(
+        expr,
+        dict(valid_names),
+        (
+            {name: dict(var_assumptions) for name, var_assumptions in assumptions_key}
+            if assumptions_key is not None
+            else None
+        ),
+        options,
+    )
+
+
+def _parse_expression(
+    expr: str,
+    valid_names: dict[str, tuple[bool, str]],
+    assumptions: AssumptionsDictT | None,
+    options: _ParseOptions,
+) -> tuple[sympy.Expr, str | CodeType]:
+    allow_hidden = options.allow_hidden
+    allow_complex = options.allow_complex
+    allow_sets = options.allow_sets
+
     # Create a whitelist of valid functions and variables (and a special flag
     # for numbers that are converted to sympy integers).
     const = _Constants
@@ -1080,7 +1187,7 @@ def convert_string_to_sympy_with_source(
         if allow_hidden:
             locals_for_eval["variables"].update(const.hidden_complex_variables)
 
-    if allow_trig_functions:
+    if options.allow_trig_functions:
         locals_for_eval["functions"].update(const.trig_functions)
 
     if allow_sets:
@@ -1099,8 +1206,8 @@ def convert_string_to_sympy_with_source(
         locals_for_eval,
         allow_complex=allow_complex,
         allow_sets=allow_sets,
-        simplify_expression=simplify_expression,
-        allow_extra_symbols=allow_extra_symbols,
+        simplify_expression=options.simplify_expression,
+        allow_extra_symbols=options.allow_extra_symbols,
     )
 
 
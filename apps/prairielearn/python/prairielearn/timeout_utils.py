@@ -1,6 +1,9 @@
 """Utilities for performing local, signal-based timeouts.
 Implementation from https://github.com/glenfant/stopit under the MIT license.
 
+For calls that may not be interruptible by a signal, `ProcessTimeoutPool` runs
+them in a helper process that is killed if the deadline passes.
+
 ```python
 from prairielearn.timeout_utils import ...
 ```
@@ -8,13 +11,23 @@ from prairielearn.timeout_utils import ...
 
 from __future__ import annotations
 
+import multiprocessing
+import os
+import pickle
 import signal
+import sys
 import threading
 import time
+import traceback
+from collections import OrderedDict
 from enum import IntEnum
-from typing import TYPE_CHECKING
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
     from types import FrameType, TracebackType
     from typing import Self
 
@@ -145,6 +158,9 @@ class SignalTimeout:
         # handler must not preempt this assignment.
         if not is_own_timeout:
             self.state = TimeoutState.INTERRUPTED
+        elif self.state == TimeoutState.EXECUTING:
+            # Raised from inside the block, e.g. by `ProcessTimeoutPool.run`
+            self.state = TimeoutState.TIMED_OUT
         self.suppress_interrupt()
         return self.swallow_exc if is_own_timeout else False
 
@@ -191,3 +207,218 @@ class SignalTimeout:
 # which had asynchronous behavior. See https://github.com/PrairieLearn/PrairieLearn/pull/14417
 class ThreadingTimeout(SignalTimeout):
     """Deprecated alias for SignalTimeout."""
+
+
+# The default number of results kept by a `ProcessTimeoutPool`.
+PROCESS_POOL_CACHE_SIZE = 256
+
+# How often an idle helper process checks that its parent is still alive, in seconds.
+HELPER_PARENT_POLL_INTERVAL = 1.0
+
+
+def _pickle_outcome(*, ok: bool, value: Any) -> bytes:
+    """Pickle the outcome of a call, replacing exceptions that can't be sent back."""
+    try:
+        payload = pickle.dumps((ok, value))
+        # Some exceptions pickle, but can't be rebuilt from their pickled args
+        pickle.loads(payload)
+    except Exception:
+        if ok:
+            raise
+        assert isinstance(value, BaseException)
+        return pickle.dumps((
+            False,
+            RuntimeError("".join(traceback.format_exception(value))),
+        ))
+    return payload
+
+
+def _helper_main(conn: Connection, parent_conn: Connection, parent_pid: int) -> None:
+    """Run calls received from the pool until the pool closes its end of `conn`,
+    or the process that owns the pool exits.
+    """
+    # The forked helper holds a copy of the pool's end of the pipe, which would
+    # keep it from ever seeing EOF on `conn`.
+    parent_conn.close()
+    # A helper may be forked inside an active `SignalTimeout`, whose deadline
+    # belongs to the parent.
+    _signal_state.active_timeouts.clear()
+    _signal_state.prev_handler = None
+
+    while True:
+        # Helpers forked later also hold a copy of the pool's end of this pipe,
+        # and a process killed with `os._exit()` or SIGKILL doesn't clean up
+        # its helpers, so also stop once the parent is gone.
+        while not conn.poll(HELPER_PARENT_POLL_INTERVAL):
+            if os.getppid() != parent_pid:
+                return
+        try:
+            task = conn.recv_bytes()
+        except EOFError:
+            return
+        try:
+            # The helper may have been forked before the caller's module was
+            # importable, e.g. for another element, and `fn` is pickled by reference.
+            path, cwd, call = pickle.loads(task)
+            sys.path[:] = path
+            os.chdir(cwd)
+            fn, args = pickle.loads(call)
+            payload = _pickle_outcome(ok=True, value=fn(*args))
+        except Exception as exc:
+            payload = _pickle_outcome(ok=False, value=exc)
+        conn.send_bytes(payload)
+
+
+class _Helper:
+    def __init__(self) -> None:
+        context = multiprocessing.get_context("fork")
+        self.conn, child_conn = context.Pipe()
+        self.process: BaseProcess = context.Process(
+            target=_helper_main,
+            args=(child_conn, self.conn, os.getpid()),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ProcessTimeoutPool:
+    """Pool of pre-forked helper processes that run calls with a hard deadline.
+
+    A call that runs past its deadline is stopped by killing the helper process
+    running it, and a fresh helper is forked to replace it. Unlike `SignalTimeout`,
+    this stops calls that are stuck in C code, and works from any thread.
+
+    The callable and its arguments are sent to a helper with `pickle`, so the
+    callable must be importable by reference (e.g., a module-level function) with
+    the caller's `sys.path`. Return values and exceptions are sent back the same way.
+
+    Parameters:
+        size: The number of helper processes to fork up front.
+        cache_size: The number of results to keep, keyed by the `cache_key` passed to `run`.
+    """
+
+    def __init__(
+        self, size: int = 1, *, cache_size: int = PROCESS_POOL_CACHE_SIZE
+    ) -> None:
+        self.size = size
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._idle = [_Helper() for _ in range(size)]
+
+    def _acquire(self) -> _Helper:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Helpers belong to the process that forked them
+                self._pid = os.getpid()
+                self._idle = [_Helper() for _ in range(self.size)]
+                self._cache.clear()
+            if self._idle:
+                return self._idle.pop()
+        return _Helper()
+
+    def _release(self, helper: _Helper) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(helper)
+                return
+        helper.kill()
+
+    def _cache_result(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def run[T](
+        self,
+        fn: Callable[..., T],
+        /,
+        *args: Any,
+        timeout: float,
+        cache_key: Hashable | None = None,
+    ) -> T:
+        """Call `fn(*args)` in a helper process, and return its result.
+
+        If `cache_key` is given, the result is cached under it, so it must identify
+        the call completely (including the function being called). Exceptions
+        raised by `fn` are re-raised, and neither they nor timeouts are cached, since
+        a call may only time out because the machine is busy.
+
+        The caller's `sys.path` and working directory are sent along with the call,
+        so `fn` may come from a module that was imported after the helpers were forked.
+
+        Returns:
+            The return value of `fn(*args)`.
+
+        Raises:
+            TimeoutExceptionError: If the call did not finish within `timeout` seconds.
+            RuntimeError: If the helper process exited while running the call.
+        """
+        if cache_key is not None:
+            with self._lock:
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    return self._cache[cache_key]
+
+        task = pickle.dumps((sys.path, os.getcwd(), pickle.dumps((fn, args))))
+        helper = self._acquire()
+        try:
+            helper.conn.send_bytes(task)
+            if not helper.conn.poll(timeout):
+                raise TimeoutExceptionError
+            ok, value = pickle.loads(helper.conn.recv_bytes())
+        except EOFError as exc:
+            helper.kill()
+            raise RuntimeError("Helper process exited unexpectedly.") from exc
+        except BaseException:
+            # Timeouts (including a `SignalTimeout` around this call) and other
+            # interruptions leave the helper busy, so it can't be reused.
+            helper.kill()
+            raise
+        self._release(helper)
+
+        if not ok:
+            raise value
+        if cache_key is not None:
+            self._cache_result(cache_key, value)
+        return value
+
+    def close(self) -> None:
+        """Kill all idle helper processes."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            if self._pid != os.getpid():
+                # Helpers belong to the process that forked them
+                return
+        for helper in idle:
+            helper.kill()
+
+
+@cache
+def get_process_timeout_pool() -> ProcessTimeoutPool | None:
+    """Return a shared `ProcessTimeoutPool`, creating it on first use.
+
+    Returns:
+        The shared pool, or `None` if the platform does not support forking.
+    """
+    if not hasattr(os, "fork"):
+        return None
+    return ProcessTimeoutPool()
+
+
+def close_process_timeout_pool() -> None:
+    """Kill the idle helper processes of the shared pool, if it was created."""
+    if get_process_timeout_pool.cache_info().currsize == 0:
+        return
+    pool = get_process_timeout_pool()
+    if pool is not None:
+        pool.close()
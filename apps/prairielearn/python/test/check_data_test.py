@@ -1,7 +1,7 @@
 from typing import Any
 
 import pytest
-from prairielearn.internal.check_data import check_data
+from prairielearn.internal.check_data import check_data, snapshot_data
 
 
 def test_check_data_extra_props() -> None:
@@ -67,3 +67,38 @@ def test_check_data_number_keys() -> None:
             {"panel": "question", 1: "data", 2: "more data"},
             "render",
         )
+
+
+def test_snapshot_data_copies_only_checked_props() -> None:
+    data: dict[str, Any] = {
+        "params": {"matrix": [[1, 2], [3, 4]]},
+        "options": {"foo": "bar"},
+        "panel": "question",
+    }
+
+    snapshot = snapshot_data(data, "grade")
+
+    # `params` may be edited during `grade`, so it's shared rather than copied.
+    assert snapshot["params"] is data["params"]
+    # `options` may not be edited, so it's copied for later comparison.
+    assert snapshot["options"] == data["options"]
+    assert snapshot["options"] is not data["options"]
+
+    data["options"]["foo"] = "baz"
+    with pytest.raises(
+        ValueError, match=r'data\["options"\] has been illegally modified'
+    ):
+        check_data(snapshot, data, "grade")
+
+
+def test_snapshot_data_copies_shared_values_once() -> None:
+    matrix = [[1, 2], [3, 4]]
+    data: dict[str, Any] = {
+        "params": {"matrix": matrix},
+        "correct_answers": {"matrix": matrix},
+    }
+
+    snapshot = snapshot_data(data, "test")
+
+    assert snapshot["params"]["matrix"] is not matrix
+    assert snapshot["params"]["matrix"] is snapshot["correct_answers"]["matrix"]
@@ -0,0 +1,73 @@
+import copy
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from prairielearn.internal import code_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_code_cache() -> Iterator[None]:
+    code_cache.clear()
+    yield
+    code_cache.clear()
+
+
+def test_get_code_caches_compiled_code(tmp_path: Path) -> None:
+    path = tmp_path / "controller.py"
+    path.write_text("x = 1\n")
+
+    first = code_cache.get_code(path)
+    second = code_cache.get_code(path)
+
+    assert first is second
+    assert first.co_filename == str(path)
+    assert code_cache.stats.hits == 1
+    assert code_cache.stats.misses == 1
+    assert code_cache.stats.compile_seconds > 0
+
+
+def test_get_code_recompiles_changed_file(tmp_path: Path) -> None:
+    path = tmp_path / "controller.py"
+    path.write_text("x = 1\n")
+    code_cache.get_code(path)
+
+    path.write_text("x = 22\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    mod: dict[str, int] = {}
+    exec(code_cache.get_code(path), mod)
+
+    assert mod["x"] == 22
+    assert code_cache.stats.misses == 2
+
+
+def test_prewarm_elements(tmp_path: Path) -> None:
+    element_path = tmp_path / "pl-test"
+    element_path.mkdir()
+    (element_path / "info.json").write_text(json.dumps({"controller": "pl-test.py"}))
+    (element_path / "pl-test.py").write_text("def render(): pass\n")
+
+    code_cache.prewarm_elements(tmp_path)
+    code_cache.get_code(element_path / "pl-test.py")
+
+    assert code_cache.stats.misses == 1
+    assert code_cache.stats.hits == 1
+
+
+def test_stats_since(tmp_path: Path) -> None:
+    path = tmp_path / "controller.py"
+    path.write_text("x = 1\n")
+    code_cache.get_code(path)
+
+    start = copy.copy(code_cache.stats)
+    code_cache.get_code(path)
+    code_cache.get_code(tmp_path / "controller.py")
+
+    since = code_cache.stats_since(start)
+    assert since.hits == 2
+    assert since.misses == 0
+    assert since.compile_seconds == 0
@@ -128,6 +128,81 @@ def test_encoding_pandas(df: pd.DataFrame) -> None:
     pd.testing.assert_frame_equal(deserialized_df, reference_df)
 
 
+def nullable_types_dataframe() -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "zoned": pd.date_range("2020", periods=3, tz="Europe/Berlin"),
+            "int": pd.array([1, None, 3], dtype="Int64"),
+            "bool": pd.array([True, None, False], dtype="boolean"),
+            "string": pd.array(["a", None, "c"], dtype="string"),
+            "complex": [1 + 2j, 3j, np.nan],
+            "category": pd.Categorical(["x", "y", "x"]),
+            "duration": pd.to_timedelta([1, None, 3], unit="s"),
+        },
+        index=pd.Index(["r1", "r2", "r3"], name="row"),
+    )
+    df.loc["r2", "zoned"] = pd.NaT
+    return df
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        city_dataframe(),
+        breast_cancer_dataframe(),
+        r_types_dataframe(),
+        nullable_types_dataframe(),
+        pd.DataFrame([[1, 2.5], [3, 4.5]], columns=pd.Index([0, 0])),
+        pd.DataFrame(),
+        pd.DataFrame(
+            {"value": [1.0, 2.0, 3.0]},
+            index=pd.date_range("2020-01-01", periods=3, freq="h", tz="UTC"),
+        ),
+        pd.DataFrame({"value": [1, 2, 3]}, index=pd.timedelta_range("1D", periods=3)),
+    ],
+)
+def test_encoding_pandas_columnar(df: pd.DataFrame) -> None:
+    json_str = json.dumps(pl.to_json(df, df_encoding_version=3), allow_nan=False)
+    deserialized_df = cast(pd.DataFrame, pl.from_json(json.loads(json_str)))
+
+    # Unlike the table encoding, column labels and dtypes are preserved
+    pd.testing.assert_frame_equal(deserialized_df, df)
+    # `assert_frame_equal` doesn't compare the frequency of the index
+    assert getattr(deserialized_df.index, "freq", None) == getattr(
+        df.index, "freq", None
+    )
+
+
+def test_encoding_pandas_columnar_rejects_multiindex() -> None:
+    df = pd.DataFrame(
+        {"a": [1, 2]}, index=pd.MultiIndex.from_tuples([("x", 1), ("x", 2)])
+    )
+
+    with pytest.raises(TypeError, match="MultiIndex"):
+        pl.to_json(df, df_encoding_version=3)
+
+
+@pytest.mark.parametrize("num_rows", [10, 1000, 100_000])
+def test_encoding_pandas_columnar_large_dataframe(num_rows: int) -> None:
+    rng = np.random.default_rng(num_rows)
+    df = pd.DataFrame({
+        "value": rng.random(num_rows),
+        "count": rng.integers(0, 1000, num_rows),
+        "time": pd.Timestamp("2020-01-01")
+        + pd.to_timedelta(rng.integers(0, 10**9, num_rows), unit="s"),
+        "label": rng.choice(["a", "b", "c"], num_rows),
+    })
+    df.loc[::7, "value"] = np.nan
+
+    json_str = json.dumps(pl.to_json(df, df_encoding_version=3), allow_nan=False)
+    deserialized_df = cast(pd.DataFrame, pl.from_json(json.loads(json_str)))
+
+    pd.testing.assert_frame_equal(deserialized_df, df)
+    if num_rows >= 1000:
+        table_str = json.dumps(pl.to_json(df, df_encoding_version=2))
+        assert len(json_str) < len(table_str) / 2
+
+
 @pytest.mark.parametrize(
     "df",
     [city_dataframe(), breast_cancer_dataframe(), r_types_dataframe()],
@@ -260,6 +335,60 @@ def test_numpy_serialization(numpy_object: ArrayLike) -> None:
     np.testing.assert_array_equal(numpy_object, decoded_json_object, strict=True)
 
 
+@pytest.mark.parametrize(
+    "numpy_array",
+    [
+        np.arange(15),
+        np.array(3.5),
+        np.zeros((0, 3)),
+        np.array([True, False, True]),
+        np.ones((2, 3, 4), dtype=np.int16),
+        np.arange(5, dtype=">i4"),
+        np.arange(12.0).reshape(3, 4).T,
+        np.array([[1, 2], [3, 4]], dtype=complex),
+        np.array([np.nan, np.inf, -np.inf, -0.0]),
+    ],
+)
+def test_numpy_binary_serialization(numpy_array: np.ndarray) -> None:
+    encoded = pl.to_json(numpy_array, np_encoding_version=3)
+    assert encoded["_type"] == "binary_ndarray"
+
+    decoded = pl.from_json(json.loads(json.dumps(encoded, allow_nan=False)))
+
+    assert isinstance(decoded, np.ndarray)
+    assert decoded.flags.writeable
+    np.testing.assert_array_equal(decoded, numpy_array.astype(decoded.dtype))
+    assert decoded.dtype == numpy_array.dtype.newbyteorder("=")
+
+
+def test_numpy_binary_serialization_falls_back_for_object_arrays() -> None:
+    numpy_array = np.array(["a", "bc"])
+
+    encoded = pl.to_json(numpy_array, np_encoding_version=3)
+
+    assert encoded["_type"] == "ndarray"
+    np.testing.assert_array_equal(pl.from_json(encoded), numpy_array)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.complex128])
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_numpy_binary_serialization_large_arrays(
+    dtype: type[np.number], size: int
+) -> None:
+    rng = np.random.default_rng(size)
+    numpy_array = rng.random((size, size)).astype(dtype)
+    if np.iscomplexobj(numpy_array):
+        numpy_array += 1j * rng.random((size, size))
+
+    binary_str = json.dumps(pl.to_json(numpy_array, np_encoding_version=3))
+    decoded = pl.from_json(json.loads(binary_str))
+
+    np.testing.assert_array_equal(decoded, numpy_array, strict=True)
+    if size >= 100:
+        list_str = json.dumps(pl.to_json(numpy_array, np_encoding_version=2))
+        assert len(binary_str) < len(list_str) * 0.6
+
+
 @pytest.mark.parametrize(
     ("object_to_encode", "expected_result"),
     [(np.float64(5.0), 5.0), (np.complex128("12+3j"), complex("12+3j"))],
@@ -1402,6 +1531,20 @@ def test_add_submitted_file(question_data: pl.QuestionData) -> None:
         {"name": "test3.txt", "contents": base64_msg3},
     ]
 
+    # Test adding files by handle
+    pl.add_submitted_file(question_data, "test5.txt", handle="upload-5")
+    assert question_data["submitted_answers"]["_files"][-1] == {
+        "name": "test5.txt",
+        "handle": "upload-5",
+    }
+    with pytest.raises(ValueError, match="Invalid file handle"):
+        pl.add_submitted_file(question_data, "test6.txt", handle="../test6.txt")
+    with pytest.raises(ValueError, match="not both"):
+        pl.add_submitted_file(
+            question_data, "test7.txt", base64_msg1, handle="upload-7"
+        )
+    assert len(question_data["submitted_answers"]["_files"]) == 4
+
 
 @pytest.mark.parametrize(
     ("answers_names", "name", "should_raise"),
@@ -0,0 +1,162 @@
+import copy
+import os
+import pickle
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import lxml.html
+import prairielearn as pl
+import pytest
+from prairielearn.internal import question_phases
+from prairielearn.internal.question_phases import (
+    RenderContext,
+    freeze,
+    get_render_cache_key,
+)
+from prairielearn.question_utils import RENDER_DEPENDENCIES_ATTRIBUTE
+
+
+@pytest.fixture
+def restore_process_state() -> Iterator[None]:
+    """Undo the changes that `process` makes to the working directory and path."""
+    cwd = os.getcwd()
+    path = list(sys.path)
+    yield
+    os.chdir(cwd)
+    sys.path[:] = path
+
+
+def test_freeze_is_deeply_read_only() -> None:
+    frozen = freeze({"ext": {"controller": "ext.py", "deps": ["a.js"]}})
+
+    assert frozen["ext"]["controller"] == "ext.py"
+    assert frozen["ext"]["deps"] == ["a.js"]
+    assert isinstance(frozen, dict)
+    assert isinstance(frozen["ext"]["deps"], list)
+
+    with pytest.raises(TypeError):
+        frozen["ext"]["controller"] = "other.py"
+    with pytest.raises(TypeError):
+        frozen["new"] = {}
+    with pytest.raises(TypeError):
+        frozen["ext"]["deps"].append("b.js")
+    with pytest.raises(TypeError):
+        frozen["ext"].update({"controller": "other.py"})
+
+
+@pytest.mark.parametrize(
+    "copy_value",
+    [copy.copy, copy.deepcopy, lambda value: pickle.loads(pickle.dumps(value))],
+)
+def test_freeze_copies_are_mutable(copy_value: Any) -> None:
+    frozen = freeze({"ext": {"controller": "ext.py", "deps": ["a.js"]}})
+
+    copied = copy_value(frozen)
+
+    assert copied == frozen
+    copied["new"] = {}
+    assert "new" not in frozen
+    if copy_value is not copy.copy:
+        copied["ext"]["deps"].append("b.js")
+        assert frozen["ext"]["deps"] == ["a.js"]
+
+
+@pytest.mark.usefixtures("restore_process_state")
+def test_process_elements_can_copy_extensions() -> None:
+    # pl-order-blocks deep-copies `data` (including its extensions) in `prepare`.
+    html = """
+    <pl-order-blocks answers-name="order">
+      <pl-answer correct="true">first</pl-answer>
+      <pl-answer correct="true">second</pl-answer>
+    </pl-order-blocks>
+    """
+    context: RenderContext = {
+        "html": html,
+        "elements": {
+            "pl-order-blocks": {
+                "name": "pl-order-blocks",
+                "controller": "pl-order-blocks.py",
+                "type": "core",
+            }
+        },
+        "element_extensions": {"pl-order-blocks": {"ext": {"deps": ["a.js"]}}},
+        "course_path": "/course",
+    }
+    data: dict[str, Any] = {
+        "params": {},
+        "correct_answers": {},
+        "variant_seed": 1,
+        "options": {},
+        "preferences": {},
+        "answers_names": {},
+    }
+
+    question_phases.process("prepare", data, context)
+
+    assert [block["inner_html"] for block in data["correct_answers"]["order"]] == [
+        "first",
+        "second",
+    ]
+    assert "extensions" not in data
+
+
+def test_render_depends_on() -> None:
+    @pl.render_depends_on("params")
+    def render(element_html: str, _data: pl.QuestionData) -> str:
+        return element_html
+
+    assert getattr(render, RENDER_DEPENDENCIES_ATTRIBUTE) == ("params",)
+
+
+def test_get_render_cache_key() -> None:
+    path = Path("pl-test.py")
+    html = b"<pl-test></pl-test>"
+    element = lxml.html.fragment_fromstring(html)
+    data: dict[str, Any] = {
+        "panel": "question",
+        "params": {"x": 1},
+        "correct_answers": {"y": 2},
+    }
+
+    key = get_render_cache_key(path, element, html, data, ["params"])
+
+    # Changes to data that the element doesn't depend on don't affect the key.
+    data["correct_answers"]["y"] = 3
+    assert get_render_cache_key(path, element, html, data, ["params"]) == key
+
+    data["params"]["x"] = 2
+    assert get_render_cache_key(path, element, html, data, ["params"]) != key
+
+    data["panel"] = "answer"
+    assert get_render_cache_key(path, element, html, data, []) != (
+        get_render_cache_key(path, element, html, {"panel": "question"}, [])
+    )
+
+
+def test_get_render_cache_key_attribute_dependency() -> None:
+    path = Path("pl-test.py")
+    html = b'<pl-test params-name="x"></pl-test>'
+    element = lxml.html.fragment_fromstring(html)
+    data: dict[str, Any] = {"panel": "question", "params": {"x": 1, "y": 2}}
+    dependencies = [("params", "params-name")]
+
+    key = get_render_cache_key(path, element, html, data, dependencies)
+    assert key is not None
+    assert key[2] == '["question", 1]'
+
+    # Only the entry named by the attribute is part of the key.
+    data["params"]["y"] = 3
+    assert get_render_cache_key(path, element, html, data, dependencies) == key
+
+    data["params"]["x"] = 2
+    assert get_render_cache_key(path, element, html, data, dependencies) != key
+
+
+def test_get_render_cache_key_unserializable() -> None:
+    element = lxml.html.fragment_fromstring("<pl-test></pl-test>")
+    data = {"panel": "question", "params": {"x": object()}}
+    assert (
+        get_render_cache_key(Path("pl-test.py"), element, b"", data, ["params"]) is None
+    )
@@ -56,6 +56,86 @@ def test_evaluate() -> None:
         psu.evaluate("eval('dict')", locals_for_eval=locals_for_eval)
 
 
+def test_convert_string_to_sympy_caches_parsed_expressions() -> None:
+    psu._parse_expression_cached.cache_clear()
+
+    first = psu.convert_string_to_sympy_with_source(
+        "x**2 + y", ["x", "y"], assumptions={"x": {"positive": True}}
+    )
+    second = psu.convert_string_to_sympy_with_source(
+        "x**2 + y", ["x", "y"], assumptions={"x": {"positive": True}}
+    )
+    assert first is second
+    assert psu._parse_expression_cached.cache_info().hits == 1
+
+    # Different assumptions must not reuse the cached expression.
+    other = psu.convert_string_to_sympy_with_source(
+        "x**2 + y", ["x", "y"], assumptions={"x": {"positive": False}}
+    )
+    assert other[0] != first[0]
+
+    # Invalid input still raises on every call.
+    for _ in range(2):
+        with pytest.raises(psu.HasInvalidSymbolError):
+            psu.convert_string_to_sympy("x + z", ["x"])
+
+
+def _nested_trig(depth: int) -> sympy.Expr:
+    x = sympy.Symbol("x")
+    expr = x
+    for i in range(depth):
+        expr = sympy.sin(expr + sympy.cos(x * i))
+    return expr
+
+
+def _shared_subtrees(size: int) -> sympy.Expr:
+    x, y = sympy.symbols("x y")
+    shared = sympy.sin(sympy.cos(x) + sympy.tan(y))
+    return sympy.Add(
+        *(sympy.Pow(shared, i, evaluate=False) for i in range(1, size)),
+        evaluate=False,
+    )
+
+
+def _long_polynomial(size: int) -> sympy.Expr:
+    x, y = sympy.symbols("x y")
+    return sympy.Add(
+        *(sympy.Mul(i, x**i, y ** (i % 5), evaluate=False) for i in range(1, size)),
+        evaluate=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        _long_polynomial(300),
+        sympy.expand((sympy.Symbol("x") + sympy.Symbol("y")) ** 40),
+        _nested_trig(60),
+        _shared_subtrees(200),
+    ],
+)
+def test_sympy_check_large_expressions(expr: sympy.Expr) -> None:
+    x, y = sympy.symbols("x y")
+    locals_for_eval: psu.LocalsForEval = {
+        "functions": {},
+        "variables": {"x": x, "y": y},
+        "helpers": {},
+    }
+    psu.sympy_check(expr, locals_for_eval, allow_complex=False, allow_sets=False)
+
+    with pytest.raises(psu.HasInvalidSymbolError):
+        psu.sympy_check(
+            expr,
+            {**locals_for_eval, "variables": {"y": y}},
+            allow_complex=False,
+            allow_sets=False,
+        )
+    with pytest.raises(psu.HasComplexError):
+        psu.sympy_check(
+            expr + sympy.I * x, locals_for_eval, allow_complex=False, allow_sets=False
+        )
+
+
 class TestSympy:
     SYMBOL_NAMES = ("n", "m", "alpha", "\u03bc0")
     M, N, ALPHA, MU0 = sympy.symbols("m n alpha mu0")
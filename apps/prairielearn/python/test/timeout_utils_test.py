@@ -1,10 +1,16 @@
+import importlib
+import os
+import select
 import signal
 import threading
 import time
+from collections.abc import Iterator
+from pathlib import Path
 from types import FrameType
 
 import pytest
 from prairielearn.timeout_utils import (
+    ProcessTimeoutPool,
     SignalTimeout,
     TimeoutExceptionError,
     TimeoutState,
@@ -111,3 +117,120 @@ def test_timeout_requires_main_thread():
     assert len(result) == 1
     assert isinstance(result[0], RuntimeError)
     assert "SignalTimeout requires the main thread." in str(result[0])
+
+
+def uninterruptible_sleep(duration: float) -> int:
+    """Sleep with SIGALRM blocked, like a call stuck in C code."""
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    time.sleep(duration)
+    return os.getpid()
+
+
+def raise_value_error(message: str) -> None:
+    raise ValueError(message)
+
+
+@pytest.fixture
+def pool() -> Iterator[ProcessTimeoutPool]:
+    pool = ProcessTimeoutPool()
+    yield pool
+    pool.close()
+
+
+def test_process_pool_returns_result(pool: ProcessTimeoutPool):
+    assert pool.run(pow, 2, 10, timeout=5.0) == 1024
+    assert pool.run(os.getpid, timeout=5.0) != os.getpid()
+
+
+def test_process_pool_reraises_exceptions(pool: ProcessTimeoutPool):
+    with pytest.raises(ValueError, match="bad input"):
+        pool.run(raise_value_error, "bad input", timeout=5.0)
+    # The helper is still usable afterwards
+    assert pool.run(pow, 2, 3, timeout=5.0) == 8
+
+
+def test_process_pool_kills_stuck_calls(pool: ProcessTimeoutPool):
+    start = time.monotonic()
+    with pytest.raises(TimeoutExceptionError):
+        pool.run(uninterruptible_sleep, 10.0, timeout=0.2)
+    assert time.monotonic() - start < 5.0
+
+    # A fresh helper replaces the one that was killed
+    assert pool.run(uninterruptible_sleep, 0.0, timeout=5.0) != os.getpid()
+
+
+def test_process_pool_interrupted_by_signal_timeout(pool: ProcessTimeoutPool):
+    with SignalTimeout(0.2) as ctx:
+        pool.run(uninterruptible_sleep, 10.0, timeout=10.0)
+    assert ctx.state == TimeoutState.TIMED_OUT
+
+    assert pool.run(pow, 3, 2, timeout=5.0) == 9
+
+
+def test_process_pool_timeout_marks_signal_timeout_timed_out(
+    pool: ProcessTimeoutPool,
+):
+    with SignalTimeout(10.0) as ctx:
+        pool.run(uninterruptible_sleep, 10.0, timeout=0.2)
+    assert ctx.state == TimeoutState.TIMED_OUT
+
+
+def test_process_pool_caches_results(pool: ProcessTimeoutPool):
+    first = pool.run(os.getpid, timeout=5.0, cache_key="pid")
+    pool.close()
+    assert pool.run(os.getpid, timeout=5.0, cache_key="pid") == first
+    assert pool.run(os.getpid, timeout=5.0) != first
+
+
+def test_process_pool_does_not_cache_timeouts(pool: ProcessTimeoutPool):
+    with pytest.raises(TimeoutExceptionError):
+        pool.run(uninterruptible_sleep, 10.0, timeout=0.2, cache_key="sleep")
+    # A call that timed out under load may finish when retried
+    pid = pool.run(uninterruptible_sleep, 0.0, timeout=5.0, cache_key="sleep")
+    assert pool.run(uninterruptible_sleep, 10.0, timeout=0.2, cache_key="sleep") == pid
+
+
+def test_process_pool_uses_callers_path_and_cwd(
+    pool: ProcessTimeoutPool, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    # The helpers were forked before this module could be imported
+    (tmp_path / "late_module.py").write_text("def double(x):\n    return 2 * x\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    late_module = importlib.import_module("late_module")
+
+    assert pool.run(late_module.double, 21, timeout=5.0) == 42
+    assert pool.run(os.getcwd, timeout=5.0) == str(tmp_path)
+
+
+def test_process_pool_works_off_main_thread(pool: ProcessTimeoutPool):
+    result: list[BaseException] = []
+
+    def run_stuck_call():
+        try:
+            pool.run(uninterruptible_sleep, 10.0, timeout=0.2)
+        except BaseException as exc:
+            result.append(exc)
+
+    thread = threading.Thread(target=run_stuck_call)
+    thread.start()
+    thread.join()
+
+    assert len(result) == 1
+    assert isinstance(result[0], TimeoutExceptionError)
+
+
+def test_process_pool_helpers_exit_with_owner():
+    # The helpers inherit the write end, so reading sees EOF once they exit
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ProcessTimeoutPool(size=2)
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+
+    ready, _, _ = select.select([read_fd], [], [], 5.0)
+    assert ready
+    assert os.read(read_fd, 1) == b""
+    os.close(read_fd)
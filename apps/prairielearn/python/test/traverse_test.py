@@ -428,3 +428,33 @@ def test_traverse_and_replace_empty_multiple_levels() -> None:
         replace,
     )
     assert html == "<table><tbody><tr><td></td></tr></tbody>\n</table>"
+
+
+def test_traverse_and_replace_splices_without_reparse() -> None:
+    def replace(e: lxml.html.HtmlElement) -> ElementReplacement:
+        if e.tag == "pl-thing":
+            return "<div class='a'>one &amp; two</div>"
+        return e
+
+    html = traverse_and_replace(
+        "<p><pl-thing></pl-thing> after</p>",
+        replace,
+        needs_reparse=lambda s: "<pl-" in s,
+    )
+    assert html == "<p><div class='a'>one &amp; two</div> after</p>"
+
+
+def test_traverse_and_replace_reparses_when_needed() -> None:
+    def replace(e: lxml.html.HtmlElement) -> ElementReplacement:
+        if e.tag == "pl-outer":
+            return "<div><pl-inner></pl-inner></div>"
+        if e.tag == "pl-inner":
+            return "<span>inner</span>"
+        return e
+
+    html = traverse_and_replace(
+        "<pl-outer></pl-outer>",
+        replace,
+        needs_reparse=lambda s: "<pl-" in s,
+    )
+    assert html == "<div><span>inner</span></div>"
@@ -0,0 +1,255 @@
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any
+
+import psutil
+import pytest
+
+ZYGOTE_PATH = Path(__file__).parent.parent / "zygote.py"
+
+SERVER_PY = """\
+import random
+
+import helper
+
+
+def generate(data):
+    data["params"]["value"] = random.random()
+    data["params"]["helper"] = helper.NAME
+"""
+
+# Reports the worker and the value of `np.pi` that it sees, and then changes
+# `np.pi` for any question that runs after it in the same worker.
+PATCHING_SERVER_PY = """\
+import os
+
+import numpy as np
+
+
+def generate(data):
+    data["params"]["pid"] = os.getpid()
+    data["params"]["pi"] = np.pi
+    np.pi = 3
+"""
+
+
+class Zygote:
+    def __init__(self, *, warm_worker: bool = False) -> None:
+        out_read, out_write = os.pipe()
+        exit_read, exit_write = os.pipe()
+        env = "WARM_WORKER=1 " if warm_worker else ""
+        self.process = subprocess.Popen(
+            f"{env}exec {sys.executable} {ZYGOTE_PATH} 3>&{out_write} 4>&{exit_write}",
+            shell=True,
+            executable="/bin/bash",
+            stdin=subprocess.PIPE,
+            pass_fds=(out_write, exit_write),
+            cwd=ZYGOTE_PATH.parent,
+            text=True,
+        )
+        os.close(out_write)
+        os.close(exit_write)
+        self.outf: IO[str] = os.fdopen(out_read, encoding="utf-8")
+        self.exitf: IO[str] = os.fdopen(exit_read, encoding="utf-8")
+
+    def call(self, message: dict[str, Any]) -> Any:
+        assert self.process.stdin is not None
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+        return json.loads(self.outf.readline())
+
+    def restart(self) -> None:
+        assert self.call({"fcn": "restart"}) == {"present": True, "val": "success"}
+        assert json.loads(self.exitf.readline()) == {"exited": True}
+
+    def worker_pid(self) -> int:
+        # Only a worker answers pings, so this waits for it to be forked.
+        assert self.call({"fcn": "ping"}) == {"present": True, "val": "pong"}
+        (worker,) = psutil.Process(self.process.pid).children()
+        return worker.pid
+
+    def close(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+        self.outf.close()
+        self.exitf.close()
+
+
+@pytest.fixture(scope="module")
+def zygote() -> Iterator[Zygote]:
+    zygote = Zygote()
+    yield zygote
+    zygote.close()
+
+
+def make_question(path: Path, name: str) -> str:
+    path.mkdir()
+    (path / "server.py").write_text(SERVER_PY)
+    (path / "helper.py").write_text(f"NAME = {name!r}\n")
+    return str(path)
+
+
+def make_patching_question(path: Path) -> str:
+    path.mkdir()
+    (path / "server.py").write_text(PATCHING_SERVER_PY)
+    return str(path)
+
+
+def generate_call(cwd: str, variant_seed: int) -> dict[str, Any]:
+    return {
+        "file": "server",
+        "fcn": "generate",
+        "args": [{"params": {}, "variant_seed": variant_seed}],
+        "cwd": cwd,
+        "paths": [],
+    }
+
+
+def expected_value(variant_seed: int) -> float:
+    random.seed(variant_seed)
+    return random.random()
+
+
+def test_batch_isolates_questions_and_variants(zygote: Zygote, tmp_path: Path) -> None:
+    first = make_question(tmp_path / "first", "first")
+    second = make_question(tmp_path / "second", "second")
+
+    response = zygote.call({
+        "batch": [
+            generate_call(first, 1),
+            generate_call(second, 2),
+            generate_call(second, 3),
+        ]
+    })
+
+    assert response["present"]
+    params = [result["val"]["params"] for result in response["val"]]
+    assert params == [
+        {"value": expected_value(1), "helper": "first"},
+        {"value": expected_value(2), "helper": "second"},
+        {"value": expected_value(3), "helper": "second"},
+    ]
+
+    zygote.call({"fcn": "restart"})
+    assert json.loads(zygote.exitf.readline()) == {"exited": True}
+
+
+def test_question_html_reports_code_cache_stats(zygote: Zygote, tmp_path: Path) -> None:
+    context = {
+        "html": '<pl-integer-input answers-name="x"></pl-integer-input>',
+        "elements": {
+            "pl-integer-input": {
+                "name": "pl-integer-input",
+                "controller": "pl-integer-input.py",
+                "type": "core",
+            }
+        },
+        "element_extensions": {},
+        "course_path": str(tmp_path),
+    }
+    data = {"params": {}, "correct_answers": {}, "answers_names": {}, "options": {}}
+
+    response = zygote.call({
+        "file": "question.html",
+        "fcn": "prepare",
+        "args": [context, data],
+        "cwd": str(tmp_path),
+        "paths": [],
+    })
+
+    assert response["present"]
+    # Core element controllers are compiled before the worker is forked.
+    stats = response["val"]["code_cache"]
+    assert stats == {"hits": 1, "misses": 0, "compile_seconds": 0}
+
+    zygote.restart()
+
+
+def test_batch_reports_invalid_calls(zygote: Zygote, tmp_path: Path) -> None:
+    question = make_question(tmp_path / "question", "question")
+    invalid_call = generate_call(question, 1)
+    del invalid_call["cwd"]
+
+    response = zygote.call({"batch": [invalid_call, generate_call(question, 1)]})
+
+    assert response["present"]
+    invalid_result, result = response["val"]
+    assert not invalid_result["present"]
+    assert invalid_result["error"].startswith("TypeError")
+    assert result["val"]["params"] == {"value": expected_value(1), "helper": "question"}
+
+    zygote.call({"fcn": "restart"})
+    assert json.loads(zygote.exitf.readline()) == {"exited": True}
+
+
+def test_batch_restores_module_globals(zygote: Zygote, tmp_path: Path) -> None:
+    first = make_patching_question(tmp_path / "first")
+    second = make_patching_question(tmp_path / "second")
+
+    response = zygote.call({
+        "batch": [generate_call(first, 1), generate_call(second, 1)]
+    })
+
+    assert response["present"]
+    first_params, second_params = (
+        result["val"]["params"] for result in response["val"]
+    )
+    assert first_params["pid"] == second_params["pid"]
+    assert first_params["pi"] == second_params["pi"] == math.pi
+
+    zygote.restart()
+
+
+def test_warm_worker_isolates_questions(tmp_path: Path) -> None:
+    first = make_patching_question(tmp_path / "first")
+    second = make_question(tmp_path / "second", "second")
+    third = make_patching_question(tmp_path / "third")
+
+    zygote = Zygote(warm_worker=True)
+    try:
+        # A worker that has only run core element code confirms the restart
+        # itself and is reused.
+        worker_pid = zygote.worker_pid()
+        context = {
+            "html": "<p>Hello</p>",
+            "elements": {},
+            "element_extensions": {},
+            "course_path": str(tmp_path),
+        }
+        data = {"params": {}, "variant_seed": 1, "options": {}}
+        response = zygote.call({
+            "file": "question.html",
+            "fcn": "render",
+            "args": [context, data],
+            "cwd": first,
+            "paths": [],
+        })
+        assert response["val"]["html"] == "<p>Hello</p>"
+        zygote.restart()
+        assert zygote.worker_pid() == worker_pid
+
+        # Once a worker has run course code, it's replaced on restart.
+        response = zygote.call(generate_call(first, 1))
+        assert response["val"]["params"]["pid"] == worker_pid
+        assert response["val"]["params"]["pi"] == math.pi
+        zygote.restart()
+        assert zygote.worker_pid() != worker_pid
+
+        response = zygote.call(generate_call(second, 2))
+        assert response["val"]["params"] == {
+            "value": expected_value(2),
+            "helper": "second",
+        }
+        zygote.restart()
+
+        response = zygote.call(generate_call(third, 3))
+        assert response["val"]["params"]["pi"] == math.pi
+        zygote.restart()
+    finally:
+        zygote.close()
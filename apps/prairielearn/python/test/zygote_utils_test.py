@@ -1,6 +1,12 @@
 import json
+import os
+import random
+import sys
+import types
+from pathlib import Path
 from typing import Any
 
+import numpy as np
 import prairielearn.internal.zygote_utils as zu
 import pytest
 
@@ -56,3 +62,139 @@ def test_all_integers_within_limits_no_exception(item: Any) -> None:
 def test_all_integers_within_limits_raise_exception(item: Any) -> None:
     with pytest.raises(ValueError, match="oversized integer"):
         zu.assert_all_integers_within_limits(item)
+
+
+def test_restore_worker_checkpoint(tmp_path: Path) -> None:
+    original_cwd = os.getcwd()
+    original_path = list(sys.path)
+
+    module = types.ModuleType("_zygote_utils_test_package")
+    module.value = 1  # pyright: ignore[reportAttributeAccessIssue]
+    sys.modules[module.__name__] = module
+
+    random.seed(1)
+    np.random.seed(1)
+    checkpoint = zu.capture_worker_checkpoint(zu.capture_module_globals())
+    expected_random = random.random()
+    expected_np_random = np.random.random()
+
+    try:
+        random.seed(2)
+        np.random.seed(2)
+        os.chdir(tmp_path)
+        sys.path.insert(0, str(tmp_path))
+        sys.modules["_zygote_utils_test_module"] = types.ModuleType("dummy")
+        submodule = types.ModuleType("_zygote_utils_test_package.submodule")
+        sys.modules[submodule.__name__] = submodule
+        module.value = 2  # pyright: ignore[reportAttributeAccessIssue]
+        module.added = 3  # pyright: ignore[reportAttributeAccessIssue]
+        module.submodule = submodule  # pyright: ignore[reportAttributeAccessIssue]
+
+        zu.restore_worker_checkpoint(checkpoint)
+
+        assert os.getcwd() == original_cwd
+        assert sys.path == original_path
+        assert "_zygote_utils_test_module" not in sys.modules
+        assert submodule.__name__ not in sys.modules
+        assert (
+            vars(module).keys() == checkpoint.module_globals[module.__name__][1].keys()
+        )
+        assert module.value == 1
+        assert random.random() == expected_random
+        assert np.random.random() == expected_np_random
+    finally:
+        os.chdir(original_cwd)
+        sys.path[:] = original_path
+        sys.modules.pop("_zygote_utils_test_module", None)
+        sys.modules.pop("_zygote_utils_test_package.submodule", None)
+        sys.modules.pop(module.__name__, None)
+
+
+@pytest.mark.parametrize(
+    ("file", "cwd", "args", "expected"),
+    [
+        (None, None, None, True),
+        ("pl-number-input", str(zu.CORE_ELEMENTS_PATH / "pl-number-input"), [], True),
+        ("server", "/course/questions/addNumbers", [], False),
+        ("pl-custom", "/course/elements/pl-custom", [], False),
+        ("question.js", "/course/questions/v2", [], False),
+        (
+            "question.html",
+            "/course/questions/addNumbers",
+            [{"elements": {"pl-number-input": {"type": "core"}}}, {}],
+            True,
+        ),
+        (
+            "question.html",
+            "/course/questions/addNumbers",
+            [{"elements": {"pl-custom": {"type": "course"}}}, {}],
+            False,
+        ),
+        (
+            "question.html",
+            "/course/questions/addNumbers",
+            [
+                {
+                    "elements": {"pl-drawing": {"type": "core"}},
+                    "element_extensions": {"pl-drawing": {"ext": {}}},
+                },
+                {},
+            ],
+            False,
+        ),
+        (
+            "question.html",
+            "/course/questions/addNumbers",
+            [
+                {
+                    "elements": {"pl-drawing": {"type": "core"}},
+                    "element_extensions": {"pl-drawing": {}},
+                },
+                {},
+            ],
+            True,
+        ),
+        (
+            "pl-drawing",
+            str(zu.CORE_ELEMENTS_PATH / "pl-drawing"),
+            ["<pl-drawing></pl-drawing>", {"extensions": {"ext": {}}}],
+            False,
+        ),
+    ],
+)
+def test_is_trusted_call(
+    file: str | None, cwd: str | None, args: Any, *, expected: bool
+) -> None:
+    assert zu.is_trusted_call(file, cwd, args) is expected
+
+
+def test_load_preload_manifest(tmp_path: Path) -> None:
+    assert zu.load_preload_manifest(None) == zu.DEFAULT_PRELOAD_MANIFEST
+
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps([{"module": "prairielearn.sympy_utils"}]))
+    assert zu.load_preload_manifest(str(manifest_path)) == [
+        {"module": "prairielearn.sympy_utils"}
+    ]
+
+    manifest_path.write_text(json.dumps({"module": "prairielearn.sympy_utils"}))
+    with pytest.raises(ValueError, match="Invalid preload manifest"):
+        zu.load_preload_manifest(str(manifest_path))
+
+    # Top-level modules could shadow modules in course code.
+    manifest_path.write_text(json.dumps([{"module": "dag_checker"}]))
+    with pytest.raises(ValueError, match="Invalid preload manifest"):
+        zu.load_preload_manifest(str(manifest_path))
+
+
+def test_default_preload_manifest() -> None:
+    assert all(
+        zu.is_preloadable_module(entry["module"])
+        for entry in zu.DEFAULT_PRELOAD_MANIFEST
+    )
+
+
+def test_preload_modules() -> None:
+    zu.preload_modules([{"module": "prairielearn.sympy_utils"}])
+
+    assert "prairielearn.sympy_utils" in sys.modules
@@ -18,6 +18,7 @@
 
 import base64
 import copy
+import dataclasses
 import io
 import json
 import os
@@ -25,6 +26,7 @@ import signal
 import subprocess
 import sys
 import time
+import traceback
 import types
 import warnings
 from collections.abc import Iterable, Sequence
@@ -33,11 +35,32 @@ from inspect import signature
 from typing import Any
 
 import prairielearn.internal.zygote_utils as zu
+from prairielearn.internal import code_cache
+from prairielearn.timeout_utils import close_process_timeout_pool
 
 saved_path = copy.copy(sys.path)
 
 drop_privileges = int(os.environ.get("DROP_PRIVILEGES", "0")) == 1
 
+# If enabled, a worker that has only executed core element code will not exit
+# when asked to restart. Instead, it restores a checkpoint of its interpreter
+# state and confirms the restart itself, which avoids the cost of forking a
+# new worker (and, when dropping privileges, of sweeping for leftover
+# processes). As soon as a worker receives a call that may execute course
+# code, it gives up the ability to confirm restarts and behaves exactly like
+# a normal worker, because the checkpoint can't undo every change that course
+# code can make (see `zu.WorkerCheckpoint`).
+warm_worker = int(os.environ.get("WARM_WORKER", "0")) == 1
+
+# A JSON file listing the `prairielearn` modules that should be imported
+# before forking. If unset, `zu.DEFAULT_PRELOAD_MANIFEST` is used.
+preload_manifest_path = os.environ.get("PRELOAD_MANIFEST")
+
+# If enabled, all objects that exist after preloading are moved into the
+# permanent generation of the garbage collector. This keeps the collector from
+# touching (and thus un-sharing) the memory pages that forked workers inherit.
+gc_freeze = int(os.environ.get("GC_FREEZE", "0")) == 1
+
 # If we're configured to drop privileges (that is, if we're running in a
 # Docker container), various tools like matplotlib and fontconfig will be
 # unable to write to their default config/cache directories. This is because
@@ -123,6 +146,26 @@ mpl.use("PDF")
 # Construct initial unit registry to create initial cache file.
 prairielearn.get_unit_registry()
 
+# Compile all core element controllers up front so that forked workers inherit
+# the compiled code objects instead of each compiling them on first use.
+code_cache.prewarm_elements(zu.CORE_ELEMENTS_PATH)
+
+# Import the `prairielearn` modules (and their dependencies, like SymPy) that
+# core elements use, so that workers start with them already resident instead
+# of importing them on first use.
+zu.preload_modules(zu.load_preload_manifest(preload_manifest_path))
+
+# The globals of every preloaded module, which a worker restores when it resets
+# to its checkpoint. Copying them here means that workers share the copies
+# instead of each making their own.
+preloaded_module_globals = zu.capture_module_globals()
+
+if gc_freeze:
+    import gc
+
+    gc.collect()
+    gc.freeze()
+
 
 # We want to conditionally allow/block importing specific modules.
 # This custom importer will allow us to do so, and throw a custom error message.
@@ -187,7 +230,7 @@ def try_dumps(obj: Any, *, sort_keys: bool = False, allow_nan: bool = False) ->
         raise
 
 
-def worker_loop() -> None:
+def worker_loop(warm_exitf: io.TextIOWrapper | None = None) -> None:
     from prairielearn.internal.traceback import make_rich_excepthook
 
     sys.excepthook = make_rich_excepthook(
@@ -209,6 +252,7 @@ def worker_loop() -> None:
     # Because it makes use of threading, we only import it after forking to
     # avoid warnings about inheriting threads from the parent process.
     from prairielearn.internal import question_phases
+    from prairielearn.internal.check_data import all_phases
 
     # Whether the PRNGs have already been seeded in this worker_loop() call
     seeded = False
@@ -223,6 +267,224 @@ def worker_loop() -> None:
     #   specifically for elements that want to maintain a cache of expensive-to-compute data.
     mod_cache: dict[str, dict[str, Any]] = {}
 
+    # The state that a warm worker returns to when it's asked to restart.
+    checkpoint = zu.capture_worker_checkpoint(preloaded_module_globals)
+
+    def reset_worker() -> None:
+        # Returns the worker to the state it had when it was forked.
+        nonlocal seeded
+
+        zu.restore_worker_checkpoint(checkpoint)
+        mod_cache.clear()
+        seeded = False
+
+    def execute_call(file: str, fcn: str, args: Any, cwd: str, paths: list[str]) -> str:
+        # Executes a single call and returns its JSON-encoded result.
+        nonlocal seeded
+
+        if file.endswith(".js"):
+            # We've shoehorned legacy v2 questions into the v3 code caller
+            # so that we can reuse the same worker processes, and specifically
+            # so that we can reuse the container pool.
+            #
+            # Node doesn't support POSIX-style forks, so we can't use a zygote
+            # process like we do with Python. Instead, we'll exec a Node subprocess.
+            # Node generally boots up very quickly, so this should be fine.
+            result = subprocess.run(
+                [
+                    "node",
+                    "./apps/prairielearn/dist/question-servers/calculation-worker.js",
+                ],
+                cwd=cwd,
+                capture_output=True,
+                # By convention, the first argument is an object that contains all
+                # the call information.
+                input=json.dumps(args[0]),
+                encoding="utf-8",
+                check=False,
+            )
+
+            # Proxy any output from the subprocess back to the caller.
+            # Note that we only deal with stderr, as the Node process rewrote
+            # the output streams so that writes to stdout actually go to stderr.
+            # This allows us to use stdout for the actual return value.
+            if result.stderr:
+                print(result.stderr, file=sys.stderr)
+                sys.stderr.flush()
+
+            # If the subprocess exited with a non-zero exit code, raise an exception.
+            result.check_returncode()
+
+            return result.stdout
+
+        # Here, we re-seed the PRNGs if not already seeded in this worker_loop() call.
+        # We only want to seed the PRNGs once per worker_loop() call, so that if a
+        # question happens to contain multiple occurrences of the same element, the
+        # randomizations for each occurrence are independent of each other but still
+        # dependent on the variant seed.
+        if type(args[-1]) is dict and not seeded:
+            variant_seed = args[-1].get("variant_seed", None)
+            random.seed(variant_seed)
+            np.random.seed(variant_seed)
+            sys.meta_path.insert(0, FakerInitializeMetaPathFinder(variant_seed))
+            seeded = True
+
+        # reset and then set up the path
+        sys.path = copy.copy(saved_path)
+        for path in reversed(paths):
+            sys.path.insert(0, path)
+        sys.path.insert(0, cwd)
+
+        # change to the desired working directory
+        os.chdir(cwd)
+
+        if file == "question.html":
+            # This is an experimental implementation of question processing
+            # that does all HTML parsing and rendering in Python. This should
+            # be much faster than the current implementation that does an IPC
+            # call for each element.
+
+            context = args[0]
+            data = args[1]
+
+            if fcn not in all_phases:
+                raise ValueError(f'Invalid question phase "{fcn}"')
+
+            code_cache_start = copy.copy(code_cache.stats)
+            result, processed_elements, render_cache_stats = question_phases.process(
+                fcn, data, context
+            )
+            code_cache_stats = code_cache.stats_since(code_cache_start)
+            val = {
+                "html": result if fcn == "render" else None,
+                "file": result if fcn == "file" else None,
+                "data": data,
+                "processed_elements": list(processed_elements),
+                "render_cache": render_cache_stats,
+                "code_cache": dataclasses.asdict(code_cache_stats),
+            }
+
+            return try_dumps({"present": True, "val": val})
+
+        file_path = os.path.join(cwd, file + ".py")
+
+        mod = mod_cache.get(file_path)
+        if mod is None:
+            mod = {"__file__": file_path}
+            exec(code_cache.get_code(file_path), mod)
+            mod_cache[file_path] = mod
+
+        # try to load and execute the desired function
+        method = zu.get_module_function(mod, fcn)
+        if method is None:
+            # the function wasn't present, so report this
+            return try_dumps({"present": False}, allow_nan=False)
+
+        # check if the desired function is a legacy element function - if
+        # so, we add an argument for element_index
+        arg_names = list(signature(method).parameters.keys())
+        if arg_names == ["element_html", "element_index", "data"]:
+            args.insert(1, None)
+
+        # call the desired function in the loaded module
+        val = method(*args)
+
+        if fcn == "file":
+            # if val is None, replace it with empty string
+            if val is None:
+                val = ""
+            # if val is a file-like object, read whatever is inside
+            if isinstance(val, io.IOBase):
+                val.seek(0)
+                val = val.read()
+            # if val is a string, treat it as utf-8
+            if isinstance(val, str):
+                val = bytes(val, "utf-8")
+            # if this next call does not work, it will throw an error, because
+            # the thing returned by file() does not have the correct format
+            val = base64.b64encode(val).decode()
+
+        # Any function that is not 'file' or 'render' will modify 'data' and
+        # should not be returning anything (because 'data' is mutable).
+        if fcn in ("file", "render"):
+            return try_dumps({"present": True, "val": val}, allow_nan=False)
+
+        if val is None or val is args[-1]:
+            return try_dumps({"present": True, "val": args[-1]}, allow_nan=False)
+
+        json_outp = try_dumps({"present": True, "val": val}, allow_nan=False)
+
+        # We'll only actually complain if the function returned
+        # a completely different object than the one passed in.
+        # Otherwise, we'll just silently ignore the return value
+        # and use the passed-in object (which should in fact be
+        # the same object).
+        #
+        # TODO: Once this has been running in production for a while,
+        # change this to raise an exception.
+        sys.stderr.write(
+            f"Function {fcn}() in {file + '.py'} returned a data object other than the one that was passed in.\n\n"
+            + "There is no need to return a value, as the data object is mutable and can be modified in place.\n\n"
+            + "For now, the return value will be used instead of the data object that was passed in.\n\n"
+            + "In the future, returning a different object will trigger a fatal error."
+        )
+        return json_outp
+
+    def execute_batch(calls: list[dict[str, Any]]) -> str:
+        # Executes each call in a batch in order and returns a JSON-encoded list
+        # of their results. An exception raised by one call is reported in that
+        # call's result and does not prevent the remaining calls from running.
+        nonlocal warm_exitf
+
+        results: list[str] = []
+        previous_key: tuple[Any, Any] | None = None
+        for call in calls:
+            file = call.get("file", None)
+            fcn = call.get("fcn", None)
+            args = call.get("args", None)
+            cwd = call.get("cwd", None)
+            paths = call.get("paths", None)
+
+            if warm_exitf is not None and not zu.is_trusted_call(file, cwd, args):
+                warm_exitf.close()
+                warm_exitf = None
+
+            # Calls for the same question and variant share the worker state,
+            # just like consecutive calls outside of a batch. A call for another
+            # question or variant starts from the state of a freshly-forked
+            # worker, so that it is seeded with its own variant seed and does
+            # not see modules imported or module globals rebound by a different
+            # question. See `zu.WorkerCheckpoint` for what a reset can't undo.
+            data = args[-1] if isinstance(args, list) and args else None
+            key = (cwd, data.get("variant_seed") if isinstance(data, dict) else None)
+            if previous_key is not None and key != previous_key:
+                reset_worker()
+            previous_key = key
+
+            try:
+                if file is None:
+                    raise ValueError(f'Function "{fcn}" is not allowed in a batch')
+                if (
+                    not isinstance(file, str)
+                    or not isinstance(fcn, str)
+                    or not isinstance(cwd, str)
+                    or not isinstance(paths, list)
+                ):
+                    raise TypeError(
+                        'Each call in a batch must have a "file", "fcn", "cwd", and "paths"'
+                    )
+                results.append(execute_call(file, fcn, args, cwd, paths).strip())
+            except Exception as exc:
+                traceback.print_exc()
+                results.append(
+                    try_dumps({
+                        "present": False,
+                        "error": f"{type(exc).__name__}: {exc}",
+                    })
+                )
+
+        return '{"present": true, "val": [' + ", ".join(results) + "]}"
+
     # file descriptor 3 is for output data
     with open(3, "w", encoding="utf-8") as outf:
         # Infinite loop where we wait for an input command, do it, and
@@ -254,12 +516,38 @@ def worker_loop() -> None:
             cwd = inp.get("cwd", None)
             paths = inp.get("paths", None)
             forbidden_modules = inp.get("forbidden_modules", None)
+            batch = inp.get("batch", None)
+
+            # Submitted files are inlined as base64 in the input (often more than
+            # once, e.g. in both `submitted_answers` and `raw_submitted_answers`),
+            # so the raw line can be large. Release it as soon as it is decoded
+            # instead of holding it for the whole call.
+            del json_inp, inp
 
             # Wire up the custom importer to forbid modules as needed.
             path_finder.reset_forbidden_modules()
             if forbidden_modules is not None and isinstance(forbidden_modules, list):
                 path_finder.forbid_modules(forbidden_modules)
 
+            # A batch carries a list of `{file, fcn, args, cwd, paths}` calls
+            # that are executed in order with a single read and write, which
+            # saves an IPC round-trip per call for bulk operations like
+            # regrading. The `forbidden_modules` of the envelope apply to
+            # every call in the batch.
+            if batch is not None:
+                json_outp = execute_batch(batch)
+                batch = None
+
+                # make sure all output streams are flushed
+                sys.stderr.flush()
+                sys.stdout.flush()
+
+                outf.write(json_outp)
+                outf.write("\n")
+                outf.flush()
+                del json_outp
+                continue
+
             # "ping" is a special fake function name that the parent process
             # will use to check if the worker is active and able to respond to
             # calls. We just reply with "pong" to indicate that we're alive.
@@ -269,6 +557,12 @@ def worker_loop() -> None:
                 outf.flush()
                 continue
 
+            # Course code must never be able to confirm a restart, so a warm
+            # worker closes its handle to file descriptor 4 before running it.
+            if warm_exitf is not None and not zu.is_trusted_call(file, cwd, args):
+                warm_exitf.close()
+                warm_exitf = None
+
             # "restart" is a special fake function name that causes
             # the forked worker to exit, returning control to the
             # zygote parent process
@@ -277,6 +571,18 @@ def worker_loop() -> None:
                 outf.write("\n")
                 outf.flush()
 
+                # A warm worker that has only run core element code resets
+                # itself to the state it had when it was forked and confirms
+                # the restart on behalf of the zygote parent process.
+                if warm_exitf is not None:
+                    reset_worker()
+                    path_finder.reset_forbidden_modules()
+
+                    json.dump({"exited": True}, warm_exitf)
+                    warm_exitf.write("\n")
+                    warm_exitf.flush()
+                    continue
+
                 # `sys.exit()` allows the process to gracefully shut down. however, that
                 # makes things much slower than necessary, because we can't reuse this
                 # worker until control returns to the parent, and one or more things we
@@ -284,173 +590,18 @@ def worker_loop() -> None:
                 # clean themselves up. `os._exit()` is much closer to a POSIX `exit()`
                 # since it will immediately terminate the process - in our case, we don't
                 # care about graceful termination, we just want to get out of here as
-                # fast as possible.
+                # fast as possible. Helper processes of the timeout pool aren't
+                # cleaned up by `os._exit()`, so kill them first.
+                close_process_timeout_pool()
                 os._exit(0)
 
             assert file is not None
 
-            if file.endswith(".js"):
-                # We've shoehorned legacy v2 questions into the v3 code caller
-                # so that we can reuse the same worker processes, and specifically
-                # so that we can reuse the container pool.
-                #
-                # Node doesn't support POSIX-style forks, so we can't use a zygote
-                # process like we do with Python. Instead, we'll exec a Node subprocess.
-                # Node generally boots up very quickly, so this should be fine.
-                result = subprocess.run(
-                    [
-                        "node",
-                        "./apps/prairielearn/dist/question-servers/calculation-worker.js",
-                    ],
-                    cwd=cwd,
-                    capture_output=True,
-                    # By convention, the first argument is an object that contains all
-                    # the call information.
-                    input=json.dumps(args[0]),
-                    encoding="utf-8",
-                    check=False,
-                )
-
-                # Proxy any output from the subprocess back to the caller.
-                # Note that we only deal with stderr, as the Node process rewrote
-                # the output streams so that writes to stdout actually go to stderr.
-                # This allows us to use stdout for the actual return value.
-                if result.stderr:
-                    print(result.stderr, file=sys.stderr)
-                    sys.stderr.flush()
-
-                # If the subprocess exited with a non-zero exit code, raise an exception.
-                result.check_returncode()
-
-                outf.write(result.stdout)
-                outf.write("\n")
-                outf.flush()
-                continue
-
-            # Here, we re-seed the PRNGs if not already seeded in this worker_loop() call.
-            # We only want to seed the PRNGs once per worker_loop() call, so that if a
-            # question happens to contain multiple occurrences of the same element, the
-            # randomizations for each occurrence are independent of each other but still
-            # dependent on the variant seed.
-            if type(args[-1]) is dict and not seeded:
-                variant_seed = args[-1].get("variant_seed", None)
-                random.seed(variant_seed)
-                np.random.seed(variant_seed)
-                sys.meta_path.insert(0, FakerInitializeMetaPathFinder(variant_seed))
-                seeded = True
-
-            # reset and then set up the path
-            sys.path = copy.copy(saved_path)
-            for path in reversed(paths):
-                sys.path.insert(0, path)
-            sys.path.insert(0, cwd)
-
-            # change to the desired working directory
-            os.chdir(cwd)
-
-            if file == "question.html":
-                # This is an experimental implementation of question processing
-                # that does all HTML parsing and rendering in Python. This should
-                # be much faster than the current implementation that does an IPC
-                # call for each element.
-
-                context = args[0]
-                data = args[1]
-
-                result, processed_elements = question_phases.process(fcn, data, context)
-                val = {
-                    "html": result if fcn == "render" else None,
-                    "file": result if fcn == "file" else None,
-                    "data": data,
-                    "processed_elements": list(processed_elements),
-                }
-
-                # make sure all output streams are flushed
-                sys.stderr.flush()
-                sys.stdout.flush()
+            json_outp = execute_call(file, fcn, args, cwd, paths)
 
-                # write the return value (JSON on a single line)
-                outf.write(try_dumps({"present": True, "val": val}))
-                outf.write("\n")
-                outf.flush()
-
-                continue
-
-            file_path = os.path.join(cwd, file + ".py")
-
-            mod = mod_cache.get(file_path)
-            if mod is None:
-                mod = {"__file__": file_path}
-
-                with open(file_path, encoding="utf-8") as inf:
-                    # Use `compile` to associate filename with code object, so the
-                    # filename appears in the traceback if there is an error:
-                    # https://stackoverflow.com/a/437857
-                    code = compile(inf.read(), file_path, "exec")
-
-                exec(code, mod)
-                mod_cache[file_path] = mod
-
-            # try to load and execute the desired function
-            method = zu.get_module_function(mod, fcn)
-            if method is not None:
-                # check if the desired function is a legacy element function - if
-                # so, we add an argument for element_index
-                arg_names = list(signature(method).parameters.keys())
-                if arg_names == ["element_html", "element_index", "data"]:
-                    args.insert(1, None)
-
-                # call the desired function in the loaded module
-                val = method(*args)
-
-                if fcn == "file":
-                    # if val is None, replace it with empty string
-                    if val is None:
-                        val = ""
-                    # if val is a file-like object, read whatever is inside
-                    if isinstance(val, io.IOBase):
-                        val.seek(0)
-                        val = val.read()
-                    # if val is a string, treat it as utf-8
-                    if isinstance(val, str):
-                        val = bytes(val, "utf-8")
-                    # if this next call does not work, it will throw an error, because
-                    # the thing returned by file() does not have the correct format
-                    val = base64.b64encode(val).decode()
-
-                # Any function that is not 'file' or 'render' will modify 'data' and
-                # should not be returning anything (because 'data' is mutable).
-                if fcn not in ("file", "render"):
-                    if val is None or val is args[-1]:
-                        json_outp = try_dumps(
-                            {"present": True, "val": args[-1]}, allow_nan=False
-                        )
-                    else:
-                        json_outp = try_dumps(
-                            {"present": True, "val": val}, allow_nan=False
-                        )
-
-                        # We'll only actually complain if the function returned
-                        # a completely different object than the one passed in.
-                        # Otherwise, we'll just silently ignore the return value
-                        # and use the passed-in object (which should in fact be
-                        # the same object).
-                        #
-                        # TODO: Once this has been running in production for a while,
-                        # change this to raise an exception.
-                        sys.stderr.write(
-                            f"Function {fcn}() in {file + '.py'} returned a data object other than the one that was passed in.\n\n"
-                            + "There is no need to return a value, as the data object is mutable and can be modified in place.\n\n"
-                            + "For now, the return value will be used instead of the data object that was passed in.\n\n"
-                            + "In the future, returning a different object will trigger a fatal error."
-                        )
-                else:
-                    json_outp = try_dumps(
-                        {"present": True, "val": val}, allow_nan=False
-                    )
-            else:
-                # the function wasn't present, so report this
-                json_outp = try_dumps({"present": False}, allow_nan=False)
+            # Neither the arguments nor the output are needed once the output has
+            # been written, so don't keep them alive while waiting for the next call.
+            args = None
 
             # make sure all output streams are flushed
             sys.stderr.flush()
@@ -460,6 +611,7 @@ def worker_loop() -> None:
             outf.write(json_outp)
             outf.write("\n")
             outf.flush()
+            del json_outp
 
 
 worker_pid = 0
@@ -479,8 +631,10 @@ with open(4, "w", encoding="utf-8") as exitf:
         worker_pid = os.fork()
         if worker_pid == 0:
             # Ensure that no code running in the worker can interact with
-            # file descriptor 4
-            exitf.close()
+            # file descriptor 4. Warm workers keep it open until they run
+            # their first call that may execute course code.
+            if not warm_worker:
+                exitf.close()
 
             # If configured to do so, drop to a deprivileged user before running
             # any user code. This should generally only be enabled when running
@@ -494,7 +648,7 @@ with open(4, "w", encoding="utf-8") as exitf:
                 os.setgid(user.pw_gid)
                 os.setuid(user.pw_uid)
 
-            worker_loop()
+            worker_loop(exitf if warm_worker else None)
 
             break
         else:
@@ -350,6 +350,7 @@ function checkSymbolicInput(ast: DocumentFragment | ChildNode): ValidationResult
         case 'formula-editor':
         case 'display-log-as-ln':
         case 'display-simplified-expression':
+        case 'isolate-grading':
           assertBool('pl-symbolic-input', key, val, errors);
           if (key === 'allow-sets') {
             allowSets = isBooleanTrue(val);
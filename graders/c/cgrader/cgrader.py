@@ -1,13 +1,18 @@
 #! /usr/bin/python3
 
+import contextlib
+import hashlib
 import json
 import os
 import pathlib
 import re
 import shlex
+import shutil
 import subprocess
 import tempfile
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, partial
 from typing import Any, Literal, TypedDict, TypeGuard
 
 import lxml.etree as et
@@ -16,6 +21,11 @@ CODEBASE = "/grade/student"
 DATAFILE = "/grade/data/data.json"
 SB_USER = "sbuser"
 
+# Objects compiled from instructor-provided files are cached here, keyed by a hash
+# of the preprocessed source, compiler and flags. Mount a directory here (only
+# writable by root) to keep the cache across grading jobs.
+OBJECT_CACHE_DIR = os.environ.get("CGRADER_OBJECT_CACHE", "/cgrader/object_cache")
+
 # List of symbols that are not allowed to be used in student code
 INVALID_SYMBOLS = frozenset((
     "__asan_default_options",
@@ -73,6 +83,18 @@ class UngradableError(Exception):
 UngradableException = UngradableError
 
 
+@cache
+def compiler_version(compiler: str) -> str:
+    """Returns the path and version of a compiler, used in object cache keys"""
+    try:
+        proc = subprocess.run(
+            [compiler, "--version"], capture_output=True, check=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return f"{shutil.which(compiler)}\n{proc.stdout}"
+
+
 def is_str_list(val: list[float | str | int]) -> TypeGuard[list[str]]:
     """Determines whether all objects in the list are strings"""
     return all(isinstance(x, str) for x in val)
@@ -103,6 +125,18 @@ class CGrader:
         timeout: float | None = None,
         env: dict[str, str] | None = None,
     ) -> str:
+        return self._run_command(command, input, sandboxed, timeout, env)[0]
+
+    def _run_command(
+        self,
+        command: str | list[str],
+        input: Any | None = None,  # noqa: A002
+        sandboxed: bool = True,  # noqa: FBT001
+        timeout: float | None = None,
+        env: dict[str, str] | None = None,
+    ) -> tuple[str, int | None]:
+        """Runs a command like `run_command`, and also returns its exit status,
+        or None if it could not be started"""
         if isinstance(command, str):
             command = shlex.split(command)
         if sandboxed:
@@ -124,7 +158,7 @@ class CGrader:
                 stderr=subprocess.STDOUT,
             )
         except Exception:
-            return ""
+            return "", None
         out = ""
         tostr = ""
         if isinstance(input, bytearray):
@@ -144,7 +178,93 @@ class CGrader:
             except subprocess.TimeoutExpired:
                 tostr = TIMEOUT_MESSAGE
 
-        return out + tostr
+        return out + tostr, proc.returncode
+
+    def run_commands(
+        self,
+        commands: Iterable[str | list[str]],
+        sandboxed: bool = True,  # noqa: FBT001
+        timeout: float | None = None,
+    ) -> list[str]:
+        """Runs independent commands in parallel, one per available CPU, and
+        returns their outputs in the same order as the commands"""
+        with ThreadPoolExecutor(max_workers=os.process_cpu_count()) as executor:
+            return list(
+                executor.map(
+                    partial(self.run_command, sandboxed=sandboxed, timeout=timeout),
+                    commands,
+                )
+            )
+
+    def object_cache_key(
+        self, compiler: str, c_file: str, flags: list[str]
+    ) -> str | None:
+        """Computes the object cache key for a file, or None if it cannot be
+        preprocessed. The key covers the preprocessed source, so a change to any
+        included header also results in a new key."""
+        version = compiler_version(compiler)
+        if not version:
+            return None
+        try:
+            proc = subprocess.run(
+                [compiler, "-E", c_file, *flags], capture_output=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        key = hashlib.sha256()
+        for part in (version, os.path.abspath(c_file), os.getcwd(), *flags):
+            key.update(part.encode("utf-8"))
+            key.update(b"\0")
+        key.update(proc.stdout)
+        return key.hexdigest()
+
+    def compile_cached(
+        self, compiler: str, c_file: str, obj_file: str, flags: list[str]
+    ) -> str:
+        """Compiles an instructor-provided file into an object file, reusing the
+        object and compiler output from the object cache if the file was compiled
+        before with the same headers, compiler and flags"""
+        command = [compiler, "-c", c_file, "-o", obj_file, *flags]
+        # An object left over from an earlier compile must not be mistaken for
+        # the result of this one if it fails.
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(obj_file)
+        key = self.object_cache_key(compiler, c_file, flags)
+        if key is None:
+            return self.run_command(command, sandboxed=False)
+
+        cached_obj = os.path.join(OBJECT_CACHE_DIR, key + ".o")
+        cached_out = os.path.join(OBJECT_CACHE_DIR, key + ".out")
+        try:
+            with open(cached_out) as f:
+                out = f.read()
+            shutil.copyfile(cached_obj, obj_file)
+        except OSError:
+            pass
+        else:
+            return out
+
+        out, returncode = self._run_command(command, sandboxed=False)
+        if returncode == 0 and os.path.isfile(obj_file):
+            with contextlib.suppress(OSError):
+                os.makedirs(OBJECT_CACHE_DIR, mode=0o700, exist_ok=True)
+                # Entries are renamed into place, so that jobs sharing the cache
+                # never see partial files. The object is written last, since it
+                # marks a complete entry.
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=OBJECT_CACHE_DIR, delete=False
+                ) as tmp:
+                    tmp.write(out)
+                os.replace(tmp.name, cached_out)
+                with (
+                    open(obj_file, "rb") as f,
+                    tempfile.NamedTemporaryFile(
+                        dir=OBJECT_CACHE_DIR, delete=False
+                    ) as tmp,
+                ):
+                    shutil.copyfileobj(f, tmp)
+                os.replace(tmp.name, cached_obj)
+        return out
 
     def compile_file(
         self,
@@ -185,15 +305,25 @@ class CGrader:
                 cflags.extend(shlex.split(out_flags))
 
         out = ""
-        std_obj_files: list[str] = []
+        std_c_files = [c_file] if isinstance(c_file, str) else list(c_file)
+        std_obj_files = [
+            pathlib.Path(std_c_file).with_suffix(".o").absolute().as_posix()
+            for std_c_file in std_c_files
+        ]
         objs: list[str] = []
-        for std_c_file in [c_file] if isinstance(c_file, str) else c_file:
-            obj_file = pathlib.Path(std_c_file).with_suffix(".o").absolute().as_posix()
-            std_obj_files.append(obj_file)
-            out += self.run_command(
-                [compiler, "-save-temps", "-c", std_c_file, "-o", obj_file, *cflags],
-                sandboxed=False,
-            )
+        # Translation units are independent, so they are compiled in parallel.
+        # The results are checked in order so that messages remain deterministic.
+        compile_outputs = self.run_commands(
+            [
+                [compiler, "-save-temps", "-c", std_c_file, "-o", obj_file, *cflags]
+                for std_c_file, obj_file in zip(std_c_files, std_obj_files, strict=True)
+            ],
+            sandboxed=False,
+        )
+        for std_c_file, obj_file, compile_out in zip(
+            std_c_files, std_obj_files, compile_outputs, strict=True
+        ):
+            out += compile_out
             # Identify references to functions intended to disable sanitizers from object file
             if os.path.isfile(obj_file):
                 # These primitives are checked in the .i file (the
@@ -242,15 +372,18 @@ class CGrader:
 
         if all(os.path.isfile(obj) for obj in std_obj_files):
             # Add new C files that maybe overwrite some existing functions.
-            for added_c_file in add_c_file:
-                obj_file = (
-                    pathlib.Path(added_c_file).with_suffix(".o").absolute().as_posix()
-                )
-                out += self.run_command(
-                    [compiler, "-c", added_c_file, "-o", obj_file, *cflags],
-                    sandboxed=False,
+            objs = [
+                pathlib.Path(added_c_file).with_suffix(".o").absolute().as_posix()
+                for added_c_file in add_c_file
+            ]
+            with ThreadPoolExecutor(max_workers=os.process_cpu_count()) as executor:
+                out += "".join(
+                    executor.map(
+                        partial(self.compile_cached, compiler, flags=cflags),
+                        add_c_file,
+                        objs,
+                    )
                 )
-                objs.append(obj_file)
 
         if ungradable_if_failed and not all(
             os.path.isfile(f) for f in objs + std_obj_files
@@ -0,0 +1,125 @@
+"""
+Measure the cost of adding and collecting feedback for 1000 failed assertions,
+compared with appending each message to its feedback file as
+`Feedback.add_feedback` used to do, and count how often buffered feedback is
+spilled to disk.
+
+Run from `graders/python/python_autograder` with:
+
+    python benchmarks/feedback_buffer_benchmark.py
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import code_feedback
+from code_feedback import Feedback, collect_feedback, pop_feedback
+
+ASSERTIONS = 1000
+TESTS = 10
+ITERATIONS = 20
+
+
+def add_feedback_unbuffered(feedback_file: str, text: str) -> None:
+    """Append feedback to its file, as `Feedback.add_feedback` used to do."""
+    with open(
+        os.path.join(code_feedback.FEEDBACK_DIR, feedback_file + ".txt"),
+        "a+",
+        encoding="utf-8",
+    ) as f:
+        f.write(text)
+        f.write("\n")
+
+
+def run_assertions(message: str, *, collect: bool = True) -> None:
+    """Fail `ASSERTIONS` assertions, spread evenly over `TESTS` tests, and
+    collect the feedback of each test.
+    """
+    for test in range(TESTS):
+        Feedback.set_name(f"test_{test}")
+        for _ in range(ASSERTIONS // TESTS):
+            Feedback.add_feedback(message)
+    if collect:
+        for test in range(TESTS):
+            pop_feedback(f"feedback_test_{test}")
+
+
+def run_assertions_unbuffered(message: str) -> None:
+    """Like `run_assertions`, but without buffering feedback."""
+    for test in range(TESTS):
+        for _ in range(ASSERTIONS // TESTS):
+            add_feedback_unbuffered(f"feedback_test_{test}", message)
+    for test in range(TESTS):
+        path = Path(code_feedback.FEEDBACK_DIR) / f"feedback_test_{test}.txt"
+        path.read_text(encoding="utf-8")
+        path.unlink()
+
+
+def clear_feedback() -> None:
+    collect_feedback()
+    for path in Path(code_feedback.FEEDBACK_DIR).iterdir():
+        path.unlink()
+
+
+def count_spills(message: str) -> int:
+    """Count the number of feedback files written while running the assertions."""
+    spills = 0
+    spill = code_feedback._FeedbackBuffer.spill
+
+    def counting_spill(self: code_feedback._FeedbackBuffer, feedback_file: str) -> None:
+        nonlocal spills
+        spills += 1
+        spill(self, feedback_file)
+
+    code_feedback._FeedbackBuffer.spill = counting_spill
+    try:
+        run_assertions(message, collect=False)
+    finally:
+        code_feedback._FeedbackBuffer.spill = spill
+        clear_feedback()
+    return spills
+
+
+def main() -> None:
+    """Print the time taken per run of the assertions, and the number of spills."""
+    with tempfile.TemporaryDirectory() as feedback_dir:
+        code_feedback.FEEDBACK_DIR = feedback_dir
+
+        print(f"{'message':>8} {'unbuffered':>11} {'buffered':>9} {'speedup':>8}")
+        for length in (20, 200):
+            message = "x" * length
+            unbuffered_time = (
+                timeit.timeit(
+                    lambda message=message: run_assertions_unbuffered(message),
+                    number=ITERATIONS,
+                )
+                / ITERATIONS
+            )
+            buffered_time = (
+                timeit.timeit(
+                    lambda message=message: run_assertions(message),
+                    number=ITERATIONS,
+                )
+                / ITERATIONS
+            )
+            print(
+                f"{length:>8} {unbuffered_time * 1000:>9.2f}ms "
+                f"{buffered_time * 1000:>7.2f}ms "
+                f"{unbuffered_time / buffered_time:>7.1f}x"
+            )
+
+        # A limit below the total feedback, so that it has to be spilled
+        limit = 64 * 1024
+        code_feedback.FEEDBACK_BUFFER_LIMIT = limit
+        print(f"\nspills with a {limit // 1024} KiB buffer limit:")
+        for length in (200, 2000):
+            print(f"{length:>8} {count_spills('x' * length):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,8 @@ THE SOFTWARE.
 """
 
 
+import os
+from collections import defaultdict
 from collections.abc import Callable
 from typing import Any, Literal, NoReturn, TypeVar
 
@@ -46,6 +48,93 @@ class TestComplete(Exception):  # noqa: N818
 
 T = TypeVar("T")
 
+FEEDBACK_DIR = "/grade/run"
+
+# Once this many characters of feedback are buffered in memory, all of it is
+# appended to the feedback files in `FEEDBACK_DIR` instead.
+FEEDBACK_BUFFER_LIMIT = 1 << 20
+
+
+class _FeedbackBuffer:
+    """
+    Feedback added during grading, keyed by feedback file name, which is kept in
+    memory until the results are assembled instead of being written to a file
+    on every call.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: defaultdict[str, list[str]] = defaultdict(list)
+        self.size = 0
+
+    def append(self, feedback_file: str, text: str) -> None:
+        self.chunks[feedback_file].append(text)
+        self.size += len(text)
+        if self.size > FEEDBACK_BUFFER_LIMIT:
+            # Spilling only `feedback_file` would leave the buffer over the limit
+            # while other files hold most of it, so every later call would spill.
+            for name in list(self.chunks):
+                self.spill(name)
+
+    def spill(self, feedback_file: str) -> None:
+        chunks = self.chunks.pop(feedback_file, [])
+        self.size -= sum(map(len, chunks))
+        with open(
+            os.path.join(FEEDBACK_DIR, feedback_file + ".txt"), "a", encoding="utf-8"
+        ) as f:
+            f.writelines(chunks)
+
+    def pop(self, feedback_file: str) -> str | None:
+        chunks = self.chunks.pop(feedback_file, None)
+        fname = os.path.join(FEEDBACK_DIR, feedback_file + ".txt")
+        spilled = None
+        if os.path.exists(fname):
+            with open(fname, encoding="utf-8") as f:
+                spilled = f.read()
+            os.remove(fname)
+        if chunks is None:
+            return spilled
+        self.size -= sum(map(len, chunks))
+        return (spilled or "") + "".join(chunks)
+
+    def take(self) -> dict[str, str]:
+        feedback = {name: "".join(chunks) for name, chunks in self.chunks.items()}
+        self.chunks.clear()
+        self.size = 0
+        return feedback
+
+
+_feedback_buffer = _FeedbackBuffer()
+
+
+def pop_feedback(feedback_file: str) -> str | None:
+    """
+    Return all feedback added for `feedback_file`, including any that was
+    spilled to disk, and discard it.
+
+    Returns:
+        The feedback, or `None` if no feedback was added.
+    """
+    return _feedback_buffer.pop(feedback_file)
+
+
+def collect_feedback() -> dict[str, str]:
+    """
+    Return all feedback that is buffered in memory, keyed by feedback file, and
+    discard it. Feedback that was already spilled to disk is left in place.
+
+    Returns:
+        The buffered feedback for each feedback file.
+    """
+    return _feedback_buffer.take()
+
+
+def extend_feedback(feedback: dict[str, str]) -> None:
+    """
+    Add feedback returned by `collect_feedback()`, e.g. in another process.
+    """
+    for feedback_file, text in feedback.items():
+        _feedback_buffer.append(feedback_file, text)
+
 
 class Feedback:
     """
@@ -109,12 +198,8 @@ class Feedback:
         if cls.feedback_file is None:
             raise RuntimeError("Cannot add feedback without a feedback file set. ")
 
-        with open(
-            "/grade/run/" + cls.feedback_file + ".txt", "a+", encoding="utf-8"
-        ) as f:
-            f.write(cls.buffer + text)
-            f.write("\n")
-            cls.buffer = ""
+        _feedback_buffer.append(cls.feedback_file, cls.buffer + text + "\n")
+        cls.buffer = ""
 
     @classmethod
     def finish(cls, fb_text: str) -> NoReturn:
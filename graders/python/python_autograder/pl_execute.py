@@ -1,13 +1,16 @@
 import contextlib
 import json
 import linecache
+import mmap
 import os
 import random
 import sys
+import weakref
 from copy import deepcopy
+from functools import cache
 from os import path
-from types import ModuleType
-from typing import Any
+from types import CodeType, ModuleType
+from typing import Any, Literal, NamedTuple
 
 import numpy as np
 from faker import Faker
@@ -20,6 +23,12 @@ class UserCodeFailedError(Exception):
         super().__init__(err, *args)
 
 
+# With `share_setup_arrays`, numpy arrays and DataFrames in `names_for_user` that
+# hold at least this many bytes of numeric data are shared copy-on-write between
+# the reference and student code instead of being deep copied.
+SHARED_ARRAY_MIN_BYTES = 1 << 20
+
+
 def set_random_seed(seed: int | None = None) -> None:
     np.random.seed(seed)
     random.seed(seed)
@@ -44,6 +53,239 @@ def populate_linecache(fname: str, contents: str) -> None:
     )
 
 
+def _is_shareable_dtype(dtype: Any) -> bool:
+    return isinstance(dtype, np.dtype) and not dtype.hasobject
+
+
+def _is_shareable_array(value: Any) -> bool:
+    return type(value) is np.ndarray and _is_shareable_dtype(value.dtype)
+
+
+def _shareable_nbytes(df: Any) -> int:
+    return sum(
+        df.iloc[:, i].nbytes
+        for i, dtype in enumerate(df.dtypes)
+        if _is_shareable_dtype(dtype)
+    )
+
+
+class _ArraySnapshot:
+    """
+    A copy of a numpy array in an anonymous memory file. Views of the snapshot
+    map the file privately, so memory is only duplicated for the pages that a
+    view writes to, and those writes are not visible anywhere else.
+    """
+
+    def __init__(self, array: np.ndarray) -> None:
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.nbytes = array.nbytes
+        self.order: Literal["C", "F"] = (
+            "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+        )
+        fd = os.memfd_create("pl_setup_array", os.MFD_CLOEXEC)
+        self.fd = fd
+        self.close = weakref.finalize(self, os.close, fd)
+        os.ftruncate(fd, self.nbytes)
+        with mmap.mmap(fd, self.nbytes) as buf:
+            snapshot = self._wrap(buf)
+            snapshot[...] = array
+            del snapshot
+
+    def _wrap(self, buf: mmap.mmap) -> np.ndarray:
+        return np.ndarray(self.shape, self.dtype, buffer=buf, order=self.order)
+
+    def _raw_bits(self, array: np.ndarray) -> np.ndarray:
+        # Reinterpret the data as unsigned integers, so that e.g. NaN matches
+        # itself, without copying arrays that are not contiguous
+        if self.dtype.fields is None and self.dtype.itemsize in (1, 2, 4, 8):
+            return array.view(f"u{self.dtype.itemsize}")
+        return np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+
+    def matches(self, array: np.ndarray) -> bool:
+        """
+        Check whether `array` still holds exactly the data in this snapshot.
+
+        Returns:
+            `True` if the shape, dtype and bytes of `array` match the snapshot.
+        """
+        if array.shape != self.shape or array.dtype != self.dtype:
+            return False
+        with mmap.mmap(self.fd, self.nbytes, access=mmap.ACCESS_READ) as buf:
+            snapshot = self._raw_bits(self._wrap(buf))
+            current = self._raw_bits(array)
+            # Compare in chunks to avoid allocating a full-size boolean array
+            step = max(1, SHARED_ARRAY_MIN_BYTES * len(current) // current.nbytes)
+            same = all(
+                np.array_equal(snapshot[i : i + step], current[i : i + step])
+                for i in range(0, len(current), step)
+            )
+            del snapshot
+        return same
+
+    def view(self) -> np.ndarray:
+        buf = mmap.mmap(self.fd, self.nbytes, access=mmap.ACCESS_COPY)
+        return self._wrap(buf)
+
+
+class CopyOnWriteSnapshots:
+    """
+    Snapshots of the large numpy arrays and DataFrames that are handed to the
+    reference and student code. A snapshot is reused for as long as the
+    original object still holds the same data.
+    """
+
+    def __init__(self) -> None:
+        self.arrays: dict[tuple[int, int], _ArraySnapshot] = {}
+
+    def _view(self, key: tuple[int, int], array: np.ndarray) -> np.ndarray:
+        snapshot = self.arrays.get(key)
+        if snapshot is None or not snapshot.matches(array):
+            if snapshot is not None:
+                snapshot.close()
+            snapshot = self.arrays[key] = _ArraySnapshot(array)
+        return snapshot.view()
+
+    def _dataframe_view(self, df: Any) -> Any:
+        import pandas as pd
+
+        dtypes = set(df.dtypes)
+        if len(dtypes) == 1 and _is_shareable_dtype(dtypes.pop()):
+            # All columns have the same dtype, so share them as a single array
+            frame = pd.DataFrame(
+                self._view((id(df), -1), df.to_numpy()),
+                index=deepcopy(df.index),
+                copy=False,
+            )
+        else:
+            columns = {}
+            for i in range(df.shape[1]):
+                column = df.iloc[:, i]
+                if _is_shareable_dtype(column.dtype):
+                    columns[i] = self._view((id(df), i), column.to_numpy())
+                else:
+                    columns[i] = column.array.copy()
+            frame = pd.DataFrame(columns, index=deepcopy(df.index), copy=False)
+        frame.columns = deepcopy(df.columns)
+        frame.attrs = deepcopy(df.attrs)
+        return frame
+
+    def memo(self, variables: dict[str, Any]) -> dict[int, Any]:
+        """
+        Build a `deepcopy()` memo that replaces the large numpy arrays and
+        DataFrames in `variables` with copy-on-write views of their snapshots.
+
+        Returns:
+            The memo, mapping the id of each original object to its view.
+        """
+        # DataFrames can only exist if the setup code imported pandas
+        pd = sys.modules.get("pandas")
+        memo: dict[int, Any] = {}
+        for value in variables.values():
+            if id(value) in memo:
+                continue
+            if _is_shareable_array(value) and value.nbytes >= SHARED_ARRAY_MIN_BYTES:
+                memo[id(value)] = self._view((id(value), -1), value)
+            elif (
+                pd is not None
+                and type(value) is pd.DataFrame
+                and _shareable_nbytes(value) >= SHARED_ARRAY_MIN_BYTES
+            ):
+                memo[id(value)] = self._dataframe_view(value)
+        return memo
+
+    def close(self) -> None:
+        for snapshot in self.arrays.values():
+            snapshot.close()
+        self.arrays.clear()
+
+
+class QuestionCode(NamedTuple):
+    data: dict[str, Any]
+    str_setup: str
+    code_setup: CodeType
+    str_ref: str
+    code_ref: CodeType
+    str_leading: str
+    str_trailing: str
+
+
+class StudentCode(NamedTuple):
+    str_student: str
+    traceback_fname: str
+
+
+@cache
+def load_question_code(filenames_dir: str, fname_ref: str) -> QuestionCode:
+    """
+    Read and compile the question data, setup code and reference code, and then
+    delete the files so students can't read e.g. test cases or setup code.
+
+    The result is cached, so that when the test suite is run for several
+    iterations the files are only read and compiled once.
+    """
+
+    with open(path.join(filenames_dir, "data.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    with open(path.join(filenames_dir, "setup_code.py"), encoding="utf-8") as f:
+        str_setup = f.read()
+    with open(fname_ref, encoding="utf-8") as f:
+        str_ref = f.read()
+
+    # Read in leading, trailing code
+    str_leading = try_read(path.join(filenames_dir, "leading_code.py"))
+    str_trailing = try_read(path.join(filenames_dir, "trailing_code.py"))
+
+    # Delete sensitive code so students can't read e.g. test cases or setup code
+    os.remove(path.join(filenames_dir, "data.json"))
+    os.remove(fname_ref)
+    os.remove(path.join(filenames_dir, "setup_code.py"))
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path.join(filenames_dir, "leading_code.py"))
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path.join(filenames_dir, "trailing_code.py"))
+    os.remove(path.join(filenames_dir, "test.py"))
+
+    return QuestionCode(
+        data=data,
+        str_setup=str_setup,
+        code_setup=compile(
+            str_setup, path.join(filenames_dir, "setup_code.py"), "exec"
+        ),
+        str_ref=str_ref,
+        code_ref=compile(str_ref, fname_ref, "exec"),
+        str_leading=str_leading,
+        str_trailing=str_trailing,
+    )
+
+
+@cache
+def load_student_code(
+    fname_student: str, str_leading: str, str_trailing: str, ipynb_key: str
+) -> StudentCode:
+    """
+    Read student code (and transform if necessary) and append leading/trailing
+    code. The result is cached, like `load_question_code()`.
+    """
+
+    with open(fname_student, encoding="utf-8") as f:
+        _, extension = path.splitext(fname_student)
+        if extension == ".ipynb":
+            str_student = extract_ipynb_contents(f, ipynb_key)
+            traceback_fname = f"{fname_student} #grade"
+        else:
+            str_student = f.read()
+            traceback_fname = fname_student
+    str_student = "\n".join(filter(bool, (str_leading, str_student, str_trailing)))
+
+    return StudentCode(str_student=str_student, traceback_fname=traceback_fname)
+
+
+@cache
+def compile_student_code(student: StudentCode) -> CodeType:
+    return compile(student.str_student, student.traceback_fname, "exec")
+
+
 def execute_code(
     fname_ref: str,
     fname_student: str,
@@ -51,6 +293,7 @@ def execute_code(
     console_output_fname: str | None = None,
     test_iter_num: int = 0,
     ipynb_key: str = "#grade",
+    share_setup_arrays: bool = False,  # noqa: FBT001
 ) -> tuple[dict[str, Any], dict[str, Any], ModuleType | None]:
     """
     execute_code(fname_ref, fname_student)
@@ -62,6 +305,8 @@ def execute_code(
     - include_plt: If true, plots will be included in grading results.
     - console_output_fname: Filename to redirect console output to.
     - test_iter_num: The iteration number of this test, when test cases are run multiple times.
+    - share_setup_arrays: If true, large numpy arrays and DataFrames in `names_for_user`
+      are shared copy-on-write instead of being deep copied for the reference and student code.
 
     Returns:
     - ref_result: A named tuple with reference variables
@@ -73,54 +318,21 @@ def execute_code(
     if filenames_dir is None:
         raise ValueError("FILENAMES_DIR not set in environment variables")
 
-    with open(path.join(filenames_dir, "data.json"), encoding="utf-8") as f:
-        data = json.load(f)
-    with open(path.join(filenames_dir, "setup_code.py"), encoding="utf-8") as f:
-        str_setup = f.read()
-    with open(fname_ref, encoding="utf-8") as f:
-        str_ref = f.read()
-
-    # Read in leading, trailing code
-    str_leading = try_read(path.join(filenames_dir, "leading_code.py"))
-    str_trailing = try_read(path.join(filenames_dir, "trailing_code.py"))
-
-    # Read student code (and transform if necessary) and append leading/trailing code
-    with open(fname_student, encoding="utf-8") as f:
-        _, extension = path.splitext(fname_student)
-        if extension == ".ipynb":
-            str_student = extract_ipynb_contents(f, ipynb_key)
-            traceback_fname_student = f"{fname_student} #grade"
-        else:
-            str_student = f.read()
-            traceback_fname_student = fname_student
-    str_student = "\n".join(filter(bool, (str_leading, str_student, str_trailing)))
+    question = load_question_code(filenames_dir, fname_ref)
+    data = deepcopy(question.data)
 
-    with open(path.join(filenames_dir, "test.py"), encoding="utf-8") as f:
-        str_test = f.read()
-
-    # Delete sensitive code so students can't read e.g. test cases or setup code
-    os.remove(path.join(filenames_dir, "data.json"))
-    os.remove(fname_ref)
-    os.remove(path.join(filenames_dir, "setup_code.py"))
-    with contextlib.suppress(FileNotFoundError):
-        os.remove(path.join(filenames_dir, "leading_code.py"))
-    with contextlib.suppress(FileNotFoundError):
-        os.remove(path.join(filenames_dir, "trailing_code.py"))
-    os.remove(path.join(filenames_dir, "test.py"))
-
-    # Since we've deleted some files, we need to manually populate
+    # Since the question files have been deleted, we need to manually populate
     # the linecache so that `traceback` can find the correct contents when
     # printing any exceptions.
-    populate_linecache(path.join(filenames_dir, "setup_code.py"), str_setup)
-    populate_linecache(fname_ref, str_ref)
+    populate_linecache(path.join(filenames_dir, "setup_code.py"), question.str_setup)
+    populate_linecache(fname_ref, question.str_ref)
 
     # Seed student code and answer code with same seed
     seed = random.randint(0, (2**32) - 1)
 
     setup_globals = {"test_iter_num": test_iter_num, "data": data}
     # make all the variables in setup_code.py available to ans.py
-    code_setup = compile(str_setup, path.join(filenames_dir, "setup_code.py"), "exec")
-    exec(code_setup, setup_globals)
+    exec(question.code_setup, setup_globals)
 
     # If the setup code has a repeated_setup function, run it.
     repeated_setup = setup_globals.get("repeated_setup")
@@ -129,6 +341,8 @@ def execute_code(
 
     names_for_user = [v["name"] for v in data["params"].get("names_for_user", [])]
 
+    snapshots = CopyOnWriteSnapshots() if share_setup_arrays else None
+
     # Make copies of variables that go to the user so we do not clobber them
     ref_code = {}
     for i, j in setup_globals.items():
@@ -136,7 +350,7 @@ def execute_code(
             i in names_for_user
         ):
             ref_code[i] = j  # noqa: PERF403 (too complex)
-    ref_code = deepcopy(ref_code)
+    ref_code = deepcopy(ref_code, snapshots.memo(ref_code) if snapshots else None)
 
     # Add any other variables to reference namespace and do not copy
     for i, j in setup_globals.items():
@@ -145,8 +359,7 @@ def execute_code(
         ):
             ref_code[i] = j
     set_random_seed(seed)
-    code_ref = compile(str_ref, fname_ref, "exec")
-    exec(code_ref, ref_code)
+    exec(question.code_ref, ref_code)
     # ref_code contains the correct answers
 
     if include_plt:
@@ -178,7 +391,11 @@ def execute_code(
             i in names_for_user
         ):
             student_globals[i] = j  # noqa: PERF403 (too complex)
-    student_globals = deepcopy(student_globals)
+    student_globals = deepcopy(
+        student_globals, snapshots.memo(student_globals) if snapshots else None
+    )
+    if snapshots:
+        snapshots.close()
 
     # Execute student code
     previous_stdout = sys.stdout
@@ -187,40 +404,24 @@ def execute_code(
 
     set_random_seed(seed)
 
+    student = load_student_code(
+        fname_student, question.str_leading, question.str_trailing, ipynb_key
+    )
+
     # The file at path `fname_student` doesn't actually correspond to the
     # code that we're going to execute, since it doesn't include the leading
     # and trailing code. We'll manually construct a `linecache` entry for it
     # so that the traceback will show the correct code for each line. For
     # notebooks, this name does not match a real file, so that students see
     # a pointer to the original source of the code in the traceback.
-    populate_linecache(traceback_fname_student, str_student)
+    populate_linecache(student.traceback_fname, student.str_student)
 
     try:
-        code_student = compile(str_student, traceback_fname_student, "exec")
-        exec(code_student, student_globals)
+        exec(compile_student_code(student), student_globals)
         err = None
     except Exception:
         err = sys.exc_info()
 
-    # Now that user code has been run, replace deleted files in case we are to run the tests again.
-    with open(path.join(filenames_dir, "data.json"), "w", encoding="utf-8") as f:
-        json.dump(data, f)
-    with open(fname_ref, "w", encoding="utf-8") as f:
-        f.write(str_ref)
-    with open(path.join(filenames_dir, "setup_code.py"), "w", encoding="utf-8") as f:
-        f.write(str_setup)
-    if len(str_leading) > 0:
-        with open(
-            path.join(filenames_dir, "leading_code.py"), "w", encoding="utf-8"
-        ) as f:
-            f.write(str_leading)
-    if len(str_trailing) > 0:
-        with open(
-            path.join(filenames_dir, "trailing_code.py"), "w", encoding="utf-8"
-        ) as f:
-            f.write(str_trailing)
-    with open(path.join(filenames_dir, "test.py"), "w", encoding="utf-8") as f:
-        f.write(str_test)
     if err is not None:
         raise UserCodeFailedError(err)
 
@@ -7,6 +7,7 @@ from os.path import join
 from typing import Any
 from unittest import TestLoader
 
+from code_feedback import pop_feedback
 from pl_result import PLTestResult
 
 """
@@ -32,12 +33,9 @@ def add_files(results: list[dict[str, Any]]) -> None:
                 test["images"] = []
             test["images"].append(imgsrc)
             os.remove(image_fname)
-        feedback_fname = join(base_dir, "feedback_" + test["filename"] + ".txt")
-        if os.path.exists(feedback_fname):
-            with open(feedback_fname, encoding="utf-8") as content_file:
-                text_feedback = content_file.read()
+        text_feedback = pop_feedback("feedback_" + test["filename"])
+        if text_feedback is not None:
             test["message"] = text_feedback
-            os.remove(feedback_fname)
 
 
 if __name__ == "__main__":
@@ -109,11 +107,9 @@ if __name__ == "__main__":
         # load output files to results
         add_files(results)
 
-        text_output = ""
-        if os.path.exists(join(base_dir, "output.txt")):
-            with open(join(base_dir, "output.txt"), encoding="utf-8") as content_file:
-                text_output = content_file.read()
-            os.remove(join(base_dir, "output.txt"))
+        # Console output is written to output.txt, followed by any feedback
+        # added with `Feedback.set_main_output()`
+        text_output = pop_feedback("output") or ""
 
         # Assemble final grading results
         grading_result = {}
@@ -0,0 +1,111 @@
+import os
+import pickle
+import signal
+import traceback
+import unittest
+from collections import deque
+from collections.abc import Sequence
+from typing import Any, NoReturn
+
+from code_feedback import collect_feedback
+from pl_result import PLTestResult
+
+
+def default_worker_count() -> int:
+    """
+    Get the number of CPUs that this process may run on.
+    """
+    return os.process_cpu_count() or 1
+
+
+def _run_in_child(test: unittest.TestCase, write_fd: int) -> NoReturn:
+    status = 1
+    try:
+        # Feedback buffered by the parent stays with the parent
+        collect_feedback()
+        result = PLTestResult()
+        # Run the test directly, since `PLTestCase.run()` would wait for a worker
+        unittest.TestCase.run(test, result)
+        outcome = {
+            "results": result.results,
+            "errors": [tr_message for _, tr_message in result.errors],
+            "failures": [tr_message for _, tr_message in result.failures],
+            "skip_grading": result.skip_grading,
+            "feedback": collect_feedback(),
+        }
+        with os.fdopen(write_fd, "wb") as f:
+            pickle.dump(outcome, f)
+        status = 0
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        os._exit(status)
+
+
+class ParallelTestRunner:
+    """
+    Runs test cases in forked child processes, at most `max_workers` at a time.
+
+    The children are forked after the student and reference code have been
+    executed, so each test sees the same results without running the code
+    again. Tests are started in the given order, and the outcome of each test
+    is collected with `wait()`.
+    """
+
+    def __init__(self, tests: Sequence[unittest.TestCase], max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self.pending = deque(tests)
+        # Test method name -> (pid, read end of the outcome pipe)
+        self.running: dict[str, tuple[int, int]] = {}
+        self._start_workers()
+
+    def _start_workers(self) -> None:
+        while self.pending and len(self.running) < self.max_workers:
+            test = self.pending.popleft()
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                _run_in_child(test, write_fd)
+            os.close(write_fd)
+            self.running[test._testMethodName] = (pid, read_fd)
+
+    def wait(self, test_name: str) -> dict[str, Any] | None:
+        """
+        Wait for the test method `test_name` to finish.
+
+        Returns:
+            The outcome of the test, to be passed to `PLTestResult.add_outcome()`,
+            or `None` if the test was not started by this runner.
+
+        Raises:
+            ChildProcessError: If the test process exited without an outcome.
+        """
+        if test_name not in self.running:
+            self.pending = deque(
+                test for test in self.pending if test._testMethodName != test_name
+            )
+            return None
+
+        pid, read_fd = self.running.pop(test_name)
+        with os.fdopen(read_fd, "rb") as f:
+            data = f.read()
+        _, status = os.waitpid(pid, 0)
+        self._start_workers()
+        if not data:
+            raise ChildProcessError(
+                "The test process exited unexpectedly with status "
+                f"{os.waitstatus_to_exitcode(status)}"
+            )
+        return pickle.loads(data)
+
+    def close(self) -> None:
+        """
+        Stop all tests that are still running and discard pending tests.
+        """
+        self.pending.clear()
+        for pid, read_fd in self.running.values():
+            os.kill(pid, signal.SIGKILL)
+            os.close(read_fd)
+            os.waitpid(pid, 0)
+        self.running.clear()
@@ -2,7 +2,7 @@ import traceback
 import unittest
 from typing import Any
 
-from code_feedback import Feedback, GradingComplete, TestComplete
+from code_feedback import Feedback, GradingComplete, TestComplete, extend_feedback
 from pl_execute import UserCodeFailedError
 from pl_helpers import DoNotRunError, GradingSkipped, print_student_code
 
@@ -136,6 +136,20 @@ class PLTestResult(unittest.TestResult):
         else:
             self.results[-1]["points"] = points * self.results[-1]["max_points"]
 
+    def add_outcome(self, test: unittest.TestCase, outcome: dict[str, Any]) -> None:
+        """
+        Record the outcome of a test that was run in another process by
+        `ParallelTestRunner`.
+        """
+        unittest.TestResult.startTest(self, test)
+        self.results.extend(outcome["results"])
+        self.errors.extend((test, tr_message) for tr_message in outcome["errors"])
+        self.failures.extend((test, tr_message) for tr_message in outcome["failures"])
+        if outcome["skip_grading"]:
+            self.skip_grading = True
+        extend_feedback(outcome["feedback"])
+        self.stopTest(test)
+
     def stopTest(self, test: unittest.TestCase) -> None:  # noqa: N802
         # Never write output back to the console
         self._mirrorOutput = False
@@ -1,15 +1,17 @@
-import json
 import os
+import sys
 import unittest
 from collections import namedtuple
+from copy import deepcopy
 from os.path import join
 from types import ModuleType
 
 # Needed to ensure matplotlib runs on Docker
 import matplotlib as mpl
 from code_feedback import Feedback
-from pl_execute import execute_code
+from pl_execute import execute_code, load_question_code
 from pl_helpers import GradingSkipped, name, save_plot
+from pl_parallel import ParallelTestRunner, default_worker_count
 from pl_result import PLTestResult
 
 mpl.use("Agg")
@@ -28,7 +30,14 @@ class PLTestCase(unittest.TestCase):
     iter_num = 0
     total_iters = 1
     ipynb_key = "#grade"
+    # If true, test methods are run in parallel in forked processes after the
+    # student code has been executed. Tests must not depend on each other.
+    parallel_tests = False
+    # If true, large numpy arrays and DataFrames given to the student and
+    # reference code are shared copy-on-write instead of being deep copied.
+    share_setup_arrays = False
     plt: ModuleType | None
+    _parallel_runner: ParallelTestRunner | None = None
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -47,8 +56,8 @@ class PLTestCase(unittest.TestCase):
         cls.student_code_abs_path = join(base_dir, cls.student_code_file)
 
         # Load data so that we can use it in the test cases
-        with open(join(filenames_dir, "data.json"), encoding="utf-8") as f:
-            cls.data = json.load(f)
+        question = load_question_code(filenames_dir, join(filenames_dir, "ans.py"))
+        cls.data = deepcopy(question.data)
 
         ref_result, student_result, plot_value = execute_code(
             join(filenames_dir, "ans.py"),
@@ -57,6 +66,7 @@ class PLTestCase(unittest.TestCase):
             join(base_dir, "output.txt"),
             cls.iter_num,
             cls.ipynb_key,
+            share_setup_arrays=cls.share_setup_arrays,
         )
         answerTuple = namedtuple("answerTuple", ref_result.keys())  # noqa: PYI024
         cls.ref = answerTuple(**ref_result)
@@ -66,12 +76,20 @@ class PLTestCase(unittest.TestCase):
         if cls.include_plt:
             cls.display_plot()
 
+        if cls.parallel_tests:
+            names = unittest.TestLoader().getTestCaseNames(cls)
+            tests = [cls(method_name) for method_name in names]
+            cls._parallel_runner = ParallelTestRunner(tests, default_worker_count())
+
     @classmethod
     def tearDownClass(cls) -> None:
         """
         Close all plots and increment the iteration number on test finish
         """
 
+        if cls._parallel_runner is not None:
+            cls._parallel_runner.close()
+            cls._parallel_runner = None
         if cls.include_plt and cls.plt:
             cls.plt.close("all")
         cls.iter_num += 1
@@ -129,6 +147,13 @@ class PLTestCase(unittest.TestCase):
         """
 
         if (
+            self._parallel_runner is not None
+            and isinstance(result, PLTestResult)
+            and not result.done_grading
+            and not result.skip_grading
+        ):
+            self._run_in_worker(result)
+        elif (
             result is None
             or not isinstance(result, PLTestResult)
             or (not result.done_grading and not result.skip_grading)
@@ -139,6 +164,26 @@ class PLTestCase(unittest.TestCase):
             self.setUp()
             result.addError(self, (None, GradingSkipped()))
 
+    def _run_in_worker(self, result: PLTestResult) -> None:
+        if self._parallel_runner is None:
+            raise RuntimeError("Tests are not being run in parallel")
+        try:
+            outcome = self._parallel_runner.wait(self._testMethodName)
+        except ChildProcessError:
+            result.startTest(self)
+            Feedback.set_name(self._testMethodName)
+            result.addError(self, sys.exc_info())
+            result.stopTest(self)
+            return
+
+        if outcome is None:
+            super().run(result)
+            return
+        result.add_outcome(self, outcome)
+        if result.skip_grading:
+            # Grading was stopped early, so the remaining tests will be skipped
+            self._parallel_runner.close()
+
 
 class PLTestCaseWithPlot(PLTestCase):
     """
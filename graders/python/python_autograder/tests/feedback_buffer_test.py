@@ -0,0 +1,81 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import code_feedback
+import pytest
+from code_feedback import Feedback, pop_feedback
+
+
+@pytest.fixture(autouse=True)
+def feedback_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setattr(code_feedback, "FEEDBACK_DIR", str(tmp_path))
+    Feedback.set_name("test_buffer")
+    Feedback.buffer = ""
+    yield tmp_path
+    pop_feedback("feedback_test_buffer")
+    pop_feedback("output")
+
+
+def test_feedback_is_buffered_in_memory(feedback_dir: Path) -> None:
+    for i in range(1000):
+        Feedback.add_feedback(f"assertion {i} failed")
+
+    assert list(feedback_dir.iterdir()) == []
+    text = pop_feedback("feedback_test_buffer")
+    assert text == "".join(f"assertion {i} failed\n" for i in range(1000))
+    assert pop_feedback("feedback_test_buffer") is None
+
+
+def test_feedback_includes_buffer_and_is_kept_per_test() -> None:
+    Feedback.buffer = "prefix "
+    Feedback.add_feedback("first")
+    Feedback.set_main_output()
+    Feedback.add_feedback("main")
+
+    assert pop_feedback("feedback_test_buffer") == "prefix first\n"
+    assert pop_feedback("output") == "main\n"
+    assert pop_feedback("feedback_other") is None
+
+
+def test_feedback_spills_to_disk_over_limit(
+    feedback_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(code_feedback, "FEEDBACK_BUFFER_LIMIT", 100)
+    for i in range(50):
+        Feedback.add_feedback(f"line {i}")
+
+    assert (feedback_dir / "feedback_test_buffer.txt").exists()
+    text = pop_feedback("feedback_test_buffer")
+    assert text == "".join(f"line {i}\n" for i in range(50))
+    assert list(feedback_dir.iterdir()) == []
+
+
+def test_feedback_spills_all_files_over_limit(
+    feedback_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(code_feedback, "FEEDBACK_BUFFER_LIMIT", 100)
+    Feedback.set_main_output()
+    Feedback.add_feedback("x" * 90)
+    Feedback.set_name("test_buffer")
+    for i in range(5):
+        Feedback.add_feedback(f"line {i}")
+
+    assert sorted(path.name for path in feedback_dir.iterdir()) == [
+        "feedback_test_buffer.txt",
+        "output.txt",
+    ]
+    # Only the lines added after spilling are still in memory
+    assert code_feedback._feedback_buffer.size == len("line 2\nline 3\nline 4\n")
+    assert pop_feedback("output") == "x" * 90 + "\n"
+    text = pop_feedback("feedback_test_buffer")
+    assert text == "".join(f"line {i}\n" for i in range(5))
+
+
+def test_feedback_follows_existing_file_contents(feedback_dir: Path) -> None:
+    # Console output from the student code is redirected to output.txt
+    (feedback_dir / "output.txt").write_text("console\n", encoding="utf-8")
+    Feedback.set_main_output()
+    Feedback.add_feedback("Your code has a syntax error.")
+
+    assert pop_feedback("output") == "console\nYour code has a syntax error.\n"
+    assert not (feedback_dir / "output.txt").exists()
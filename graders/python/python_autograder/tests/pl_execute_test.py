@@ -0,0 +1,177 @@
+import mmap
+import os
+import unittest
+from pathlib import Path
+
+import code_feedback
+import pandas as pd
+import pl_execute
+import pytest
+from code_feedback import Feedback
+from pl_execute import UserCodeFailedError, execute_code
+from pl_helpers import name
+from pl_result import PLTestResult
+from pl_unit_test import PLTestCase
+
+SETUP_CODE = """
+import random
+
+calls = []
+value = random.randint(0, 1000)
+
+def repeated_setup():
+    calls.append(test_iter_num)
+"""
+
+ANS_CODE = "import random\nx = random.random()\nref_iter = test_iter_num\n"
+
+STUDENT_CODE = "import random\nx = random.random()\n"
+
+
+@pytest.fixture(autouse=True)
+def filenames_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    filenames_dir = tmp_path / "filenames"
+    filenames_dir.mkdir()
+    (filenames_dir / "data.json").write_text(
+        '{"params": {"names_for_user": [{"name": "value"}], '
+        '"names_from_user": [{"name": "x"}]}}',
+        encoding="utf-8",
+    )
+    (filenames_dir / "setup_code.py").write_text(SETUP_CODE, encoding="utf-8")
+    (filenames_dir / "ans.py").write_text(ANS_CODE, encoding="utf-8")
+    (filenames_dir / "test.py").write_text("", encoding="utf-8")
+    (tmp_path / "user_code.py").write_text(STUDENT_CODE, encoding="utf-8")
+    monkeypatch.setenv("FILENAMES_DIR", str(filenames_dir))
+    pl_execute.load_question_code.cache_clear()
+    pl_execute.load_student_code.cache_clear()
+    pl_execute.compile_student_code.cache_clear()
+    return filenames_dir
+
+
+def test_execute_code_reads_question_files_once(filenames_dir: Path) -> None:
+    fname_ref = str(filenames_dir / "ans.py")
+    fname_student = str(filenames_dir.parent / "user_code.py")
+
+    for test_iter_num in range(5):
+        ref, student, _ = execute_code(
+            fname_ref, fname_student, test_iter_num=test_iter_num
+        )
+        # Sensitive files are deleted and not written back between iterations
+        assert os.listdir(filenames_dir) == []
+        assert ref["ref_iter"] == test_iter_num
+        assert ref["calls"] == [test_iter_num, test_iter_num]
+        assert student["x"] == ref["x"]
+
+    assert pl_execute.load_question_code.cache_info().misses == 1
+    assert pl_execute.compile_student_code.cache_info().misses == 1
+
+
+def test_execute_code_reports_student_errors_each_iteration(
+    filenames_dir: Path,
+) -> None:
+    (filenames_dir.parent / "user_code.py").write_text("x = (", encoding="utf-8")
+    fname_ref = str(filenames_dir / "ans.py")
+    fname_student = str(filenames_dir.parent / "user_code.py")
+
+    for test_iter_num in range(2):
+        with pytest.raises(UserCodeFailedError):
+            execute_code(fname_ref, fname_student, test_iter_num=test_iter_num)
+
+
+def test_test_case_runs_for_multiple_iterations(
+    filenames_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("MERGE_DIR", str(filenames_dir.parent))
+    monkeypatch.setattr(code_feedback, "FEEDBACK_DIR", str(filenames_dir.parent))
+
+    class IteratedTest(PLTestCase):
+        total_iters = 3
+
+        @name("Matches reference")
+        def test_0(self) -> None:
+            assert self.st.x == self.ref.x
+            assert self.data["params"]["names_from_user"] == [{"name": "x"}]
+            Feedback.set_score(1)
+
+    loader = unittest.TestLoader()
+    for _ in range(IteratedTest.total_iters):
+        result = PLTestResult()
+        loader.loadTestsFromTestCase(IteratedTest).run(result)
+        assert result.results == [
+            {
+                "name": "Matches reference",
+                "max_points": 1,
+                "filename": "test_0",
+                "points": 1,
+            }
+        ]
+    assert IteratedTest.iter_num == 3
+
+
+SHARED_SETUP_CODE = """
+import numpy as np
+import pandas as pd
+
+A = np.arange(1000.0).reshape(100, 10)
+orig_A = A
+frame = pd.DataFrame({
+    "x": np.arange(100.0),
+    "s": ["a"] * 100,
+    "t": pd.date_range("2020-01-01", periods=100, tz="UTC"),
+})
+orig_frame = frame
+numbers = pd.DataFrame(np.ones((100, 3)), columns=["a", "b", "c"])
+
+def repeated_setup():
+    A[0, 0] += 1
+"""
+
+SHARED_ANS_CODE = """
+A[1, 1] = -1
+frame.loc[0, "x"] = -5
+"""
+
+SHARED_STUDENT_CODE = """
+A[2, 2] = -2
+frame.loc[0, "x"] = -7
+numbers.loc[0, "a"] = 0
+B = A
+"""
+
+
+@pytest.mark.parametrize("share_setup_arrays", [False, True])
+def test_execute_code_isolates_shared_setup_arrays(
+    filenames_dir: Path, monkeypatch: pytest.MonkeyPatch, *, share_setup_arrays: bool
+) -> None:
+    monkeypatch.setattr(pl_execute, "SHARED_ARRAY_MIN_BYTES", 64)
+    (filenames_dir / "data.json").write_text(
+        '{"params": {"names_for_user": [{"name": "A"}, {"name": "frame"}, '
+        '{"name": "numbers"}], "names_from_user": [{"name": "B"}, '
+        '{"name": "frame"}, {"name": "numbers"}]}}',
+        encoding="utf-8",
+    )
+    (filenames_dir / "setup_code.py").write_text(SHARED_SETUP_CODE, encoding="utf-8")
+    (filenames_dir / "ans.py").write_text(SHARED_ANS_CODE, encoding="utf-8")
+    (filenames_dir.parent / "user_code.py").write_text(
+        SHARED_STUDENT_CODE, encoding="utf-8"
+    )
+
+    ref, student, _ = execute_code(
+        str(filenames_dir / "ans.py"),
+        str(filenames_dir.parent / "user_code.py"),
+        share_setup_arrays=share_setup_arrays,
+    )
+
+    # repeated_setup() runs before copying for each of the reference and student
+    assert ref["A"][[0, 1, 2], [0, 1, 2]].tolist() == [1, -1, 22]
+    assert student["B"][[0, 1, 2], [0, 1, 2]].tolist() == [2, 11, -2]
+    assert ref["orig_A"][[0, 1, 2], [0, 1, 2]].tolist() == [2, 11, 22]
+    assert isinstance(student["B"].base, mmap.mmap) == share_setup_arrays
+
+    assert ref["frame"].loc[0, "x"] == -5
+    assert student["frame"].loc[0, "x"] == -7
+    assert ref["orig_frame"].loc[0, "x"] == 0
+    pd.testing.assert_frame_equal(student["frame"].iloc[1:], ref["orig_frame"].iloc[1:])
+    assert student["numbers"].loc[0, "a"] == 0
+    assert ref["numbers"].loc[0, "a"] == 1
+    pd.testing.assert_frame_equal(student["numbers"].iloc[1:], ref["numbers"].iloc[1:])
@@ -0,0 +1,119 @@
+import os
+import time
+import unittest
+from collections.abc import Iterator
+from pathlib import Path
+
+import code_feedback
+import pytest
+from code_feedback import Feedback, pop_feedback
+from pl_helpers import name, points
+from pl_result import PLTestResult
+from pl_unit_test import PLTestCase
+
+
+@pytest.fixture(autouse=True)
+def grading_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    filenames_dir = tmp_path / "filenames"
+    filenames_dir.mkdir()
+    (filenames_dir / "data.json").write_text(
+        '{"params": {"names_from_user": [{"name": "x"}]}}', encoding="utf-8"
+    )
+    (filenames_dir / "setup_code.py").write_text("", encoding="utf-8")
+    (filenames_dir / "ans.py").write_text("x = 2\n", encoding="utf-8")
+    (filenames_dir / "test.py").write_text("", encoding="utf-8")
+    (tmp_path / "user_code.py").write_text("x = 3\n", encoding="utf-8")
+    monkeypatch.setenv("FILENAMES_DIR", str(filenames_dir))
+    monkeypatch.setenv("MERGE_DIR", str(tmp_path))
+    monkeypatch.setattr(code_feedback, "FEEDBACK_DIR", str(tmp_path))
+    yield
+    code_feedback.collect_feedback()
+
+
+def make_test_case(*, parallel: bool) -> type[PLTestCase]:
+    class GradedTest(PLTestCase):
+        parallel_tests = parallel
+
+        @points(2)
+        @name("Scored")
+        def test_0(self) -> None:
+            Feedback.add_feedback(f"x is {self.st.x}")
+            Feedback.set_score(0.5)
+
+        @points(1)
+        @name("Raises")
+        def test_1(self) -> None:
+            raise ValueError(self.ref.x)
+
+        @points(1)
+        @name("Fails")
+        def test_2(self) -> None:
+            Feedback.add_feedback("failing")
+            self.fail()
+
+        @points(3)
+        @name("Stops grading")
+        def test_3(self) -> None:
+            Feedback.finish("stopped")
+
+        @points(1)
+        @name("Skipped")
+        def test_4(self) -> None:
+            Feedback.add_feedback("should not run")
+
+    return GradedTest
+
+
+def run_suite(
+    test_case: type[PLTestCase],
+) -> tuple[PLTestResult, dict[str, str | None]]:
+    suite = unittest.TestLoader().loadTestsFromTestCase(test_case)
+    result = PLTestResult()
+    suite.run(result)
+    filenames = [str(res["filename"]) for res in result.results]
+    feedback = {
+        filename: pop_feedback("feedback_" + filename) for filename in filenames
+    }
+    return result, feedback
+
+
+def test_parallel_tests_match_serial_results() -> None:
+    serial, serial_feedback = run_suite(make_test_case(parallel=False))
+    parallel_test = make_test_case(parallel=True)
+    parallel, parallel_feedback = run_suite(parallel_test)
+
+    assert parallel.results == serial.results
+    assert [res["points"] for res in parallel.results] == [1, 0, 0, 0, 0]
+    assert parallel.skip_grading
+    assert parallel_feedback == serial_feedback
+    assert "should not run" not in (parallel_feedback["test_4"] or "")
+    assert len(parallel.errors) == len(serial.errors) == 1
+    assert len(parallel.failures) == len(serial.failures) == 1
+    assert parallel_test._parallel_runner is None
+
+
+def test_parallel_tests_run_in_child_processes() -> None:
+    class SlowTest(PLTestCase):
+        parallel_tests = True
+
+        @name("pid")
+        def test_0(self) -> None:
+            time.sleep(0.5)
+            Feedback.add_feedback(str(os.getpid()))
+
+        @name("pid")
+        def test_1(self) -> None:
+            time.sleep(0.5)
+            Feedback.add_feedback(str(os.getpid()))
+
+        @name("Crashes")
+        def test_2(self) -> None:
+            os._exit(1)
+
+    result, feedback = run_suite(SlowTest)
+
+    pids = {feedback["test_0"], feedback["test_1"]}
+    assert str(os.getpid()) + "\n" not in pids
+    assert len(pids) == 2
+    assert result.results[2]["points"] == 0
+    assert "exited unexpectedly" in (feedback["test_2"] or "")